@@ -0,0 +1,61 @@
+# benchmarks/bench_field_extraction.py
+# Message のフィールドを条件にした絞り込み (field_extraction) の時間を計測する。
+# 同じ絞り込みをワイルドカードキーワードで列全体を走査する方法と比較し、フィールドを最初に参照した
+# ときの抽出 (初回) と、抽出済みのフィールドに対する比較 (2回目以降) の時間をそれぞれ出力する。
+# 実行方法: python benchmarks/bench_field_extraction.py [--rows 1000000]
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_string_storage import generate_messages
+from src.utils.field_extraction import FieldIndex, parse_field_condition
+from src.utils.glob_match import compile_glob
+from src.utils.log_parser_utils import TEXT_DTYPE
+
+# (フィールドの条件, 同じ行に一致するワイルドカードキーワード)
+QUERIES = [
+    ("field:status>=500", "status=5??"),
+    ("field:status!=200", None),
+    ("field:user==alice", "user=alice"),
+    ("field:id<1000", None),
+]
+
+
+def _elapsed_ms(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, int(result.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Message のフィールドによる絞り込みの計測")
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    frame = pd.DataFrame({"Message": pd.Series(generate_messages(args.rows), dtype=TEXT_DTYPE)})
+    field_index = FieldIndex(frame)
+
+    print(f"rows={args.rows}")
+    print(f"{'condition':>20} {'first ms':>10} {'cached ms':>10} {'hits':>8} {'glob ms':>10} {'glob keyword':>14}")
+    for keyword, glob_keyword in QUERIES:
+        condition = parse_field_condition(keyword)
+        first_ms, hits = _elapsed_ms(lambda: field_index.evaluate(condition))
+        cached_ms, _ = _elapsed_ms(lambda: field_index.evaluate(condition))
+        if glob_keyword is not None:
+            glob_ms, _ = _elapsed_ms(lambda: compile_glob(glob_keyword).match_array(frame["Message"]))
+            glob_text = f"{glob_ms:10.1f}"
+        else:
+            glob_text = f"{'-':>10}"
+        print(f"{keyword:>20} {first_ms:10.1f} {cached_ms:10.1f} {hits:8d} {glob_text} {glob_keyword or '-':>14}")
+    print(f"抽出済みのフィールド: {', '.join(field_index.cached_fields)}")
+
+
+if __name__ == "__main__":
+    main()
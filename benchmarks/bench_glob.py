@@ -0,0 +1,90 @@
+# benchmarks/bench_glob.py
+# ワイルドカードキーワードの判定時間を、通常のパターンと最悪ケースを狙ったパターンで計測する。
+# glob_match (1件ずつの判定と列全体の判定) と、以前の方法 (正規表現に変換して Python の re で評価) を比較する。
+# Python の re は最悪ケースで終わらないことがあるため、別プロセスで実行し --re-timeout 秒で打ち切る。
+# 実行方法: python benchmarks/bench_glob.py [--rows 1000000] [--length 2000] [--re-timeout 5]
+#           [--max-ms 2000]
+# --max-ms を指定した場合、glob_match の判定がいずれかのパターンで超えると終了コード1で終了する。
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_string_storage import generate_messages
+from src.utils.glob_match import compile_glob
+from src.utils.log_parser_utils import TEXT_DTYPE
+
+# 通常の検索で使われるパターン
+TYPICAL_PATTERNS = ["status=500", "id=12345*", "*items*alice", "ID=1?3 *ALICE"]
+# バックトラック型の正規表現で組み合わせ爆発を起こすパターン (長い "aaa...a" の行に対して評価する)
+ADVERSARIAL_PATTERNS = ["*a*a*a*a*b", "*a*a*a*a*a*a*a*a*b", "a?a?a?a?a?a?a?a?b", "*a?a*a?a*a?a*b"]
+
+# 最悪ケースの行を列に混ぜる件数
+ADVERSARIAL_ROWS = 1000
+
+
+def _python_re_search(pattern, text):
+    regex = re.escape(pattern).replace(r'\*', '.*').replace(r'\?', '.')
+    start = time.perf_counter()
+    re.search(regex, text, re.IGNORECASE)
+    return time.perf_counter() - start
+
+
+def time_python_re(pattern, text, timeout):
+    """以前の方法で1行を判定した時間を返す。timeout 秒で終わらなければ None。"""
+    pool = multiprocessing.get_context("spawn").Pool(1)
+    try:
+        return pool.apply_async(_python_re_search, (pattern, text)).get(timeout)
+    except multiprocessing.TimeoutError:
+        return None
+    finally:
+        pool.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ワイルドカードキーワードの判定時間の計測")
+    parser.add_argument("--rows", type=int, default=1000000, help="列全体の判定に使う行数")
+    parser.add_argument("--length", type=int, default=2000, help="最悪ケースの行の長さ")
+    parser.add_argument("--re-timeout", type=float, default=5.0, help="Python の re での判定を打ち切る秒数")
+    parser.add_argument("--max-ms", type=float, default=None, help="glob_match の判定時間の上限")
+    args = parser.parse_args()
+
+    adversarial_text = "a" * args.length
+    messages = generate_messages(args.rows - ADVERSARIAL_ROWS) + [adversarial_text] * ADVERSARIAL_ROWS
+    series = pd.Series(messages, dtype=TEXT_DTYPE)
+    del messages
+
+    print(f"rows={args.rows} (最悪ケースの行 {ADVERSARIAL_ROWS}件, 長さ {args.length})")
+    print(f"{'pattern':>22} {'column ms':>10} {'hits':>8} {'1 row glob ms':>14} {'1 row re ms':>12}")
+    over_budget = []
+    for pattern in TYPICAL_PATTERNS + ADVERSARIAL_PATTERNS:
+        glob = compile_glob(pattern)
+        start = time.perf_counter()
+        hits = int(glob.match_array(series).sum())
+        column_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        glob.match(adversarial_text)
+        row_ms = (time.perf_counter() - start) * 1000
+
+        re_elapsed = time_python_re(pattern, adversarial_text, args.re_timeout)
+        re_text = f"{re_elapsed * 1000:12.1f}" if re_elapsed is not None else f"{'>' + format(args.re_timeout, 'g') + 's':>12}"
+        print(f"{pattern!r:>22} {column_ms:10.1f} {hits:8d} {row_ms:14.3f} {re_text}")
+        if args.max_ms is not None and column_ms > args.max_ms:
+            over_budget.append(f"{pattern!r} {column_ms:.1f} ms > {args.max_ms:.1f} ms")
+
+    if over_budget:
+        print("BUDGET EXCEEDED: " + "; ".join(over_budget))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
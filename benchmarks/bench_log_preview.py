@@ -0,0 +1,58 @@
+# benchmarks/bench_log_preview.py
+# 大きなログファイルのクイックプレビュー (log_preview) の表示までの時間と推定の誤差を、
+# ファイル全体をパースした場合の時間・正確な値と比較して出力する。
+# 実行方法: python benchmarks/bench_log_preview.py [--lines 5000000] [--format iso8601]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_parallel_parse import parse_serially, write_log_file
+from src.utils.log_preview import build_log_preview, local_times, time_span_of_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="クイックプレビューの時間と推定誤差の計測")
+    parser.add_argument("--lines", type=int, default=5000000)
+    parser.add_argument("--format", default="iso8601", help="ログの形式 (iso8601 / rfc3164 / journald_json)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_log_preview_")
+    try:
+        path = os.path.join(work_dir, "huge.log")
+        write_log_file(path, args.format, args.lines)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"format={args.format} lines={args.lines} size={size_mb:.1f}MB")
+
+        start = time.perf_counter()
+        preview = build_log_preview(path)
+        preview_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = parse_serially(path, preview.log_format)
+        full_elapsed = time.perf_counter() - start
+
+        first, last = time_span_of_frame(df)
+        print(f"{'':>12} {'preview':>22} {'full parse':>22}")
+        print(f"{'time':>12} {preview_elapsed:21.2f}s {full_elapsed:21.2f}s")
+        print(f"{'rows':>12} {preview.estimated_rows:22d} {len(df):22d}")
+        print(f"{'first':>12} {str(preview.start):>22} {str(first):>22}")
+        print(f"{'last':>12} {str(preview.end):>22} {str(last):>22}")
+
+        actual_hourly = local_times(df["Timestamp"]).dt.floor("h").value_counts()
+        estimated_hourly = preview.hourly_counts()
+        hours = actual_hourly.index.union(estimated_hourly.index)
+        errors = (estimated_hourly.reindex(hours, fill_value=0) - actual_hourly.reindex(hours, fill_value=0)).abs()
+        print(f"1時間あたりの件数の誤差: 最大 {int(errors.max())}件 / 全体 {int(errors.sum())}件 ({len(hours)}時間)")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
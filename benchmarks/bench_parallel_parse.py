@@ -0,0 +1,68 @@
+# benchmarks/bench_parallel_parse.py
+# 1つの大きなログファイルのパース時間を、1行ずつ読む従来の方法とバイト範囲ごとの並列パース
+# (parallel_parse) のワーカー数ごとに計測し、スループットと従来の方法に対する速度向上を出力する。
+# 実行方法: python benchmarks/bench_parallel_parse.py [--lines 5000000] [--format iso8601] [--workers 1 2 4 8]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_parsers import generate_lines
+from src.utils.log_parser_utils import parse_log_lines
+from src.utils.parallel_parse import parse_file_in_parallel
+
+# 生成したログを書き出す単位の行数
+WRITE_CHUNK_LINES = 500000
+
+
+def write_log_file(path, log_format, line_count):
+    """合成ログを line_count 行書き出す (時刻が重複しないよう、ブロックごとに生成し直す)。"""
+    with open(path, "w") as f:
+        for offset in range(0, line_count, WRITE_CHUNK_LINES):
+            f.writelines(generate_lines(log_format, min(WRITE_CHUNK_LINES, line_count - offset)))
+
+
+def parse_serially(path, log_format):
+    """load_logs_from_path の従来の方法 (1行ずつ読んでデコードし、まとめてパース)。"""
+    with open(path, "rb") as f:
+        lines = [line.decode("utf-8", errors="ignore") for line in f]
+    return parse_log_lines(lines, log_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="1つの大きなログファイルの並列パースの計測")
+    parser.add_argument("--lines", type=int, default=5000000)
+    parser.add_argument("--format", default="iso8601", help="ログの形式 (iso8601 / rfc3164 / journald_json)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_parallel_parse_")
+    try:
+        path = os.path.join(work_dir, "huge.log")
+        write_log_file(path, args.format, args.lines)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"format={args.format} lines={args.lines} size={size_mb:.1f}MB cpus={os.cpu_count()}")
+
+        start = time.perf_counter()
+        rows = len(parse_serially(path, args.format))
+        serial_elapsed = time.perf_counter() - start
+        print(f"{'serial':>10}: {serial_elapsed:7.2f}s {size_mb / serial_elapsed:8.1f} MB/s rows={rows}")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            rows = len(parse_file_in_parallel(path, args.format, max_workers=workers))
+            elapsed = time.perf_counter() - start
+            print(f"{f'workers={workers}':>10}: {elapsed:7.2f}s {size_mb / elapsed:8.1f} MB/s rows={rows} "
+                  f"speedup={serial_elapsed / elapsed:.2f}x")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
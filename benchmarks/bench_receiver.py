@@ -0,0 +1,88 @@
+# benchmarks/bench_receiver.py
+# ライブ受信 (syslog_receiver) の負荷試験。ローカルの負荷生成プロセスから UDP/TCP で
+# 指定した速度で Syslog を送信し、受信・パース・バッファ格納できた件数と取りこぼしを計測する。
+# 実行方法: python benchmarks/bench_receiver.py [--protocol udp|tcp] [--messages 200000] [--rate 50000]
+# --no-receiver を指定すると、別に起動しているアプリの受信ポートへ送信するだけの負荷生成器として動く。
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_parsers import generate_lines
+
+# 送信速度を調整する単位 (この件数ごとに予定時刻まで待つ)
+SEND_BATCH_MESSAGES = 500
+
+
+def send_messages(host, port, protocol, log_format, count, rate):
+    """count 件のメッセージを rate 件/秒 (0 は無制限) で送信する。"""
+    lines = [line.encode("utf-8") for line in generate_lines(log_format, count)]
+    started = time.perf_counter()
+    if protocol == "tcp":
+        with socket.create_connection((host, port)) as sock:
+            for offset in range(0, count, SEND_BATCH_MESSAGES):
+                sock.sendall(b"".join(lines[offset:offset + SEND_BATCH_MESSAGES]))
+                _pace(started, offset + SEND_BATCH_MESSAGES, rate)
+    else:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for offset in range(0, count, SEND_BATCH_MESSAGES):
+                for line in lines[offset:offset + SEND_BATCH_MESSAGES]:
+                    sock.sendto(line, (host, port))
+                _pace(started, offset + SEND_BATCH_MESSAGES, rate)
+    return time.perf_counter() - started
+
+
+def _pace(started, sent, rate):
+    if rate > 0:
+        delay = started + sent / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Syslog 受信の負荷試験")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5514)
+    parser.add_argument("--protocol", choices=("udp", "tcp"), default="udp")
+    parser.add_argument("--format", default="iso8601", help="送信するログの形式 (iso8601 / rfc3164 / journald_json)")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--rate", type=int, default=50000, help="送信速度 (件/秒、0 は無制限)")
+    parser.add_argument("--no-receiver", action="store_true", help="受信側を起動せず、送信のみ行う")
+    args = parser.parse_args()
+
+    if args.no_receiver:
+        elapsed = send_messages(args.host, args.port, args.protocol, args.format, args.messages, args.rate)
+        print(f"sent={args.messages} in {elapsed:.2f}s ({args.messages / elapsed:,.0f} msg/s)")
+        return
+
+    from src.utils.syslog_receiver import SyslogReceiver
+
+    receiver = SyslogReceiver(args.host, args.port, protocols=(args.protocol,), max_messages=args.messages)
+    receiver.start()
+    try:
+        # 送信は別プロセスで行い、受信側と GIL を取り合わないようにする
+        with multiprocessing.Pool(1) as pool:
+            elapsed = pool.apply(send_messages, (args.host, args.port, args.protocol, args.format, args.messages, args.rate))
+        deadline = time.perf_counter() + 10
+        while receiver.stats()["parsed"] + receiver.stats()["unparsed"] + receiver.stats()["dropped"] < args.messages and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        stats = receiver.stats()
+    finally:
+        receiver.stop()
+
+    lost = args.messages - stats["received"] # ソケットで取りこぼした件数
+    print(f"protocol={args.protocol} format={args.format} sent={args.messages} "
+          f"send_rate={args.messages / elapsed:,.0f} msg/s")
+    print(f"received={stats['received']} parsed={stats['parsed']} unparsed={stats['unparsed']} "
+          f"lost={lost} dropped={stats['dropped']} buffered={stats['buffered']} ({stats['buffered_bytes'] / 1024 / 1024:.1f}MB)")
+    sys.exit(1 if lost + stats["dropped"] > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+# benchmarks/bench_sessions.py
+# 複数セッションの同時利用を再現する負荷試験。`streamlit run` でアプリのサーバーを1つだけヘッドレスで起動し、
+# ブラウザの代わりに N 個の WebSocket クライアントを同時に接続して、生成したログで
+# 「アップロード → 日時指定 → キーワードフィルタリング」の操作を行う。
+# クライアントはブラウザと同じく、ウィジェットの値を BackMsg (rerun_script) で送り、スクリプトの実行が
+# 終わったことを示す ForwardMsg (script_finished) を受け取るまでを1つの操作のレイテンシとする。
+# 操作ごとのレイテンシの p50/p95/p99 と、サーバープロセスのピークRSS・CPU使用率を出力する。
+# 実行方法: python benchmarks/bench_sessions.py [--sessions 4] [--lines 100000] [--iterations 3]
+#           [--p95-budget-ms 5000] [--json bench_sessions.json]
+# 予算を指定した場合、いずれかの操作の p95 が予算を超えると終了コード1で終了する。
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+from tornado.websocket import websocket_connect
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_parsers import generate_lines
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+INTERACTIONS = ["initial_render", "upload", "datetime_filter", "open_keyword_page", "keyword_filter", "keyword_filter_or"]
+
+# サーバーの起動とスクリプトの実行を待つ上限 (秒)
+SERVER_START_TIMEOUT = 60
+SCRIPT_RUN_TIMEOUT = 600
+
+
+def _read_proc_stats(pid):
+    """/proc から (RSS バイト数, CPU 時間 秒) を読む。終了済みのプロセスは (0, 0.0)。"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        with open(f"/proc/{pid}/stat") as f:
+            # コマンド名に空白が含まれても良いよう、")" 以降を分割する (utime, stime は14・15番目)
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return rss, cpu
+    except (OSError, IndexError, ValueError):
+        return 0, 0.0
+
+
+class ResourceSampler(threading.Thread):
+    """一定間隔でサーバープロセスのRSSとCPU時間を記録し、ピークRSSとCPU使用率を求める。"""
+
+    def __init__(self, pid, interval=0.1):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_cpu = 0.0
+        self.cpu_seconds = 0.0
+        self._stop_event = threading.Event()
+
+    def _sample(self):
+        rss, cpu = _read_proc_stats(self.pid)
+        self.peak_rss = max(self.peak_rss, rss)
+        # 終了後に読めなくなっても、最後に読めた CPU 時間を使う
+        self.cpu_seconds = max(self.cpu_seconds, cpu)
+        return self.cpu_seconds
+
+    def run(self):
+        last_wall, last_cpu = time.perf_counter(), self._sample()
+        self.started_wall, self.started_cpu = last_wall, last_cpu
+        while not self._stop_event.wait(self.interval):
+            wall, cpu = time.perf_counter(), self._sample()
+            self.peak_cpu = max(self.peak_cpu, (cpu - last_cpu) / (wall - last_wall))
+            last_wall, last_cpu = wall, cpu
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.average_cpu = (self.cpu_seconds - self.started_cpu) / (time.perf_counter() - self.started_wall)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, work_dir):
+    """
+    アプリを `streamlit run` でヘッドレス起動する。作業ディレクトリは work_dir
+    (アップロードされたファイルは work_dir/temp_syslog_upload に保存される)。
+    クライアントはブラウザではないため、XSRF トークンの検証は無効にする。
+    """
+    command = [
+        sys.executable, "-m", "streamlit", "run", os.path.join(project_root, "src", "app.py"),
+        "--server.headless", "true",
+        "--server.address", "127.0.0.1",
+        "--server.port", str(port),
+        "--server.enableXsrfProtection", "false",
+        "--server.fileWatcherType", "none",
+        "--server.maxUploadSize", "4096",
+        "--browser.gatherUsageStats", "false",
+    ]
+    return subprocess.Popen(command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+async def wait_for_server(base_url, server):
+    client = AsyncHTTPClient()
+    deadline = time.perf_counter() + SERVER_START_TIMEOUT
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"サーバーが終了しました: {server.stderr.read().decode(errors='replace')}")
+        try:
+            await client.fetch(f"{base_url}/_stcore/health")
+            return
+        except (OSError, HTTPClientError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError("サーバーが起動しませんでした")
+
+
+class SessionClient:
+    """
+    1つのブラウザのタブの代わりに、WebSocket でサーバーのセッションを操作するクライアント。
+    直前の実行で描画されたウィジェットの ID をキー (key=...) から引けるように保持する。
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.connection = None
+        self.session_id = None
+        self.page_script_hash = ""
+        self.widget_ids = {} # ウィジェットのキー -> ウィジェットの ID (直前の実行のもの)
+        self.values = {} # ウィジェットのキー -> (値の種類, 値)。ブラウザと同じく毎回送る
+        self.exceptions = []
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.base_url.replace("http", "ws", 1) + "/_stcore/stream")
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def _record_element(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+            return
+        widget_id = getattr(getattr(element, kind), "id", "") if kind else ""
+        if isinstance(widget_id, str) and widget_id.startswith("$$ID-"):
+            # キーを指定したウィジェットの ID は "$$ID-<ハッシュ>-<キー>" の形式
+            self.widget_ids[widget_id.split("-", 2)[2]] = widget_id
+
+    def _widget_states(self, one_shot):
+        states = BackMsg().rerun_script.widget_states
+        for key, (value_type, value) in list(self.values.items()) + list(one_shot.items()):
+            widget_id = self.widget_ids.get(key)
+            if widget_id is None:
+                continue # 現在のページに無いウィジェット
+            state = states.widgets.add()
+            state.id = widget_id
+            if value_type == "file_uploader_state_value":
+                state.file_uploader_state_value.CopyFrom(value)
+            else:
+                setattr(state, value_type, value)
+        return states
+
+    async def rerun(self, **one_shot):
+        """
+        ウィジェットの値を送ってスクリプトを再実行し、実行が終わるまで待つ。one_shot はこの再実行でのみ
+        送る値 (ボタンのクリックなど)。スクリプト内の st.rerun による再実行も含めて待つ。
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.widget_states.CopyFrom(self._widget_states(one_shot))
+        self.exceptions = []
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+
+        while True:
+            payload = await asyncio.wait_for(self.connection.read_message(), SCRIPT_RUN_TIMEOUT)
+            if payload is None:
+                raise RuntimeError("サーバーとの接続が切れました")
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                # スクリプトの実行が始まるたびに送られる (st.rerun による再実行を含む)
+                self.session_id = forward.new_session.initialize.session_id
+                self.page_script_hash = forward.new_session.page_script_hash
+                self.widget_ids = {}
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._record_element(forward.delta.new_element)
+            elif kind == "script_finished":
+                if forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    if self.exceptions:
+                        raise RuntimeError("; ".join(self.exceptions))
+                    return
+
+    def set_value(self, key, value_type, value):
+        self.values[key] = (value_type, value)
+
+    async def upload(self, key, path):
+        """ブラウザと同じく、ファイルを upload_file エンドポイントに送ってからファイルアップローダーの値を送る。"""
+        file_id = str(uuid.uuid4())
+        name = os.path.basename(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{name}\"\r\n"
+            f"Content-Type: text/plain\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        upload_url = f"/_stcore/upload_file/{self.session_id}/{file_id}"
+        await AsyncHTTPClient().fetch(
+            self.base_url + upload_url, method="PUT", body=body,
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            request_timeout=SCRIPT_RUN_TIMEOUT,
+        )
+
+        state = BackMsg().rerun_script.widget_states.widgets.add().file_uploader_state_value
+        info = state.uploaded_file_info.add()
+        info.file_id = file_id
+        info.name = name
+        info.size = len(data)
+        info.file_urls.file_id = file_id
+        info.file_urls.upload_url = upload_url
+        info.file_urls.delete_url = upload_url
+        await self.rerun(**{key: ("file_uploader_state_value", state)})
+
+
+async def run_session(index, base_url, log_path, iterations, start_event, latencies, errors):
+    """1セッション分の操作を行い、操作ごとのレイテンシを latencies に追加する。"""
+    client = SessionClient(base_url)
+
+    async def timed(name, action):
+        start = time.perf_counter()
+        await action
+        latencies[name].append(time.perf_counter() - start)
+
+    try:
+        await client.connect()
+        await start_event.wait()
+        await timed("initial_render", client.rerun())
+        await timed("upload", client.upload("main_uploader", log_path))
+
+        for key, value in (("start_hour_spec", "10"), ("start_minute_spec", "00"), ("end_hour_spec", "10"), ("end_minute_spec", "29")):
+            client.set_value(key, "string_value", value)
+        await timed("datetime_filter", client.rerun(filter_datetime_button=("trigger_value", True)))
+        await timed("open_keyword_page", client.rerun(nav_to_keyword_from_spec=("trigger_value", True)))
+
+        for iteration in range(iterations):
+            client.set_value("filter_keyword_0", "string_value", f"app{iteration % 5}")
+            await timed("keyword_filter", client.rerun())
+            if "filter_keyword_1" not in client.widget_ids:
+                await client.rerun(add_filter_button_keyword_page=("trigger_value", True))
+                client.set_value("filter_operator_1", "string_value", "OR")
+                await client.rerun()
+            client.set_value("filter_keyword_1", "string_value", f"took {iteration}?ms")
+            await timed("keyword_filter_or", client.rerun())
+    except Exception as e:
+        errors.append(f"session {index}: {e}")
+    finally:
+        client.close()
+
+
+async def run_sessions(args, base_url, log_path, server):
+    await wait_for_server(base_url, server)
+    latencies = {name: [] for name in INTERACTIONS}
+    errors = []
+    start_event = asyncio.Event()
+    sessions = [
+        asyncio.create_task(run_session(i, base_url, log_path, args.iterations, start_event, latencies, errors))
+        for i in range(args.sessions)
+    ]
+    # 全セッションの接続後に同時に操作を始める
+    await asyncio.sleep(0.5)
+    idle_rss, _ = _read_proc_stats(server.pid)
+    sampler = ResourceSampler(server.pid)
+    sampler.start()
+    started = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+    return latencies, errors, elapsed, sampler, idle_rss
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000 if samples else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複数セッションの同時利用の負荷試験")
+    parser.add_argument("--sessions", type=int, default=4, help="同時に接続するセッション数")
+    parser.add_argument("--lines", type=int, default=100000, help="アップロードする生成ログの行数")
+    parser.add_argument("--iterations", type=int, default=3, help="1セッションあたりのキーワードフィルタリングの繰り返し回数")
+    parser.add_argument("--p95-budget-ms", type=float, default=None)
+    parser.add_argument("--json", default=None, help="結果をJSONで書き出すファイル")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_sessions_")
+    log_path = os.path.join(work_dir, "bench_sessions.log")
+    with open(log_path, "w") as f:
+        f.writelines(generate_lines("iso8601", args.lines))
+
+    port = _free_port()
+    server = start_server(port, work_dir)
+    try:
+        latencies, errors, elapsed, sampler, idle_rss = asyncio.run(
+            run_sessions(args, f"http://127.0.0.1:{port}", log_path, server)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(work_dir)
+
+    summary = {
+        "sessions": args.sessions,
+        "lines": args.lines,
+        "elapsed_s": elapsed,
+        "server_idle_rss_mb": idle_rss / 1024 / 1024,
+        "server_peak_rss_mb": sampler.peak_rss / 1024 / 1024,
+        "server_peak_cpu_cores": sampler.peak_cpu,
+        "server_average_cpu_cores": sampler.average_cpu,
+        "interactions": {
+            name: {
+                "count": len(samples),
+                "p50_ms": percentile_ms(samples, 50),
+                "p95_ms": percentile_ms(samples, 95),
+                "p99_ms": percentile_ms(samples, 99),
+            }
+            for name, samples in latencies.items()
+        },
+        "errors": errors,
+    }
+
+    print(f"sessions={args.sessions} lines={args.lines} elapsed={elapsed:.2f}s")
+    print(f"{'interaction':>18} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, stats in summary["interactions"].items():
+        print(f"{name:>18} {stats['count']:>6} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} {stats['p99_ms']:>10.1f}")
+    print(f"server RSS       : idle {summary['server_idle_rss_mb']:.1f} MB / peak {summary['server_peak_rss_mb']:.1f} MB")
+    print(f"server CPU (cores): peak {summary['server_peak_cpu_cores']:.2f} / average {summary['server_average_cpu_cores']:.2f}")
+    for error in errors:
+        print(f"ERROR: {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    over_budget = [
+        f"{name} p95 {stats['p95_ms']:.1f} ms > {args.p95_budget_ms:.1f} ms"
+        for name, stats in summary["interactions"].items()
+        if args.p95_budget_ms is not None and stats["p95_ms"] > args.p95_budget_ms
+    ]
+    if over_budget:
+        print("BUDGET EXCEEDED: " + "; ".join(over_budget))
+    if over_budget or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_startup.py
+# src/app.py の起動時間 (初回描画) と再実行ごとのオーバーヘッドを計測するベンチマーク。
+# 計測はプロセスの起動直後の状態を再現するため、毎回新しいPythonプロセスで行う。
+# 実行方法: python benchmarks/bench_startup.py [--runs 5] [--reruns 10]
+#           [--first-render-budget-ms 1500] [--rerun-budget-ms 100]
+# 予算を指定した場合、中央値が予算を超えると終了コード1で終了する (CIでの劣化検知用)。
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# 子プロセスで実行する計測コード。streamlit 自体のインポート時間は別に計測する。
+_MEASURE_SNIPPET = r"""
+import sys, time, json
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_import = time.perf_counter() - start
+
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+start = time.perf_counter()
+at.run()
+first_render = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(f"app raised: {at.exception}")
+loaded_after_first_render = [name for name in ("pandas", "numpy", "pytz", "zstandard") if name in sys.modules]
+
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+
+print(json.dumps({
+    "streamlit_import": streamlit_import,
+    "first_render": first_render,
+    "reruns": reruns,
+    "loaded_after_first_render": loaded_after_first_render,
+}))
+"""
+
+
+def measure_once(app_path, reruns):
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SNIPPET, app_path, str(reruns)],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="src/app.py の起動時間ベンチマーク")
+    parser.add_argument("--runs", type=int, default=5, help="コールドスタートの計測回数")
+    parser.add_argument("--reruns", type=int, default=10, help="1プロセスあたりの再実行回数")
+    parser.add_argument("--first-render-budget-ms", type=float, default=None)
+    parser.add_argument("--rerun-budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    app_path = os.path.join(project_root, "src", "app.py")
+    samples = [measure_once(app_path, args.reruns) for _ in range(args.runs)]
+
+    streamlit_import_ms = statistics.median(s["streamlit_import"] for s in samples) * 1000
+    first_render_ms = statistics.median(s["first_render"] for s in samples) * 1000
+    rerun_ms = statistics.median(r for s in samples for r in s["reruns"]) * 1000
+
+    print(f"streamlit import : {streamlit_import_ms:8.1f} ms (median of {args.runs})")
+    print(f"first render     : {first_render_ms:8.1f} ms (median of {args.runs})")
+    print(f"rerun            : {rerun_ms:8.1f} ms (median of {args.runs * args.reruns})")
+    print(f"modules loaded by first render: {', '.join(samples[0]['loaded_after_first_render']) or '(none)'}")
+
+    over_budget = []
+    if args.first_render_budget_ms is not None and first_render_ms > args.first_render_budget_ms:
+        over_budget.append(f"first render {first_render_ms:.1f} ms > {args.first_render_budget_ms:.1f} ms")
+    if args.rerun_budget_ms is not None and rerun_ms > args.rerun_budget_ms:
+        over_budget.append(f"rerun {rerun_ms:.1f} ms > {args.rerun_budget_ms:.1f} ms")
+    if over_budget:
+        print("BUDGET EXCEEDED: " + "; ".join(over_budget))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
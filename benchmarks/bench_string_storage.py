@@ -0,0 +1,50 @@
+# benchmarks/bench_string_storage.py
+# 文字列列の格納形式 (numpy object / string[pyarrow]) によるメモリ使用量と検索時間の比較。
+# 実行方法: python benchmarks/bench_string_storage.py [行数 (既定: 10000000)]
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.utils.log_parser_utils import TEXT_DTYPE
+from src.utils.glob_match import compile_glob
+
+
+def generate_messages(count):
+    """合成したログメッセージを count 件生成する。"""
+    rng = np.random.default_rng(0)
+    request_ids = rng.integers(0, 1_000_000, count).tolist()
+    statuses = rng.choice([200, 200, 200, 404, 500], count).tolist()
+    return [
+        f"request id={request_id} status={status} path=/api/v1/items user=alice"
+        for request_id, status in zip(request_ids, statuses)
+    ]
+
+
+def bench(series, label, patterns):
+    memory_mb = series.memory_usage(deep=True) / 1024 / 1024
+    timings = []
+    for pattern in patterns:
+        regex = compile_glob(pattern).regex
+        start = time.perf_counter()
+        hits = int(series.str.contains(regex, case=False, na=False, regex=True).sum())
+        timings.append((pattern, time.perf_counter() - start, hits))
+    print(f"{label:>16}: memory={memory_mb:9.1f} MB")
+    for pattern, elapsed, hits in timings:
+        print(f"{'':>16}  contains({pattern!r:<22}) {elapsed * 1000:9.1f} ms  hits={hits}")
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    messages = generate_messages(row_count)
+    patterns = ["status=500", "id=12345*", "*items*alice"]
+    bench(pd.Series(messages, dtype=object), "object", patterns)
+    arrow_series = pd.Series(messages, dtype=TEXT_DTYPE)
+    del messages
+    bench(arrow_series, TEXT_DTYPE, patterns)
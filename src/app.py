@@ -10,47 +10,93 @@ if project_root not in sys.path:
 
 import streamlit as st
 import shutil
-from datetime import datetime
-import pandas as pd
+import importlib
 
-# 各ページをインポート
-from src.app_pages import upload_data_page, datetime_spec_page, existing_filter_page, about_page
+# 各ページは表示する時点で初めてインポートする (ページレジストリ)。
+# pandas などの重い依存関係はページ側で読み込まれるため、起動直後の描画や
+# 再実行のたびに全ページ分のインポートが走らないようにしている。
+PAGE_MODULES = {
+    "data_upload": "src.app_pages.upload_data_page",
+    "datetime_spec": "src.app_pages.datetime_spec_page",
+    "keyword_filter": "src.app_pages.existing_filter_page",
+    "about": "src.app_pages.about_page",
+    "multi_search": "src.app_pages.multi_search_page",
+}
+
+# ログデータを読み込んでいなくても表示できるページ
+PAGES_WITHOUT_LOG_DATA = ("about", "multi_search")
+
+def run_page(page_name):
+    """ページレジストリからページモジュールを読み込み、run() を実行する。"""
+    importlib.import_module(PAGE_MODULES[page_name]).run()
+
+def has_log_data():
+    """ログデータが読み込まれている (大容量モードではデータベースに格納されている) かどうかを返す。"""
+    if st.session_state.get('log_database') is not None:
+        return True
+    return st.session_state.df is not None and not st.session_state.df.empty
 
 st.set_page_config(layout="wide")
 
 # --- ナビゲーションの状態を管理するSession State ---
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "data_upload"
+# ログデータは読み込まれるまで None (pandas を起動時に読み込まないため)
 if 'df' not in st.session_state:
-    st.session_state.df = pd.DataFrame()
+    st.session_state.df = None
 if 'df_filtered' not in st.session_state:
-    st.session_state.df_filtered = pd.DataFrame()
+    st.session_state.df_filtered = None
 if 'global_temp_dir' not in st.session_state:
     st.session_state.global_temp_dir = None
 if 'is_returning_from_top_button' not in st.session_state:
     st.session_state.is_returning_from_top_button = False
 
 
+# このセッションが分析中のアップロードの最終利用時刻を更新する。他のセッションでファイルを読み込んだときの
+# 古いアップロードの自動削除 (multi_search.prune_datasets) は、最近使われたアップロードを削除しない
+if st.session_state.global_temp_dir and has_log_data():
+    from src.utils.multi_search import touch_dataset
+    touch_dataset(st.session_state.global_temp_dir)
+
+
 # --- サイドバーのUI ---
 st.sidebar.title("Syslog Filter App")
 st.sidebar.markdown("---")
 
 if st.sidebar.button(":information_source: このアプリケーションについて"):
     st.session_state.current_page = "about"
+if st.sidebar.button(":card_index_dividers: 複数アーカイブ横断検索"):
+    st.session_state.current_page = "multi_search"
+if st.session_state.get('syslog_receiver_key') is not None:
+    from src.app_pages.upload_data_page import get_live_receiver, load_live_snapshot
+    live_receiver = get_live_receiver()
+    if live_receiver is not None:
+        st.sidebar.caption(f"ライブ受信中: {live_receiver.host}:{live_receiver.port}")
+        if st.sidebar.button(":arrows_counterclockwise: 受信したログを再読み込み"):
+            load_live_snapshot()
 st.sidebar.markdown("---")
 
 CLEANUP_ROOT_DIR = "temp_syslog_upload"
 if st.sidebar.button(":wastebasket: 一時ファイルをクリーンアップ (全て削除)"):
     full_cleanup_path = os.path.abspath(CLEANUP_ROOT_DIR)
+    # ライブ受信も停止してポートを解放する (受信はプロセス全体で共有している)
+    from src.app_pages.upload_data_page import stop_live_receivers
+    stop_live_receivers()
+    st.session_state.syslog_receiver_key = None
     print(f"DEBUG: クリーンアップを試行します。対象ディレクトリ: {full_cleanup_path}")
     if os.path.exists(full_cleanup_path):
         try:
             shutil.rmtree(full_cleanup_path)
             st.session_state.global_temp_dir = None
-            st.session_state.df = pd.DataFrame()
-            st.session_state.df_filtered = pd.DataFrame()
+            st.session_state.df = None
+            st.session_state.df_filtered = None
+            st.session_state.log_database = None
             if 'found_log_files' in st.session_state:
                 del st.session_state.found_log_files
+            if 'log_summary' in st.session_state:
+                del st.session_state.log_summary
+            if 'multi_search_result' in st.session_state:
+                del st.session_state.multi_search_result
             st.session_state.current_page = "data_upload"
             st.rerun()
             st.sidebar.success(f"一時ディレクトリ '{CLEANUP_ROOT_DIR}' と関連するログデータを全て削除しました。")
@@ -71,7 +117,7 @@ with col_main_header:
     st.title("Syslog Filter Application")
 with col_nav_button:
     # 日時指定ページとデータ読み込みページ以外でボタンを表示
-    if not st.session_state.df.empty and st.session_state.current_page != "datetime_spec" and st.session_state.current_page != "data_upload":
+    if has_log_data() and st.session_state.current_page != "datetime_spec" and st.session_state.current_page != "data_upload":
         if st.button(":calendar: 日時指定ページへ", key="nav_to_datetime_spec_btn_top"):
             st.session_state.current_page = "datetime_spec"
             st.rerun()
@@ -95,15 +141,11 @@ st.markdown("---")
 
 
 # ルーティングロジック
-if st.session_state.df.empty and st.session_state.current_page != "about":
+if not has_log_data() and st.session_state.current_page not in PAGES_WITHOUT_LOG_DATA:
     st.warning("ログデータを読み込むまで、他の機能は選択できません。")
     st.session_state.current_page = "data_upload"
-    upload_data_page.run()
-elif st.session_state.current_page == "datetime_spec":
-    datetime_spec_page.run()
-elif st.session_state.current_page == "keyword_filter":
-    existing_filter_page.run()
-elif st.session_state.current_page == "about":
-    about_page.run()
+    run_page("data_upload")
+elif st.session_state.current_page in PAGE_MODULES:
+    run_page(st.session_state.current_page)
 else:
-    upload_data_page.run()
\ No newline at end of file
+    run_page("data_upload")
\ No newline at end of file
@@ -29,6 +29,11 @@ def run():
         * 展開されたログファイルが1つのみの場合、自動的にそのファイルを読み込みます。
         * 複数の `.log` ファイルが見つかった場合は、ドロップダウンリストから分析対象のファイルを**手動で選択**できます。
     * **効率的なログパース**: `YYYY-MM-DDTHH:MM:SS.ffffff+HH:MM hostname app_name[PID]: message` 形式のSyslogを解析し、ANSIエスケープシーケンスを自動除去します。
+    * **連続する同一メッセージのまとめ読み込み**: 大量に繰り返される同一メッセージを、件数と最初/最後の時刻を持つ1行にまとめて読み込めます。まとめた行は検索・ダウンロード時に元の行へ展開できます。
+    * **ライブ受信**: ローカルのポートで UDP/TCP の Syslog を受信し、直近のメッセージをリングバッファに保持して、アップロードしたログと同じように分析できます。
+    * **ログ形式の自動判定**: ファイル先頭の行をサンプリングし、ISO8601形式・BSD形式 (RFC3164)・journald のJSON出力を自動判定して、形式ごとの高速パーサーで読み込みます。
+    * **大きなファイルの並列パース**: 大きなログファイルは改行位置で区切ったバイト範囲に分けてパースします。アップロード画面で選んだ場合は、複数のプロセスで並列にパースします (実験的)。
+    * **クイックプレビュー**: 大きなログファイルは、全体の読み込みを待たずに一部の行から推定した期間・件数・Hostname / AppName の分布を表示します。推定値は読み込みが終わると正確な値に置き換わります。
 
     #### 共通機能
     * **一時ファイルのクリーンアップ**: アップロードおよび展開された一時ファイルを、サイドバーのボタンから手動で完全に削除できます（`temp_syslog_upload` ディレクトリごと）。
@@ -36,6 +41,7 @@ def run():
     * **グローバルUI要素**:
         * 画面右上に、常に表示される「日時指定ページへ」ボタン（日時指定ページとデータ読み込みページ以外で表示）と「トップページへ戻る」ボタンを配置し、どこからでも主要なページへアクセス可能にしました。
         * サイドバーの「このアプリケーションについて」ボタンで、いつでも情報ページにアクセスできます。
+    * **複数アーカイブ横断検索**: サイドバーの「複数アーカイブ横断検索」ボタンから、過去にアップロードした全てのアーカイブを同じ日時範囲とキーワード条件で並列に検索できます。結果はタイムスタンプ順に統合され、アーカイブ名とファイル名が付きます。過去のアップロードは最大10件・合計10GBまで残り、超えた分は古いものから自動で削除されます (12時間以内に使われたアップロードは除きます)。
 
     #### 「日時指定・抽出」ページ
     * **日付範囲の指定**: ログデータ内に存在する日付の範囲内で、**開始日と終了日をそれぞれ指定**し、日付範囲でログを抽出できます。
@@ -48,6 +54,8 @@ def run():
     * **キーワード検索の対象拡張**: ログメッセージだけでなく、**タイムスタンプ (Timestamp)**、Hostname、AppName、PID も検索キーワードの対象となります。
     * **表示・出力列のカスタマイズ**: 結果テーブルに表示する列や、ダウンロードするCSV/LOGファイルに含める列を、**チェックボックスで個別にON/OFF選択**できます。
     * **日時絞り込みとの連携**: このページは「日時指定・抽出」ページで絞り込まれたデータを対象とします。設定された日時範囲がページ上で表示されます。
+    * **ワイルドカードの高速な判定**: キーワードの `*` / `?` は正規表現のバックトラックを使わずに判定するため、複雑なパターンと長いメッセージの組み合わせでも処理が止まりません。
+    * **フィールドによる絞り込み**: `field:status>=500` や `field:latency_ms>1000` のように `field:` に続けて指定すると、Message 中の `key=value` や JSON のフィールドの値を比較して絞り込みます。抽出したフィールドはキャッシュされ、2回目以降の条件はすぐに評価されます。
     * **表示行数のカスタマイズ**: 結果表示の最大行数をスライダーで調整できます。
     * **結果のダウンロードの堅牢性**: CSVダウンロード時のエスケープエラーを修正し、より確実にダウンロードできるようになりました。LOG形式のダウンロードも選択された列を反映します。
 
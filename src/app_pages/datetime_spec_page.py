@@ -4,7 +4,12 @@ import pandas as pd
 from datetime import datetime, date, time, timedelta
 import io
 import csv
-import pytz
+
+from src.utils import sql_backend
+from src.utils.run_length import RUN_TIMESTAMPS_COLUMN, expand_collapsed_rows, expanded_row_count, filter_collapsed_by_time_range, is_collapsed
+
+# 大容量モードで絞り込み結果として取り出す最大行数
+DATABASE_PREVIEW_ROWS = 100000
 
 def generate_hour_options():
     """00から23までの時間の選択肢を文字列で生成する"""
@@ -19,19 +24,40 @@ def run():
     st.write("ステップ3の分析ページに進む前に、ログの期間を絞り込んでください。")
 
     df_source = st.session_state.df if 'df' in st.session_state and st.session_state.df is not None else pd.DataFrame()
+    log_database = st.session_state.get('log_database')
 
-    if df_source.empty:
+    if df_source.empty and log_database is None:
         st.warning("ログデータが読み込まれていません。「データ読み込み」ページでファイルをアップロードしてください。")
         st.session_state.current_page = "data_upload"
         st.rerun()
         return
 
-    st.write(f"元のログの行数: {len(df_source)}行")
+    if log_database is not None:
+        st.write(f"元のログの行数: {sql_backend.get_row_count(log_database)}行 (大容量モード)")
+    elif is_collapsed(df_source):
+        st.write(f"元のログの行数: {expanded_row_count(df_source)}行 (連続する同一メッセージをまとめて{len(df_source)}行)")
+    else:
+        st.write(f"元のログの行数: {len(df_source)}行")
     st.subheader("絞り込み設定")
 
-    if not df_source['Timestamp'].empty and pd.api.types.is_datetime64_any_dtype(df_source['Timestamp']):
+    # 読み込み時に求めたログの期間 (大きなファイルの読み込み中はクイックプレビューの推定値)
+    time_span = st.session_state.get('log_time_span') or {}
+    span_start, span_end = time_span.get("start"), time_span.get("end")
+    if span_start is not None and span_end is not None:
+        estimated_note = " (推定値。読み込みが終わると更新されます)" if time_span.get("estimated") else ""
+        st.caption(f"ログの期間: {span_start.strftime('%Y-%m-%d %H:%M:%S')} 〜 {span_end.strftime('%Y-%m-%d %H:%M:%S')}{estimated_note}")
+
+    if log_database is not None:
+        first_timestamp, last_timestamp = sql_backend.get_time_bounds(log_database)
+        min_date_available = first_timestamp.date() if first_timestamp else date.today()
+        max_date_available = last_timestamp.date() if last_timestamp else date.today()
+    elif not df_source['Timestamp'].empty and pd.api.types.is_datetime64_any_dtype(df_source['Timestamp']):
         min_date_available = df_source['Timestamp'].dt.date.min()
         max_date_available = df_source['Timestamp'].dt.date.max()
+    elif span_start is not None and span_end is not None:
+        # オフセットが混在する場合などは Timestamp が datetime オブジェクトの列になっている
+        min_date_available = span_start.date()
+        max_date_available = span_end.date()
     else:
         min_date_available = date.today()
         max_date_available = date.today()
@@ -40,6 +66,9 @@ def run():
         saved_conditions = st.session_state.datetime_spec_conditions
         default_start_date = saved_conditions.get("start_date", min_date_available)
         default_end_date = saved_conditions.get("end_date", max_date_available)
+    elif span_start is not None and span_end is not None:
+        default_start_date = span_start.date()
+        default_end_date = span_end.date()
     else:
         default_start_date = min_date_available if pd.notna(min_date_available) else date.today()
         default_end_date = max_date_available if pd.notna(max_date_available) else date.today()
@@ -83,6 +112,12 @@ def run():
         start_minute_index = minute_options.index(saved_conditions.get("start_minute", minute_options[0])) if saved_conditions.get("start_minute") in minute_options else 0
         end_hour_index = hour_options.index(saved_conditions.get("end_hour", hour_options[-1])) if saved_conditions.get("end_hour") in hour_options else len(hour_options)-1
         end_minute_index = minute_options.index(saved_conditions.get("end_minute", minute_options[-1])) if saved_conditions.get("end_minute") in minute_options else len(minute_options)-1
+    elif span_start is not None and span_end is not None:
+        # 初期値はログの最初と最後の時刻 (分単位)
+        start_hour_index = span_start.hour
+        start_minute_index = span_start.minute
+        end_hour_index = span_end.hour
+        end_minute_index = span_end.minute
     else:
         start_hour_index = 0
         start_minute_index = 0
@@ -114,10 +149,22 @@ def run():
             end_datetime_full_naive = datetime.combine(end_date_selection, end_time_obj) + timedelta(seconds=59, microseconds=999999)
             # -----------------------------------------------
             
-            if not df_source.empty and 'Timestamp' in df_source.columns and pd.api.types.is_datetime64_any_dtype(df_source['Timestamp']):
+            if log_database is not None:
+                # データベース上で範囲内の件数を数え、先頭の DATABASE_PREVIEW_ROWS 行だけを取り出す
+                filtered_count = sql_backend.count_logs(log_database, start_datetime_full_naive, end_datetime_full_naive)
+                filtered_df = sql_backend.fetch_logs(log_database, start_datetime_full_naive, end_datetime_full_naive, limit=DATABASE_PREVIEW_ROWS)
+                start_datetime_full = start_datetime_full_naive
+                end_datetime_inclusive = end_datetime_full_naive
+            elif is_collapsed(df_source):
+                # まとめた行は各行の時刻の一覧で絞り込む (範囲の境界をまたぐ行は範囲内の分だけ残る)
+                filtered_df = filter_collapsed_by_time_range(df_source, start_datetime_full_naive, end_datetime_full_naive)
+                start_datetime_full = start_datetime_full_naive
+                end_datetime_inclusive = end_datetime_full_naive
+            elif not df_source.empty and 'Timestamp' in df_source.columns and pd.api.types.is_datetime64_any_dtype(df_source['Timestamp']):
                 df_tz = df_source['Timestamp'].dt.tz
                 
                 if df_tz:
+                    import pytz # タイムゾーン付きのログを絞り込む場合のみ必要なため遅延インポート
                     try:
                         tz_name = str(df_tz)
                         target_timezone = pytz.timezone(tz_name)
@@ -135,7 +182,7 @@ def run():
                 start_datetime_full = start_datetime_full_naive
                 end_datetime_inclusive = end_datetime_full_naive
             
-            if 'Timestamp' in filtered_df.columns and pd.api.types.is_datetime64_any_dtype(filtered_df['Timestamp']):
+            if log_database is None and not is_collapsed(filtered_df) and 'Timestamp' in filtered_df.columns and pd.api.types.is_datetime64_any_dtype(filtered_df['Timestamp']):
                 filtered_df = filtered_df[
                     (filtered_df['Timestamp'] >= start_datetime_full) &
                     (filtered_df['Timestamp'] <= end_datetime_inclusive)
@@ -150,20 +197,30 @@ def run():
                 "start_minute": selected_start_minute_str,
                 "end_hour": selected_end_hour_str,
                 "end_minute": selected_end_minute_str,
-                "filtered_count": len(filtered_df)
+                "start_datetime": start_datetime_full_naive,
+                "end_datetime": end_datetime_full_naive,
+                "filtered_count": filtered_count if log_database is not None else expanded_row_count(filtered_df)
             }
             
-            st.success(f"{len(st.session_state.df_filtered)}件のログを絞り込みました。")
+            st.success(f"{st.session_state.datetime_spec_conditions['filtered_count']}件のログを絞り込みました。")
             st.rerun()
 
     if 'df_filtered' in st.session_state and st.session_state.df_filtered is not None:
         st.subheader("絞り込み結果の確認")
-        st.write(f"絞り込み後のログの行数: {len(st.session_state.df_filtered)}行")
+        if log_database is not None and 'datetime_spec_conditions' in st.session_state:
+            st.write(f"絞り込み後のログの行数: {st.session_state.datetime_spec_conditions.get('filtered_count')}行")
+            if st.session_state.datetime_spec_conditions.get('filtered_count', 0) > len(st.session_state.df_filtered):
+                st.info(f"大容量モードのため、先頭の {len(st.session_state.df_filtered)} 行のみを表示・ダウンロードの対象としています。")
+        elif is_collapsed(st.session_state.df_filtered):
+            st.write(f"絞り込み後のログの行数: {expanded_row_count(st.session_state.df_filtered)}行 (連続する同一メッセージをまとめて{len(st.session_state.df_filtered)}行)")
+        else:
+            st.write(f"絞り込み後のログの行数: {len(st.session_state.df_filtered)}行")
         
         if not st.session_state.df_filtered.empty:
-            display_df_filtered = st.session_state.df_filtered.copy()
-            if 'Timestamp' in display_df_filtered.columns and pd.api.types.is_datetime64_any_dtype(display_df_filtered['Timestamp']):
-                display_df_filtered['Timestamp'] = display_df_filtered['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+            display_df_filtered = st.session_state.df_filtered.drop(columns=[RUN_TIMESTAMPS_COLUMN], errors="ignore")
+            for timestamp_col in ('Timestamp', 'LastTimestamp'):
+                if timestamp_col in display_df_filtered.columns and pd.api.types.is_datetime64_any_dtype(display_df_filtered[timestamp_col]):
+                    display_df_filtered[timestamp_col] = display_df_filtered[timestamp_col].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
             
             total_rows = len(display_df_filtered)
             if total_rows > 6:
@@ -176,9 +233,15 @@ def run():
             st.markdown("---")
 
             download_format = st.radio("ダウンロード形式を選択", ("CSV", "LOG"), key="download_spec_format")
+            export_df = st.session_state.df_filtered
+            if is_collapsed(export_df):
+                if st.checkbox("まとめた行を元の行に展開してダウンロード", value=True, key="download_spec_expand_collapsed"):
+                    export_df = expand_collapsed_rows(export_df)
+                else:
+                    export_df = export_df.drop(columns=[RUN_TIMESTAMPS_COLUMN])
 
             if download_format == "CSV":
-                csv_data_datetime = st.session_state.df_filtered.to_csv(
+                csv_data_datetime = export_df.to_csv(
                     index=False, 
                     quoting=csv.QUOTE_ALL,
                     escapechar='\\'
@@ -192,7 +255,7 @@ def run():
                 )
             else: # LOG形式
                 log_lines_output = []
-                for _, row in st.session_state.df_filtered.iterrows():
+                for _, row in export_df.iterrows():
                     timestamp_str = row['Timestamp'].isoformat() if pd.notna(row['Timestamp']) else ""
                     hostname_str = str(row['Hostname']) if pd.notna(row['Hostname']) else "-"
                     app_name_str = str(row['AppName']) if pd.notna(row['AppName']) else "-"
@@ -213,10 +276,10 @@ def run():
         else:
             st.info("指定された条件に一致するログは見つかりませんでした。")
         
-        st.markdown("---")
-        st.subheader("次のステップへ")
-        col_btn1, = st.columns(1)
-        with col_btn1:
-            if st.button("キーワードフィルタリングへ", key="nav_to_keyword_from_spec"):
-                st.session_state.current_page = "keyword_filter"
-                st.rerun()
\ No newline at end of file
+    st.markdown("---")
+    st.subheader("次のステップへ")
+    col_btn1, = st.columns(1)
+    with col_btn1:
+        if st.button("キーワードフィルタリングへ", key="nav_to_keyword_from_spec"):
+            st.session_state.current_page = "keyword_filter"
+            st.rerun()
\ No newline at end of file
@@ -1,12 +1,24 @@
 # src/app_pages/existing_filter_page.py
 import streamlit as st
 import pandas as pd
-import re
 from datetime import datetime, timedelta, time, date
 import csv # csv モジュールをインポート済み
 
 # utilsからparse_syslog_lineをインポート
 from src.utils.log_parser_utils import parse_syslog_line
+from src.utils.filter_utils import SEARCH_COLUMNS, build_search_text, evaluate_keyword_filters, expand_context_rows
+from src.utils.field_extraction import FieldIndex
+from src.utils.sketches import LogSummary, SUMMARY_TOP_COLUMNS, SUMMARY_DISTINCT_COLUMNS
+from src.utils import sql_backend
+from src.utils.run_length import COUNT_COLUMN, LAST_TIMESTAMP_COLUMN, expand_collapsed_rows, expanded_row_count, is_collapsed
+
+# 前後の行 (コンテキスト) を数える範囲の選択肢 -> グループ化に使う列
+CONTEXT_GROUP_OPTIONS = {
+    "ログ全体": None,
+    "同じHostname": ["Hostname"],
+    "同じAppName": ["AppName"],
+    "同じHostnameとAppName": ["Hostname", "AppName"],
+}
 
 # --- フィルタ管理用のヘルパー関数 (オリジナルのapp.pyからコピー) ---
 def add_filter():
@@ -25,11 +37,102 @@ def update_filter_keyword(index):
 def update_filter_operator(index):
     st.session_state.filters_keyword_page[index]["operator"] = st.session_state[f"filter_operator_{index}"]
 
-def convert_wildcard_to_regex(pattern):
-    escaped_pattern = re.escape(pattern)
-    escaped_pattern = escaped_pattern.replace(r'\*', '.*')
-    escaped_pattern = escaped_pattern.replace(r'\?', '.')
-    return escaped_pattern
+def render_keyword_filter_inputs():
+    """キーワード条件 (filters_keyword_page) の入力欄を表示する。複数アーカイブ横断検索ページと共用。"""
+    if 'filters_keyword_page' not in st.session_state:
+        st.session_state.filters_keyword_page = [{"keyword": "", "operator": "AND"}]
+
+    for i, filter_item in enumerate(st.session_state.filters_keyword_page):
+        col_op, col_kw, col_btn = st.columns([1, 4, 1])
+
+        with col_op:
+            if i == 0:
+                st.write("")
+            else:
+                st.selectbox(
+                    "演算子",
+                    ["AND", "OR"],
+                    index=0 if filter_item["operator"] == "AND" else 1,
+                    key=f"filter_operator_{i}",
+                    label_visibility="collapsed",
+                    on_change=update_filter_operator,
+                    args=(i,)
+                )
+        with col_kw:
+            st.text_input(
+                "キーワード",
+                value=filter_item["keyword"],
+                key=f"filter_keyword_{i}",
+                label_visibility="collapsed",
+                on_change=update_filter_keyword,
+                args=(i,)
+            )
+        with col_btn:
+            if len(st.session_state.filters_keyword_page) > 1:
+                st.button("削除", key=f"remove_filter_{i}", on_click=remove_filter, args=(i,))
+            else:
+                st.write("")
+
+    st.button("フィルタ追加", on_click=add_filter, key="add_filter_button_keyword_page")
+
+def get_full_log_summary():
+    """読み込み時に作成された全データのサマリーを返す。無い場合はここで作成して保持する。"""
+    summary = st.session_state.get('log_summary')
+    if st.session_state.get('log_database') is not None:
+        # 大容量モードでは全データをメモリに持たないため、格納時に作成したサマリーのみを使う
+        return summary if summary is not None else LogSummary()
+    if summary is None or summary.total_rows != expanded_row_count(st.session_state.df):
+        summary = LogSummary.from_frame(st.session_state.df, get_row_weights(st.session_state.df))
+        st.session_state.log_summary = summary
+    return summary
+
+def get_row_weights(df):
+    """サマリーの集計に使う行ごとの件数 (連続する同一メッセージをまとめた行は Count、それ以外は None)。"""
+    return df[COUNT_COLUMN] if is_collapsed(df) else None
+
+def get_session_cached(cache_name, source, variant, build):
+    """
+    source (読み込んだログの DataFrame、または大容量モードのデータベースのパス) と variant (絞り込み条件など) が
+    前回の呼び出しと同じであれば前回の build() の結果を返し、異なれば build() を呼び出して結果を保持する。
+    source は参照を保持して同一のオブジェクトかどうかで比較する (再読み込みしたログと取り違えない)。
+    """
+    cached = st.session_state.get(cache_name)
+    if cached is not None and cached[0] is source and cached[1] == variant:
+        return cached[2]
+    value = build()
+    st.session_state[cache_name] = (source, variant, value)
+    return value
+
+def render_summary_panel(filtered_df, source, variant, fetched_tail=False):
+    """
+    上位の値 (Top N) と異なり数のサマリーを表示する。現在のフィルタ結果のサマリーは、
+    source と variant (get_session_cached) が変わるまで作り直さない。
+    fetched_tail が True の場合 (大容量モード) は、filtered_df が条件に一致した行の末尾のみであることを表示する。
+    """
+    with st.expander("サマリー (上位の値・異なり数)"):
+        target = st.radio("集計対象", ("全データ", "現在のフィルタ結果"), horizontal=True, key="summary_target_keyword_page")
+        top_n = st.slider("上位の表示件数", 5, 50, 10, key="summary_top_n_keyword_page")
+        if target == "全データ":
+            summary = get_full_log_summary()
+        else:
+            summary = get_session_cached(
+                'filtered_summary_keyword_page', source, variant,
+                lambda: LogSummary.from_frame(filtered_df, get_row_weights(filtered_df)),
+            )
+
+        st.caption(f"対象: {summary.total_rows}行 (件数・異なり数は確率的データ構造による推定値です)")
+        if target != "全データ" and fetched_tail:
+            st.caption(f"大容量モードでは、条件に一致した行のうち取得した末尾の {len(filtered_df)}行のみを集計しています。")
+        metric_cols = st.columns(len(SUMMARY_DISTINCT_COLUMNS))
+        for metric_col, col in zip(metric_cols, SUMMARY_DISTINCT_COLUMNS):
+            with metric_col:
+                st.metric(f"{col} の異なり数", f"{summary.distinct_count(col):,}")
+
+        top_cols = st.columns(len(SUMMARY_TOP_COLUMNS))
+        for top_col, col in zip(top_cols, SUMMARY_TOP_COLUMNS):
+            with top_col:
+                st.markdown(f"**{col} の上位**")
+                st.dataframe(summary.top_values(col, top_n), use_container_width=True, hide_index=True)
 
 # --- 時間選択肢の生成ヘルパー関数 ---
 def generate_time_options(interval_minutes=5):
@@ -46,13 +149,32 @@ def generate_time_options(interval_minutes=5):
 def run():
     st.title("Syslog Filter (キーワードフィルタリング)")
 
-    df_source = st.session_state.df_filtered if 'df_filtered' in st.session_state and not st.session_state.df_filtered.empty else st.session_state.df
+    # 大容量モードでは日時範囲とキーワードをSQLに変換してデータベース上で絞り込む
+    log_database = st.session_state.get('log_database')
+    if log_database is not None:
+        df_source = None
+    else:
+        df_source = st.session_state.df_filtered if st.session_state.get('df_filtered') is not None and not st.session_state.df_filtered.empty else st.session_state.df
+    # 絞り込みの結果から作るサマリーなどのキャッシュのキー (展開する前のログ、またはデータベース)
+    stored_source = log_database if log_database is not None else df_source
+    expanded = False
     
     if 'filters_keyword_page' not in st.session_state:
         st.session_state.filters_keyword_page = [{"keyword": "", "operator": "AND"}]
 
-    if not df_source.empty:
-        st.write(f"元のログの行数: {len(df_source)}行")
+    if log_database is not None or not df_source.empty:
+        if log_database is not None:
+            conditions = st.session_state.get('datetime_spec_conditions', {})
+            range_start, range_end = conditions.get("start_datetime"), conditions.get("end_datetime")
+            st.write(f"元のログの行数: {sql_backend.count_logs(log_database, range_start, range_end)}行 (大容量モード)")
+        elif is_collapsed(df_source):
+            st.write(f"元のログの行数: {expanded_row_count(df_source)}行 (連続する同一メッセージをまとめて{len(df_source)}行)")
+            # 展開した場合は、まとめた行の途中の時刻 (Timestamp) もキーワード検索の対象になる
+            if st.checkbox("まとめた行を元の行に展開して検索・表示する", key="expand_collapsed_keyword_page"):
+                df_source = expand_collapsed_rows(df_source)
+                expanded = True
+        else:
+            st.write(f"元のログの行数: {len(df_source)}行")
 
         # 日時によるフィルタリング設定を表示するExpander
         if 'datetime_spec_conditions' in st.session_state:
@@ -66,91 +188,80 @@ def run():
                 st.write(f"**絞り込み済みログ数**: {conditions.get('filtered_count', 'N/A')}行")
 
         st.subheader("キーワードによるフィルタリング")
-        st.info("キーワードで **`*` は0文字以上の任意の文字、**`?` は任意の1文字**を表します。")
-
-        search_cols_source = ['Timestamp', 'Hostname', 'AppName', 'PID', 'Message']
+        st.info(
+            "キーワードで **`*` は0文字以上の任意の文字、**`?` は任意の1文字**を表します。\n\n"
+            "`field:status>=500` や `field:latency_ms>1000` のように **`field:` に続けてフィールド名と比較演算子 (`>` `>=` `<` `<=` `==` `!=`)** を"
+            "指定すると、Message 中の `key=value` や JSON の `\"key\": value` の値で絞り込みます。"
+            "`field:` の無いキーワード (`name==value` など) は通常のキーワードとして扱います。"
+        )
 
-        for i, filter_item in enumerate(st.session_state.filters_keyword_page):
-            col_op, col_kw, col_btn = st.columns([1, 4, 1])
+        search_cols_source = SEARCH_COLUMNS
 
-            with col_op:
-                if i == 0:
-                    st.write("")
-                else:
-                    st.selectbox(
-                        "演算子",
-                        ["AND", "OR"],
-                        index=0 if filter_item["operator"] == "AND" else 1,
-                        key=f"filter_operator_{i}",
-                        label_visibility="collapsed",
-                        on_change=update_filter_operator,
-                        args=(i,)
-                    )
-            with col_kw:
-                st.text_input(
-                    "キーワード",
-                    value=filter_item["keyword"],
-                    key=f"filter_keyword_{i}",
-                    label_visibility="collapsed",
-                    on_change=update_filter_keyword,
-                    args=(i,)
-                )
-            with col_btn:
-                if len(st.session_state.filters_keyword_page) > 1:
-                    st.button("削除", key=f"remove_filter_{i}", on_click=remove_filter, args=(i,))
-                else:
-                    st.write("")
+        render_keyword_filter_inputs()
 
-        st.button("フィルタ追加", on_click=add_filter, key="add_filter_button_keyword_page")
+        context_lines = 0
+        if log_database is None:
+            col_context, col_context_group = st.columns([1, 2])
+            with col_context:
+                context_lines = st.number_input("一致した行の前後に表示する行数 (grep -C)", min_value=0, max_value=10000, value=0, step=1, key="context_lines_keyword_page")
+            with col_context_group:
+                context_group_label = st.selectbox("前後の行を数える範囲", list(CONTEXT_GROUP_OPTIONS.keys()), key="context_group_keyword_page")
         st.markdown("---")
 
-        filtered_df = df_source.copy()
+        matched_rows = None # コンテキスト表示時に、一致した行 (True) と前後の行 (False) を区別する
 
-        if not df_source.empty:
-            # Timestamp を文字列として結合 (検索用)
-            df_for_search = filtered_df.copy()
-            if 'Timestamp' in df_for_search.columns and pd.api.types.is_datetime64_any_dtype(df_for_search['Timestamp']):
-                df_for_search['Timestamp_str'] = df_for_search['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
-            
-            search_cols_to_join = [col if col != 'Timestamp' else 'Timestamp_str' for col in search_cols_source]
-            search_cols_to_join = [col for col in search_cols_to_join if col in df_for_search.columns]
+        if log_database is not None:
+            # 条件に一致した件数を数え、表示する末尾の行だけを DataFrame として取り出す
+            max_rows_to_fetch = st.session_state.get("max_rows_filter_page", 2000)
+            total_filtered_count = sql_backend.count_logs(log_database, range_start, range_end, st.session_state.filters_keyword_page)
+            filtered_df = sql_backend.fetch_logs(log_database, range_start, range_end, st.session_state.filters_keyword_page, limit=max_rows_to_fetch, from_end=True)
+        else:
+            filtered_df = df_source.copy()
 
-            combined_text_series = df_for_search[search_cols_to_join].fillna('').astype(str).agg(' '.join, axis=1)
+        if log_database is None and not df_source.empty:
+            # Timestamp を含む検索対象の列を Arrow の文字列として結合 (検索用)
+            # str.contains は Arrow の正規表現カーネルで評価される
+            combined_text_series = build_search_text(filtered_df, search_cols_source)
 
             # キーワードフィルタリングロジック (combined_text_series を使用)
+            # Message から抽出したフィールドは、同じログに対する以降の検索で使い回す
+            # (展開したログは再実行のたびに作り直されるため、読み込んだログと展開の有無で判定する)
+            field_index = get_session_cached('field_index', stored_source, expanded, lambda: FieldIndex(df_source))
+
             if st.session_state.filters_keyword_page:
-                current_filter_series = None
-                
-                first_condition_keyword = st.session_state.filters_keyword_page[0]['keyword'].strip()
-                if first_condition_keyword:
-                    first_regex = convert_wildcard_to_regex(first_condition_keyword)
-                    current_filter_series = combined_text_series.str.contains(first_regex, case=False, na=False, regex=True)
-                else:
-                    current_filter_series = pd.Series([True] * len(filtered_df), index=filtered_df.index)
-                    
-                for i in range(1, len(st.session_state.filters_keyword_page)):
-                    condition = st.session_state.filters_keyword_page[i]
-                    keyword = condition['keyword'].strip()
-                    operator = condition['operator']
-                    if not keyword:
-                        continue
-
-                    regex_keyword = convert_wildcard_to_regex(keyword)
-                    current_condition = combined_text_series.str.contains(regex_keyword, case=False, na=False, regex=True)
-
-                    if operator == "AND":
-                        current_filter_series = current_filter_series & current_condition
-                    elif operator == "OR":
-                        current_filter_series = current_filter_series | current_condition
+                current_filter_series = evaluate_keyword_filters(combined_text_series, st.session_state.filters_keyword_page, field_index)
+                if field_index.cached_fields:
+                    st.caption("抽出済みのフィールド: " + ", ".join(field_index.cached_fields))
                 
-                if current_filter_series is not None:
+                if current_filter_series is not None and context_lines > 0:
+                    # 一致位置の前後の行を含める (重なった範囲は1つにまとめられる)
+                    group_columns = [col for col in (CONTEXT_GROUP_OPTIONS[context_group_label] or []) if col in filtered_df.columns]
+                    context_mask = expand_context_rows(
+                        current_filter_series.to_numpy(),
+                        before=context_lines,
+                        after=context_lines,
+                        group_keys=filtered_df[group_columns] if group_columns else None,
+                    )
+                    matched_rows = current_filter_series[context_mask]
+                    filtered_df = filtered_df[context_mask]
+                elif current_filter_series is not None:
                     filtered_df = filtered_df[current_filter_series]
                 else:
                     filtered_df = pd.DataFrame()
         
+        if log_database is None:
+            total_filtered_count = len(filtered_df)
+
+        filter_state = tuple((f["keyword"].strip(), f["operator"]) for f in st.session_state.filters_keyword_page)
+        if log_database is not None:
+            summary_variant = (range_start, range_end, filter_state, max_rows_to_fetch, total_filtered_count)
+        else:
+            summary_variant = (expanded, filter_state, context_lines, context_group_label)
+        render_summary_panel(filtered_df, stored_source, summary_variant, fetched_tail=log_database is not None)
+
         st.subheader("表示設定")
         
-        all_available_cols = ['Timestamp', 'Hostname', 'AppName', 'PID', 'Message']
+        all_available_cols = ['Timestamp', 'Hostname', 'AppName', 'PID', 'Message', COUNT_COLUMN, LAST_TIMESTAMP_COLUMN]
         available_cols_in_df = [col for col in all_available_cols if col in filtered_df.columns]
 
         st.markdown("**表示・出力する列を選択してください**")
@@ -158,7 +269,7 @@ def run():
         
         selected_display_cols = []
         for i, col in enumerate(available_cols_in_df):
-            default_checked = (col == 'Timestamp' or col == 'Message')
+            default_checked = col in ('Timestamp', 'Message', COUNT_COLUMN)
             
             if f"display_col_{col}" not in st.session_state:
                 st.session_state[f"display_col_{col}"] = default_checked
@@ -171,14 +282,20 @@ def run():
 
         st.subheader("フィルタリング結果")
         if not filtered_df.empty and selected_display_cols:
-            st.write(f"表示中のログ数: {len(filtered_df)}行")
+            if is_collapsed(filtered_df):
+                st.write(f"表示中のログ数: {total_filtered_count}行 (まとめる前: {expanded_row_count(filtered_df)}行)")
+            else:
+                st.write(f"表示中のログ数: {total_filtered_count}行")
             
-            if len(filtered_df) > max_rows:
+            if total_filtered_count > max_rows:
                 st.info(f"上位 {max_rows} 行のみ表示しています。")
 
             display_df_selected_cols = filtered_df[selected_display_cols].copy()
-            if 'Timestamp' in display_df_selected_cols.columns and pd.api.types.is_datetime64_any_dtype(display_df_selected_cols['Timestamp']):
-                display_df_selected_cols['Timestamp'] = display_df_selected_cols['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+            for timestamp_col in ('Timestamp', LAST_TIMESTAMP_COLUMN):
+                if timestamp_col in display_df_selected_cols.columns and pd.api.types.is_datetime64_any_dtype(display_df_selected_cols[timestamp_col]):
+                    display_df_selected_cols[timestamp_col] = display_df_selected_cols[timestamp_col].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+            if matched_rows is not None:
+                display_df_selected_cols.insert(0, "一致", matched_rows.map({True: "●", False: ""}))
             
             st.dataframe(
                 display_df_selected_cols.tail(max_rows),
@@ -204,7 +321,7 @@ def run():
                     value = row[col]
                     if pd.isna(value):
                         parts.append("")
-                    elif col == 'Timestamp':
+                    elif col in ('Timestamp', LAST_TIMESTAMP_COLUMN):
                         parts.append(value.isoformat() if pd.notna(value) else "")
                     elif col == 'PID':
                         parts.append(f"[{int(value)}]" if pd.notna(value) else "")
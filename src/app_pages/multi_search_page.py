@@ -0,0 +1,171 @@
+# src/app_pages/multi_search_page.py
+import os
+import time as time_module
+import streamlit as st
+from datetime import datetime, date, time, timedelta
+
+from src.utils.multi_search import (
+    ACTIVE_DATASET_SECONDS,
+    DEFAULT_RESULT_LIMIT_PER_SOURCE,
+    MAX_RETAINED_BYTES,
+    MAX_RETAINED_DATASETS,
+    UPLOAD_ROOT_DIR,
+    build_search_tasks,
+    delete_dataset,
+    fan_out_search,
+    finalize_search_result,
+    list_datasets,
+    merge_search_results,
+)
+from src.app_pages.existing_filter_page import render_keyword_filter_inputs
+
+# 検索中に途中経過の表 (それまでに完了したファイルの結果をタイムスタンプ順に統合したもの) を更新する最短の間隔 (秒)。
+# 統合は完了済みの全結果の連結とソートのため、ファイルが完了するたびではなくこの間隔ごとに行う
+PARTIAL_RESULT_INTERVAL_SECONDS = 1.0
+
+# 途中経過の表に表示する行数の上限
+PARTIAL_RESULT_ROWS = 1000
+
+def build_search_range():
+    """
+    横断検索の日時範囲を入力するUIを表示し、(開始日時, 終了日時) を返す。
+    既定値は「日時指定・抽出」ページで設定した範囲。範囲を指定しない場合は (None, None)。
+    """
+    conditions = st.session_state.get('datetime_spec_conditions', {})
+    default_start = conditions.get("start_datetime")
+    default_end = conditions.get("end_datetime")
+
+    if not st.checkbox("日時範囲で絞り込む", value=default_start is not None, key="multi_search_use_range"):
+        return None, None
+
+    col_start_date, col_start_time = st.columns(2)
+    with col_start_date:
+        start_date = st.date_input("開始日:", value=default_start.date() if default_start else date.today(), key="multi_search_start_date")
+    with col_start_time:
+        start_time = st.time_input("開始時刻:", value=default_start.time().replace(second=0, microsecond=0) if default_start else time(0, 0), step=60, key="multi_search_start_time")
+    col_end_date, col_end_time = st.columns(2)
+    with col_end_date:
+        end_date = st.date_input("終了日:", value=default_end.date() if default_end else date.today(), key="multi_search_end_date")
+    with col_end_time:
+        end_time = st.time_input("終了時刻:", value=default_end.time().replace(second=0, microsecond=0) if default_end else time(23, 59), step=60, key="multi_search_end_time")
+
+    return (
+        datetime.combine(start_date, start_time),
+        datetime.combine(end_date, end_time) + timedelta(seconds=59, microseconds=999999),
+    )
+
+def retention_policy_text():
+    """過去のアップロードを残す上限の説明文。データ読み込みページと共用。"""
+    return (
+        f"過去のアップロードは新しいものから最大 {MAX_RETAINED_DATASETS}件・合計 {MAX_RETAINED_BYTES / 1024 ** 3:.0f} GB まで残し、"
+        "超えた分は新しいファイルの読み込み後に古いものから自動で削除されます。"
+        f"ただし、他のセッションで分析中の可能性がある、{ACTIVE_DATASET_SECONDS // 3600}時間以内に使われたアップロードは自動では削除しません。"
+    )
+
+def render_dataset_manager(datasets):
+    """保存済みのデータセットの一覧と、個別に削除するボタンを表示する。"""
+    current_dir = st.session_state.get('global_temp_dir')
+    with st.expander(f"保存済みのアップロード ({len(datasets)}件・合計 {sum(d['bytes'] for d in datasets) / 1024 / 1024:.1f} MB)"):
+        st.caption(retention_policy_text())
+        for i, dataset in enumerate(datasets):
+            col_name, col_size, col_btn = st.columns([4, 1, 1])
+            col_name.write(dataset["archive"])
+            col_size.write(f"{dataset['bytes'] / 1024 / 1024:.1f} MB")
+            with col_btn:
+                if current_dir and os.path.abspath(dataset["path"]) == os.path.abspath(current_dir):
+                    st.caption("読み込み中")
+                elif st.button("削除", key=f"multi_search_delete_{i}"):
+                    delete_dataset(dataset["path"])
+                    st.session_state.pop('multi_search_result', None)
+                    st.session_state.pop('multi_search_errors', None)
+                    st.rerun()
+
+def run():
+    st.title("複数アーカイブ横断検索")
+    st.markdown(f"`{UPLOAD_ROOT_DIR}` に残っている過去のアップロードを、同じ日時範囲とキーワード条件で並列に検索します。")
+
+    datasets = list_datasets()
+    if not datasets:
+        st.info("検索できるアップロード済みのデータがありません。「データ読み込み」ページからファイルをアップロードしてください。")
+        return
+
+    render_dataset_manager(datasets)
+
+    archive_names = [dataset["archive"] for dataset in datasets]
+    selected_archives = st.multiselect("検索対象のアーカイブ", archive_names, default=archive_names, key="multi_search_archives")
+
+    st.subheader("日時範囲")
+    start, end = build_search_range()
+
+    st.subheader("キーワード")
+    st.info("キーワードで **`*` は0文字以上の任意の文字、**`?` は任意の1文字**を表します。キーワード条件は「キーワードフィルタリング」ページと共通です。")
+    render_keyword_filter_inputs()
+
+    limit = st.number_input(
+        "1ファイルあたりの最大取得件数",
+        min_value=100, max_value=1000000, value=DEFAULT_RESULT_LIMIT_PER_SOURCE, step=100,
+        key="multi_search_limit"
+    )
+    st.markdown("---")
+
+    if st.button("横断検索を実行", key="multi_search_run_btn"):
+        tasks = build_search_tasks([dataset for dataset in datasets if dataset["archive"] in selected_archives])
+        if not tasks:
+            st.warning("検索対象のアーカイブを選択してください。")
+            return
+
+        progress = st.progress(0.0, text=f"0 / {len(tasks)} ファイルを検索しました")
+        status_placeholder = st.empty()
+        partial_placeholder = st.empty()
+        merged = None
+        pending_results = []
+        total_matched = 0
+        fetched_rows = 0
+        errors = []
+        last_render = time_module.monotonic()
+        # 完了したファイルの結果は一定の間隔ごとにタイムスタンプ順に統合し、途中経過として表示する
+        for completed, (task, result, matched_count) in enumerate(
+            fan_out_search(tasks, start, end, st.session_state.filters_keyword_page, limit=int(limit)), start=1
+        ):
+            archive, file_name = task[0], task[1]
+            if isinstance(result, Exception):
+                errors.append(f"{archive} / {file_name}: {result}")
+            else:
+                pending_results.append(result)
+                total_matched += matched_count
+                fetched_rows += len(result)
+            progress.progress(completed / len(tasks), text=f"{completed} / {len(tasks)} ファイルを検索しました")
+            status_placeholder.write(f"一致したログ: {total_matched}件 (取得済み: {fetched_rows}件)")
+            if pending_results and completed < len(tasks) and time_module.monotonic() - last_render >= PARTIAL_RESULT_INTERVAL_SECONDS:
+                merged = merge_search_results([merged, *pending_results])
+                pending_results = []
+                if merged is not None:
+                    with partial_placeholder.container():
+                        st.caption(f"途中経過: 検索が終わったファイルの結果をタイムスタンプ順に統合しています (先頭の最大 {PARTIAL_RESULT_ROWS}行)。")
+                        st.dataframe(finalize_search_result(merged.head(PARTIAL_RESULT_ROWS)), use_container_width=True, hide_index=True)
+                last_render = time_module.monotonic()
+
+        merged = merge_search_results([merged, *pending_results])
+        # エラーは再実行後に結果と合わせて表示する (ここで表示すると st.rerun で消える)
+        st.session_state.multi_search_errors = errors
+        st.session_state.multi_search_result = finalize_search_result(merged)
+        st.session_state.multi_search_matched_count = total_matched
+        st.rerun()
+
+    for error in st.session_state.get('multi_search_errors', []):
+        st.error(f"検索中にエラーが発生しました ({error})")
+
+    result_df = st.session_state.get('multi_search_result')
+    if result_df is not None:
+        matched_count = st.session_state.get('multi_search_matched_count', len(result_df))
+        st.success(f"{matched_count}件のログが一致しました (表示: {len(result_df)}件)。")
+        if matched_count > len(result_df):
+            st.caption("1ファイルあたりの最大取得件数を超えた分は表示されていません。")
+        st.dataframe(result_df, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="検索結果をCSVでダウンロード",
+            data=result_df.to_csv(index=False).encode('utf-8'),
+            file_name=f"multi_search_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv",
+            mime="text/csv",
+            key="multi_search_download_csv"
+        )
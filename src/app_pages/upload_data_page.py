@@ -1,12 +1,228 @@
 # src/app_pages/upload_data_page.py
 import streamlit as st
-import pandas as pd
 import os
 import shutil
-from datetime import datetime
+import threading
+from datetime import datetime, date, time, timedelta
 
-# utilsからヘルパー関数をインポート
-from src.utils.file_handlers import extract_zip, decompress_zstd_files, get_log_files, load_logs_from_path
+_live_receivers_lock = threading.Lock()
+
+def build_ingest_filter():
+    """
+    読み込み時の絞り込み条件を入力するUIを表示し、load_logs_from_path に渡す
+    ingest_filter の辞書を返す。絞り込みを使わない場合は None を返す。
+    """
+    with st.expander("読み込み時の絞り込み (任意)"):
+        st.markdown("調査対象の期間やキーワードが分かっている場合、アップロード前に指定すると該当しない行をパースせずに読み飛ばします。")
+        if not st.checkbox("期間とキーワードで読み込む行を絞り込む", key="ingest_filter_enabled"):
+            return None
+
+        col_start_date, col_start_time = st.columns(2)
+        with col_start_date:
+            start_date = st.date_input("開始日:", value=date.today(), key="ingest_start_date")
+        with col_start_time:
+            start_time = st.time_input("開始時刻:", value=time(0, 0), step=60, key="ingest_start_time")
+        col_end_date, col_end_time = st.columns(2)
+        with col_end_date:
+            end_date = st.date_input("終了日:", value=date.today(), key="ingest_end_date")
+        with col_end_time:
+            end_time = st.time_input("終了時刻:", value=time(23, 59), step=60, key="ingest_end_time")
+
+        keywords_text = st.text_input("キーワード (スペース区切り、全てに一致する行のみ読み込み。`*` `?` はワイルドカード)", key="ingest_keywords")
+        assume_sorted = st.checkbox("ログは時刻順に並んでいる (終了日時を過ぎたら読み込みを打ち切る)", value=True, key="ingest_assume_sorted")
+
+    return {
+        "start": datetime.combine(start_date, start_time),
+        "end": datetime.combine(end_date, end_time) + timedelta(seconds=59, microseconds=999999),
+        "keywords": keywords_text.split(),
+        "assume_sorted": assume_sorted,
+    }
+
+def render_log_preview(preview, ingest_filter=None):
+    """クイックプレビュー (LogPreview) の推定値 (期間・件数・1時間あたりの件数・Hostname / AppName の分布) を表示する。"""
+    st.subheader("クイックプレビュー (推定)")
+    st.caption(f"ファイル全体から均等に {preview.sample_rows}行を読んで推定しています。全体の読み込みが終わると正確な値に置き換わります。")
+    if ingest_filter:
+        st.caption("読み込み時の絞り込みは推定値には反映されていません。")
+    metric_cols = st.columns(3)
+    metric_cols[0].metric("推定行数", f"{preview.estimated_rows:,}")
+    metric_cols[1].metric("最初の時刻 (推定)", preview.start.strftime('%Y-%m-%d %H:%M') if preview.start else "-")
+    metric_cols[2].metric("最後の時刻 (推定)", preview.end.strftime('%Y-%m-%d %H:%M') if preview.end else "-")
+    hourly_counts = preview.hourly_counts()
+    if not hourly_counts.empty:
+        st.markdown("**1時間あたりの推定件数**")
+        st.bar_chart(hourly_counts)
+    top_cols = st.columns(2)
+    for top_col, col in zip(top_cols, ("Hostname", "AppName")):
+        with top_col:
+            st.markdown(f"**{col} の分布**")
+            st.dataframe(preview.top_values(col), use_container_width=True, hide_index=True)
+
+def load_log_source(log_source, ingest_filter, use_database, collapse_repeats=False, parse_workers=None):
+    """
+    ログを読み込み、セッションに保持する。大容量モード (use_database) の場合は
+    一時ディレクトリ上のデータベースに格納し、DataFrame はメモリに保持しない。
+    collapse_repeats が真の場合は連続する同一メッセージを1行にまとめて保持する (大容量モードでは無視)。
+    parse_workers を指定すると、大きなファイルをそのプロセス数で並列にパースする。
+    大きなファイルは、全体を読み込む前にクイックプレビュー (log_preview) で推定値を表示し、
+    ログの期間 (log_time_span) を推定値で設定しておく。読み込みが終わると正確な値に置き換え、
+    失敗した場合や、ページの移動などで中断された場合は推定値を残さずに未設定に戻す。
+    """
+    from src.utils.file_handlers import load_logs_from_path, load_logs_into_database
+    from src.utils.log_preview import build_log_preview, time_span_of_frame, use_log_preview
+    from src.utils.multi_search import write_dataset_info
+    from src.utils import sql_backend
+
+    st.session_state.log_time_span = None
+    preview_placeholder = None
+    loaded = False
+    try:
+        if use_log_preview(log_source):
+            preview = build_log_preview(log_source)
+            st.session_state.log_time_span = {"start": preview.start, "end": preview.end, "estimated": True}
+            preview_placeholder = st.empty()
+            with preview_placeholder.container():
+                render_log_preview(preview, ingest_filter)
+
+        if use_database:
+            db_path = os.path.join(st.session_state.global_temp_dir, sql_backend.DATABASE_FILE_NAME)
+            row_count = load_logs_into_database(log_source, db_path, ingest_filter=ingest_filter, summary=st.session_state.log_summary, parse_workers=parse_workers)
+            st.session_state.log_database = db_path if row_count else None
+            st.session_state.df = None
+            # 横断検索で、このファイルはデータベースを検索するように格納元を記録する
+            write_dataset_info(st.session_state.global_temp_dir, st.session_state.upload_source_name, os.path.basename(log_source))
+            start, end = sql_backend.get_time_bounds(db_path) if row_count else (None, None)
+        else:
+            st.session_state.df = load_logs_from_path(log_source, ingest_filter=ingest_filter, summary=st.session_state.log_summary, collapse_repeats=collapse_repeats, parse_workers=parse_workers)
+            st.session_state.log_database = None
+            start, end = time_span_of_frame(st.session_state.df)
+        loaded = True
+    finally:
+        # 中断 (StopException / RerunException) でも必ず通る
+        st.session_state.log_time_span = {"start": start, "end": end, "estimated": False} if loaded else None
+        if preview_placeholder is not None:
+            preview_placeholder.empty()
+
+@st.cache_resource
+def live_receivers():
+    """
+    起動中のライブ受信 (SyslogReceiver) を (待ち受けアドレス, ポート) をキーに保持する、プロセス全体で共有する辞書。
+    ポートはプロセス単位の資源のため、受信はセッションに持たせず、どのセッションからも参照・停止できるようにする。
+    """
+    return {}
+
+def get_live_receiver():
+    """このセッションで開始 (または参照) した受信中のライブ受信を返す。無い場合は None。"""
+    key = st.session_state.get('syslog_receiver_key')
+    receiver = live_receivers().get(key) if key is not None else None
+    return receiver if receiver is not None and receiver.running else None
+
+def start_live_receiver(host, port, protocols, max_messages, max_bytes):
+    """
+    ライブ受信を開始してこのセッションから参照する。同じアドレスとポートで受信中のものがあれば、それを共有する。
+    ポートを開けなかった場合は OSError を送出する。
+    """
+    from src.utils.syslog_receiver import SyslogReceiver
+
+    key = (host, int(port))
+    with _live_receivers_lock:
+        receivers = live_receivers()
+        receiver = receivers.get(key)
+        if receiver is None or not receiver.running:
+            receiver = SyslogReceiver(host, port, protocols, max_messages, max_bytes)
+            receiver.start()
+            receivers[key] = receiver
+    st.session_state.syslog_receiver_key = key
+    return receiver
+
+def stop_live_receivers(keys=None):
+    """keys (省略時は全て) のライブ受信を停止し、ポートを解放する。"""
+    with _live_receivers_lock:
+        receivers = live_receivers()
+        for key in list(receivers) if keys is None else keys:
+            receiver = receivers.pop(key, None)
+            if receiver is not None:
+                receiver.stop()
+
+def load_live_snapshot():
+    """
+    ライブ受信のリングバッファの現在の内容を、アップロードしたログと同じように分析対象として読み込む。
+    日時指定ページで範囲を設定済みの場合は、その範囲で絞り込んだ結果も作り直す。
+    """
+    import pandas as pd
+    from src.utils.log_parser_utils import filter_frame_by_time_range
+    from src.utils.log_preview import time_span_of_frame
+
+    receiver = get_live_receiver()
+    df = receiver.to_frame() if receiver is not None else pd.DataFrame()
+    if df.empty:
+        return df
+    st.session_state.df = df
+    start, end = time_span_of_frame(df)
+    st.session_state.log_time_span = {"start": start, "end": end, "estimated": False}
+    st.session_state.log_database = None
+    st.session_state.log_summary = None # キーワードフィルタリングページで作り直される
+    conditions = st.session_state.get('datetime_spec_conditions', {})
+    if conditions.get("start_datetime") is not None:
+        st.session_state.df_filtered = filter_frame_by_time_range(df, conditions["start_datetime"], conditions["end_datetime"])
+        conditions["filtered_count"] = len(st.session_state.df_filtered)
+    else:
+        st.session_state.df_filtered = None
+    return df
+
+def render_live_receiver():
+    """Syslog のライブ受信 (UDP/TCP リスナー) の設定と操作のUIを表示する。"""
+    receiver = get_live_receiver()
+    is_running = receiver is not None
+
+    with st.expander("ライブ受信 (Syslog サーバーとして受信)", expanded=is_running):
+        st.markdown("ローカルのポートで Syslog を受信し、直近のメッセージをメモリ上のリングバッファに保持します。受信したログはアップロードしたログと同じように分析できます。")
+        st.caption("受信はブラウザのタブを閉じても続きます。不要になったら「受信を停止」またはサイドバーのクリーンアップで停止してください。")
+        col_host, col_port, col_protocols = st.columns([2, 1, 2])
+        with col_host:
+            host = st.text_input("待ち受けアドレス", value="127.0.0.1", key="live_receiver_host", disabled=is_running)
+        with col_port:
+            port = st.number_input("ポート", min_value=1, max_value=65535, value=5514, step=1, key="live_receiver_port", disabled=is_running)
+        with col_protocols:
+            protocols = st.multiselect("プロトコル", ["udp", "tcp"], default=["udp", "tcp"], key="live_receiver_protocols", disabled=is_running)
+        col_messages, col_megabytes = st.columns(2)
+        with col_messages:
+            max_messages = st.number_input("保持する最大件数", min_value=1000, max_value=10000000, value=200000, step=1000, key="live_receiver_max_messages", disabled=is_running)
+        with col_megabytes:
+            max_megabytes = st.number_input("保持する最大サイズ (MB)", min_value=1, max_value=4096, value=64, step=1, key="live_receiver_max_megabytes", disabled=is_running)
+
+        if not is_running:
+            if st.button(":satellite_antenna: 受信を開始", key="live_receiver_start_btn"):
+                try:
+                    start_live_receiver(host, port, protocols or ["udp"], max_messages, max_megabytes * 1024 * 1024)
+                except OSError as e:
+                    st.error(f"ポート {port} で受信を開始できませんでした: {e}")
+                else:
+                    st.rerun()
+            return
+
+        stats = receiver.stats()
+        st.success(f"{receiver.host}:{receiver.port} ({', '.join(receiver.protocols)}) で受信中です。")
+        metric_cols = st.columns(5)
+        metric_cols[0].metric("受信件数", f"{stats['received']:,}")
+        metric_cols[1].metric("パース失敗", f"{stats['unparsed']:,}")
+        metric_cols[2].metric("パース待ちで破棄", f"{stats['dropped']:,}", help="パースが受信に追いつかず、パース待ちの上限を超えたために捨てたメッセージの件数です。")
+        metric_cols[3].metric("バッファ内の件数", f"{stats['buffered']:,}")
+        metric_cols[4].metric("バッファのサイズ", f"{stats['buffered_bytes'] / 1024 / 1024:.1f} MB")
+
+        col_load, col_stop = st.columns(2)
+        with col_load:
+            if st.button(":mag: 受信したログを分析する", key="live_receiver_load_btn"):
+                if load_live_snapshot().empty:
+                    st.warning("まだ受信したログがありません。")
+                else:
+                    st.session_state.is_returning_from_top_button = False
+                    st.session_state.current_page = "datetime_spec"
+                    st.rerun()
+        with col_stop:
+            if st.button(":black_square_for_stop: 受信を停止", key="live_receiver_stop_btn"):
+                stop_live_receivers([st.session_state.syslog_receiver_key])
+                st.rerun()
 
 def run():
     st.title("ログデータの読み込み")
@@ -16,17 +232,55 @@ def run():
         st.session_state.global_temp_dir = os.path.join("temp_syslog_upload", datetime.now().strftime("%Y%m%d%H%M%S_%f"))
         os.makedirs(st.session_state.global_temp_dir, exist_ok=True)
 
+    render_live_receiver()
+
+    ingest_filter = build_ingest_filter()
+    use_database = st.checkbox(
+        "大容量モード: ログをディスク上のデータベース (SQLite) に格納して検索する (メモリに載らない大きさのログ向け)",
+        key="use_log_database"
+    )
+    collapse_repeats = st.checkbox(
+        "連続する同一メッセージを1行にまとめて読み込む (件数と最初/最後の時刻を保持し、検索・出力時に展開可能)",
+        key="collapse_repeated_rows",
+        disabled=use_database,
+    )
+    cpu_count = os.cpu_count() or 1
+    parallel_parse = st.checkbox(
+        f"大きなファイル (64MB以上) を複数のプロセスで並列にパースする (実験的、最大{cpu_count}プロセス)",
+        key="parallel_parse_enabled",
+        disabled=cpu_count < 2,
+        help="既定ではこのプロセスでバイト範囲ごとに順にパースします。CPUが4つ以上の環境での効果はまだ計測していません。",
+    )
+    parse_workers = cpu_count if parallel_parse and cpu_count >= 2 else None
+
     uploaded_file = st.file_uploader("Syslogファイルをアップロードしてください (.log, .txt, .zip)", type=["log", "txt", "zip"], key="main_uploader")
 
     if uploaded_file is not None:
-        if st.session_state.global_temp_dir and os.path.exists(st.session_state.global_temp_dir):
+        # pandas を含むファイル処理系はアップロードされた時点で初めてインポートする (起動の高速化)
+        from src.utils.file_handlers import extract_zip, decompress_zstd_files, get_log_files
+        from src.utils.sketches import LogSummary
+        from src.utils.multi_search import prune_datasets, write_dataset_info
+        from src.app_pages.multi_search_page import retention_policy_text
+
+        # 同じアップロードを処理し直す場合のみ前回のディレクトリを置き換える。
+        # 別のファイルのアップロードで作られたディレクトリは、複数アーカイブ横断検索のために残す
+        # (残す件数と合計サイズの上限を超えた分は、読み込みの後に古いものから削除する)。
+        is_same_upload = st.session_state.get('processed_upload_id') == uploaded_file.file_id
+        if is_same_upload and st.session_state.global_temp_dir and os.path.exists(st.session_state.global_temp_dir):
             shutil.rmtree(st.session_state.global_temp_dir)
             st.session_state.global_temp_dir = None
+        elif st.session_state.global_temp_dir and os.path.isdir(st.session_state.global_temp_dir) and not os.listdir(st.session_state.global_temp_dir):
+            os.rmdir(st.session_state.global_temp_dir) # まだ何もアップロードされていない空のディレクトリ
 
         st.session_state.global_temp_dir = os.path.join("temp_syslog_upload", datetime.now().strftime("%Y%m%d%H%M%S_%f"))
         os.makedirs(st.session_state.global_temp_dir, exist_ok=True)
+        st.session_state.processed_upload_id = uploaded_file.file_id
+        st.session_state.upload_source_name = uploaded_file.name
+        write_dataset_info(st.session_state.global_temp_dir, uploaded_file.name)
         
         st.info(f"ファイルを処理中...一時ディレクトリ: {st.session_state.global_temp_dir}")
+        # 上位の値や異なり数のサマリーは取り込みと同時に更新する
+        st.session_state.log_summary = LogSummary()
 
         if uploaded_file.name.endswith('.zip'):
             if extract_zip(uploaded_file, st.session_state.global_temp_dir):
@@ -37,8 +291,11 @@ def run():
                 st.session_state.found_log_files = []
         else:
             # 単一ファイルの直接アップロードの場合の処理
-            # uploaded_file は BytesIO オブジェクトのように扱えるため、そのまま load_logs_from_path に渡す
-            st.session_state.df = load_logs_from_path(uploaded_file)
+            # 複数アーカイブ横断検索の対象にするため、一時ディレクトリに保存してから読み込む
+            saved_file_path = os.path.join(st.session_state.global_temp_dir, os.path.basename(uploaded_file.name))
+            with open(saved_file_path, 'wb') as f:
+                f.write(uploaded_file.getvalue())
+            load_log_source(saved_file_path, ingest_filter, use_database, collapse_repeats, parse_workers)
             st.session_state.found_log_files = [] # 単一ファイルなので、リストは空でOK
 
         # zipの場合の処理
@@ -46,7 +303,7 @@ def run():
             if len(st.session_state.found_log_files) == 1:
                 selected_log_file_path = st.session_state.found_log_files[0]
                 st.info(f"単一のログファイル '{os.path.basename(selected_log_file_path)}' を自動選択しました。")
-                st.session_state.df = load_logs_from_path(selected_log_file_path)
+                load_log_source(selected_log_file_path, ingest_filter, use_database, collapse_repeats, parse_workers)
             else:
                 st.subheader("複数のログファイルが見つかりました")
                 selected_log_file_name = st.selectbox(
@@ -56,9 +313,14 @@ def run():
                 )
                 selected_log_file_path = next((f for f in st.session_state.found_log_files if os.path.basename(f) == selected_log_file_name), None)
                 if selected_log_file_path:
-                    st.session_state.df = load_logs_from_path(selected_log_file_path)
+                    load_log_source(selected_log_file_path, ingest_filter, use_database, collapse_repeats, parse_workers)
         elif uploaded_file.name.endswith('.zip') and not st.session_state.found_log_files:
              st.warning("展開されたディレクトリ内に.logファイルが見つかりませんでした。")
+
+        removed_datasets = prune_datasets(protected=[st.session_state.global_temp_dir])
+        st.caption(retention_policy_text())
+        if removed_datasets:
+            st.info(f"保存数の上限を超えたため、古いアップロードを削除しました: {', '.join(removed_datasets)}")
         
         st.success("データの読み込みが完了しました。")
         st.markdown("---")
@@ -66,12 +328,23 @@ def run():
         st.session_state.is_returning_from_top_button = False
 
     # データが既に読み込まれている場合の表示ロジック
-    if not st.session_state.df.empty:
-        st.success(f"{len(st.session_state.df)}件のログデータが現在読み込まれています。")
-        
-        display_df_head = st.session_state.df.head().copy()
-        if 'Timestamp' in display_df_head.columns and pd.api.types.is_datetime64_any_dtype(display_df_head['Timestamp']):
-            display_df_head['Timestamp'] = display_df_head['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    log_database = st.session_state.get('log_database')
+    if log_database is not None or (st.session_state.df is not None and not st.session_state.df.empty):
+        import pandas as pd # データ読み込み後は既にインポート済みのため追加のコストはない
+        if log_database is not None:
+            from src.utils import sql_backend
+            st.success(f"{sql_backend.get_row_count(log_database)}件のログデータがデータベースに格納されています (大容量モード)。")
+            display_df_head = sql_backend.fetch_logs(log_database, limit=5)
+        else:
+            from src.utils.run_length import RUN_TIMESTAMPS_COLUMN, expanded_row_count, is_collapsed
+            if is_collapsed(st.session_state.df):
+                st.success(f"{expanded_row_count(st.session_state.df)}件のログデータが現在読み込まれています (連続する同一メッセージをまとめて{len(st.session_state.df)}行)。")
+            else:
+                st.success(f"{len(st.session_state.df)}件のログデータが現在読み込まれています。")
+            display_df_head = st.session_state.df.head().drop(columns=[RUN_TIMESTAMPS_COLUMN], errors="ignore")
+        for timestamp_col in ('Timestamp', 'LastTimestamp'):
+            if timestamp_col in display_df_head.columns and pd.api.types.is_datetime64_any_dtype(display_df_head[timestamp_col]):
+                display_df_head[timestamp_col] = display_df_head[timestamp_col].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
         st.dataframe(display_df_head)
         
         st.markdown("---")
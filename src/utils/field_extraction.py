@@ -0,0 +1,176 @@
+# src/utils/field_extraction.py
+# Message に含まれる key=value や JSON ("key": value) のフィールドを条件にした絞り込み。
+# キーワードが "field:status>=500" や "field:latency_ms>1000" のように "field:" で始まる比較の形の場合、
+# そのフィールドを Message から抽出して数値 (または文字列) として比較する。接頭辞の無いキーワード
+# ("name==value" など) は従来どおり部分一致・ワイルドカードのキーワードとして扱う。フィールドは最初に参照されたときに
+# 列全体から1回だけ抽出し (Arrow の正規表現カーネル)、フィールドを含む行の位置と値だけを持つ
+# 疎な列としてキャッシュするため、同じフィールドへの以降の条件は配列の比較だけで評価できる。
+import re
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .glob_match import to_search_array
+
+# フィールドの比較条件であることを示すキーワードの接頭辞 (大文字小文字を区別しない)
+FIELD_CONDITION_PREFIX = "field:"
+
+# 比較の条件とみなす演算子 (長いものから照合する)。"=" は従来どおりキーワードの部分一致として扱う
+FIELD_OPERATORS = (">=", "<=", "==", "!=", ">", "<")
+
+_CONDITION_PATTERN = re.compile(
+    r"^\s*" + re.escape(FIELD_CONDITION_PREFIX) + r"\s*(?P<field>[A-Za-z_][\w.\-]*)\s*(?P<operator>" + "|".join(re.escape(op) for op in FIELD_OPERATORS) + r")\s*(?P<value>.*?)\s*$",
+    re.IGNORECASE,
+)
+
+# 数値とみなす値 (末尾の単位 "ms" や "%" は無視する)
+_NUMBER_PATTERN = r"^(?P<number>[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)[A-Za-z%]*$"
+_NUMBER_REGEX = re.compile(_NUMBER_PATTERN)
+
+_NUMBER_COMPARATORS = {
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    "<": np.less,
+}
+
+
+def _to_number(text):
+    match = _NUMBER_REGEX.match(text)
+    return float(match.group("number")) if match else None
+
+
+@lru_cache(maxsize=256)
+def field_value_pattern(field):
+    """
+    Message からフィールドの値を取り出す正規表現 (RE2 / Python の re で共通)。
+    key=value、key: value、JSON の "key": value / "key": "value" に一致し、最初に現れた値を取り出す。
+    フィールド名は大文字小文字を区別せず、別の単語の一部 (http_status の status など) には一致しない。
+    """
+    return (
+        r"(?i)(?:^|[^\w.\-])\"?" + re.escape(field) +
+        r"\"?\s*[=:]\s*\"?(?P<value>[^\s,;\"'}\]]*)"
+    )
+
+
+@lru_cache(maxsize=256)
+def _field_value_regex(field):
+    return re.compile(field_value_pattern(field))
+
+
+class FieldCondition:
+    """parse_field_condition で作る、フィールドと値の比較条件。"""
+
+    def __init__(self, field, operator, value):
+        self.field = field
+        self.operator = operator
+        self.value = value
+        self.number = _to_number(value)
+
+    def __repr__(self):
+        return f"FieldCondition({self.field!r}, {self.operator!r}, {self.value!r})"
+
+    def compare(self, texts, numbers):
+        """
+        フィールドを含む行の値 (小文字化した文字列の Arrow 配列と、数値の numpy 配列) と比較し、
+        bool の numpy 配列を返す。値が数値の場合は数値として比較し、数値でない行は一致しない。
+        numbers は数値で比較する場合だけ参照する (ExtractedField.numbers は参照時に作られる)。
+        """
+        if self.number is not None:
+            with np.errstate(invalid="ignore"):
+                return _NUMBER_COMPARATORS[self.operator](numbers, self.number) & ~np.isnan(numbers)
+        equal = pc.fill_null(pc.equal(texts, self.value.lower()), False).to_numpy(zero_copy_only=False)
+        return equal if self.operator == "==" else ~equal
+
+    def match_text(self, text):
+        """1つのメッセージがこの条件に一致するかを返す (大容量モードの SQLite から使う)。"""
+        if text is None:
+            return False
+        match = _field_value_regex(self.field).search(text)
+        if match is None:
+            return False
+        value = match.group("value")
+        if self.number is not None:
+            number = _to_number(value)
+            return number is not None and bool(_NUMBER_COMPARATORS[self.operator](number, self.number))
+        return (value.lower() == self.value.lower()) == (self.operator == "==")
+
+
+def parse_field_condition(keyword):
+    """
+    キーワードが "field:フィールド名 演算子 値" (field:status>=500 など) の形であれば FieldCondition を返す。
+    接頭辞の無いキーワード、大小比較 (>, >=, <, <=) で値が数値でない場合、その他の形のキーワードは
+    None (通常のキーワード) を返す。
+    """
+    match = _CONDITION_PATTERN.match(keyword)
+    if match is None or not match.group("value"):
+        return None
+    value = match.group("value")
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        value = value[1:-1]
+    condition = FieldCondition(match.group("field"), match.group("operator"), value)
+    if condition.number is None and condition.operator not in ("==", "!="):
+        return None
+    return condition
+
+
+class ExtractedField:
+    """1つのフィールドの疎な列。フィールドを含む行の位置と、その行の値 (文字列・数値) を持つ。"""
+
+    def __init__(self, positions, values):
+        self.positions = positions # 行の位置 (int64)
+        self.texts = pc.utf8_lower(values) # 小文字化した値 (Arrow の文字列配列)
+        self._numbers = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def numbers(self):
+        """値を数値に変換した float64 の配列 (数値でない値は NaN)。最初に数値で比較するときに作る。"""
+        if self._numbers is None:
+            numbers = pc.struct_field(pc.extract_regex(self.texts, _NUMBER_PATTERN), [0])
+            self._numbers = pc.cast(numbers, pa.float64()).to_numpy(zero_copy_only=False).astype(np.float64)
+        return self._numbers
+
+
+def extract_field(messages, field):
+    """Message の列 (Series / Arrow 配列) からフィールドを抽出した ExtractedField を返す。"""
+    values = pc.struct_field(pc.extract_regex(to_search_array(messages), field_value_pattern(field)), [0])
+    present = pc.is_valid(values)
+    positions = np.flatnonzero(present.to_numpy(zero_copy_only=False))
+    return ExtractedField(positions, pc.filter(values, present))
+
+
+class FieldIndex:
+    """
+    DataFrame の Message 列のフィールドを、参照されたときに抽出してキャッシュする。
+    frame が変わった場合は、呼び出し側で新しく作り直す。
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._fields = {}
+
+    @property
+    def cached_fields(self):
+        return list(self._fields)
+
+    def field(self, name):
+        key = name.lower()
+        if key not in self._fields:
+            self._fields[key] = extract_field(self.frame["Message"], name)
+        return self._fields[key]
+
+    def evaluate(self, condition):
+        """条件に一致する行を真とする bool の numpy 配列 (frame の行の順) を返す。"""
+        extracted = self.field(condition.field)
+        mask = np.zeros(len(self.frame), dtype=bool)
+        if len(extracted):
+            matched = condition.compare(extracted.texts, extracted.numbers if condition.number is not None else None)
+            mask[extracted.positions[matched]] = True
+        return mask
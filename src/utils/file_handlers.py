@@ -3,19 +3,32 @@ import streamlit as st
 import zipfile
 import os
 import shutil
-import zstandard as zstd
 import io
+import itertools
+from contextlib import closing
 import pandas as pd
 from datetime import datetime
 
-# utilsからparse_syslog_lineをインポート (変更)
-# from .log_parser_utils import parse_syslog_line # 変更前
-from .log_parser_utils import parse_syslog_line # 変更後 (すでに相対パス)
+# utilsからパーサーをインポート
+from .log_parser_utils import (
+    FORMAT_DETECTION_SAMPLE_LINES,
+    detect_log_format,
+    filter_frame_by_time_range,
+    filter_raw_lines,
+    parse_log_lines,
+    source_reference_time,
+)
+from .parallel_parse import DEFAULT_PARSE_WORKERS, iter_parsed_ranges, parse_file_in_parallel, use_byte_range_parse
 
 def extract_zip(uploaded_file, extract_to):
     try:
         with zipfile.ZipFile(io.BytesIO(uploaded_file.getvalue()), 'r') as zip_ref:
             zip_ref.extractall(extract_to)
+            # RFC3164 の年の推定にファイルの更新日時を使うため、アーカイブ内の日時を引き継ぐ
+            for info in zip_ref.infolist():
+                if not info.is_dir():
+                    modified = datetime(*info.date_time).timestamp()
+                    os.utime(os.path.join(extract_to, info.filename), (modified, modified))
         st.success(f"ZIPファイルを '{extract_to}' に展開しました。")
         return True
     except zipfile.BadZipFile:
@@ -26,6 +39,7 @@ def extract_zip(uploaded_file, extract_to):
         return False
 
 def decompress_zstd_files(directory):
+    import zstandard as zstd # .zip がアップロードされた場合のみ必要なため遅延インポート
     decompressed_count = 0
     for root, _, files in os.walk(directory):
         for file in files:
@@ -53,35 +67,136 @@ def get_log_files(directory):
                 log_files.append(os.path.join(root, file))
     return log_files
 
-def load_logs_from_path(log_source):
-    parsed_logs = []
-    
+def _iter_raw_lines(log_source):
+    """ログファイル (パスまたはアップロードされたファイル) の行を bytes のまま返す。"""
     if isinstance(log_source, str):
-        try:
-            with open(log_source, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    parsed_data = parse_syslog_line(line)
-                    if parsed_data:
-                        parsed_logs.append(parsed_data)
-            st.success(f"'{os.path.basename(log_source)}' から {len(parsed_logs)}件のログを読み込みました。")
-        except Exception as e:
-            st.error(f"ログファイルの読み込み中にエラーが発生しました ('{os.path.basename(log_source)}'): {e}")
-            return pd.DataFrame()
+        with open(log_source, 'rb') as f:
+            yield from f
     else:
-        try:
-            string_io = io.StringIO(log_source.getvalue().decode("utf-8", errors='ignore'))
-            for line in string_io.readlines():
-                parsed_data = parse_syslog_line(line)
-                if parsed_data:
-                    parsed_logs.append(parsed_data)
-            st.success(f"'{log_source.name}' から {len(parsed_logs)}件のログを読み込みました。")
-        except Exception as e:
-            st.error(f"ログファイルの読み込み中にエラーが発生しました ('{log_source.name}'): {e}")
-            return pd.DataFrame()
-            
-    if parsed_logs:
-        df = pd.DataFrame(parsed_logs)
+        yield from io.BytesIO(log_source.getvalue())
+
+
+def load_logs_from_path(log_source, log_format=None, ingest_filter=None, summary=None, collapse_repeats=False, parse_workers=None):
+    """
+    ログファイル (パスまたはアップロードされたファイル) を読み込み DataFrame を返す。
+    log_format を省略した場合は先頭行をサンプリングしてフォーマットを自動判定する。
+    ingest_filter に {"start", "end", "keywords", "assume_sorted"} を指定すると、
+    パース前の生の行の段階で期間とキーワードによる絞り込みを行う。
+    summary (LogSummary) を指定すると、読み込んだログでサマリーを更新する。
+    collapse_repeats が真の場合、連続する同一メッセージの行を1行にまとめて返す (run_length)。
+    大きなファイル (パス) は、バイト範囲に分けてパースする (parallel_parse)。parse_workers に2以上を
+    指定した場合のみ、複数のプロセスで並列にパースする。
+    """
+    source_name = os.path.basename(log_source) if isinstance(log_source, str) else log_source.name
+    ingest_filter = ingest_filter or {}
+    by_ranges = use_byte_range_parse(log_source)
+
+    try:
+        # 終了日時を過ぎて読み込みを打ち切った場合も、ファイルをすぐに閉じる
+        with closing(_iter_raw_lines(log_source)) as raw_lines:
+            sample = list(itertools.islice(raw_lines, FORMAT_DETECTION_SAMPLE_LINES))
+            if log_format is None:
+                log_format = detect_log_format([line.decode('utf-8', errors='ignore') for line in sample])
+
+            if not by_ranges: # バイト範囲ごとのパースではファイルを直接読む
+                selected_lines = filter_raw_lines(
+                    itertools.chain(sample, raw_lines),
+                    log_format,
+                    start=ingest_filter.get("start"),
+                    end=ingest_filter.get("end"),
+                    keywords=ingest_filter.get("keywords"),
+                    assume_sorted=ingest_filter.get("assume_sorted", False),
+                )
+                lines = [line.decode('utf-8', errors='ignore') for line in selected_lines]
+    except Exception as e:
+        st.error(f"ログファイルの読み込み中にエラーが発生しました ('{source_name}'): {e}")
+        return pd.DataFrame()
+
+    try:
+        if by_ranges:
+            st.info(f"'{source_name}' をバイト範囲に分けてパースしています... (プロセス数: {parse_workers or DEFAULT_PARSE_WORKERS})")
+            df = parse_file_in_parallel(log_source, log_format, ingest_filter, parse_workers)
+        else:
+            df = parse_log_lines(lines, log_format, reference_time=source_reference_time(log_source))
+            df = filter_frame_by_time_range(df, ingest_filter.get("start"), ingest_filter.get("end"))
+    except Exception as e:
+        st.error(f"ログファイルのパース中にエラーが発生しました ('{source_name}'): {e}")
+        return pd.DataFrame()
+
+    if not df.empty:
+        if summary is not None:
+            summary.update(df)
+        st.success(f"'{source_name}' から {len(df)}件のログを読み込みました。(形式: {log_format})")
+        if collapse_repeats:
+            from .run_length import collapse_repeated_rows
+            collapsed_df = collapse_repeated_rows(df)
+            st.info(f"連続する同一メッセージをまとめ、{len(df)}行を{len(collapsed_df)}行にしました。")
+            return collapsed_df
         return df
     else:
         st.warning("有効なSyslogエントリが見つかりませんでした。")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+
+def load_logs_into_database(log_source, db_path, log_format=None, ingest_filter=None, summary=None, parse_workers=None):
+    """
+    ログファイルを INGEST_CHUNK_LINES 行ずつパースし、ディスク上のデータベース (sql_backend) に
+    格納する。ファイル全体をメモリに保持しないため、メモリより大きいログも扱える。
+    大きなファイル (パス) は、バイト範囲ごとにパースして順に格納する (parse_workers は load_logs_from_path と同じ)。
+    格納した件数を返す (失敗時は 0)。
+    """
+    from . import sql_backend
+
+    source_name = os.path.basename(log_source) if isinstance(log_source, str) else log_source.name
+    ingest_filter = ingest_filter or {}
+    row_count = 0
+
+    by_ranges = use_byte_range_parse(log_source)
+    reference_time = source_reference_time(log_source)
+
+    def _parse_chunks(selected_lines):
+        while True:
+            chunk = [line.decode('utf-8', errors='ignore') for line in itertools.islice(selected_lines, sql_backend.INGEST_CHUNK_LINES)]
+            if not chunk:
+                break
+            df = parse_log_lines(chunk, log_format, reference_time=reference_time)
+            yield filter_frame_by_time_range(df, ingest_filter.get("start"), ingest_filter.get("end"))
+
+    try:
+        # 終了日時を過ぎて読み込みを打ち切った場合も、ファイルをすぐに閉じる
+        with closing(_iter_raw_lines(log_source)) as raw_lines:
+            sample = list(itertools.islice(raw_lines, FORMAT_DETECTION_SAMPLE_LINES))
+            if log_format is None:
+                log_format = detect_log_format([line.decode('utf-8', errors='ignore') for line in sample])
+
+            if by_ranges: # バイト範囲ごとのパースではファイルを直接読む
+                st.info(f"'{source_name}' をバイト範囲に分けてパースしています... (プロセス数: {parse_workers or DEFAULT_PARSE_WORKERS})")
+                parsed_chunks = iter_parsed_ranges(log_source, log_format, ingest_filter, parse_workers)
+            else:
+                parsed_chunks = _parse_chunks(filter_raw_lines(
+                    itertools.chain(sample, raw_lines),
+                    log_format,
+                    start=ingest_filter.get("start"),
+                    end=ingest_filter.get("end"),
+                    keywords=ingest_filter.get("keywords"),
+                    assume_sorted=ingest_filter.get("assume_sorted", False),
+                ))
+            connection = sql_backend.create_database(db_path)
+            try:
+                for df in parsed_chunks:
+                    if summary is not None:
+                        summary.update(df)
+                    sql_backend.insert_log_frame(connection, df)
+                    row_count += len(df)
+                sql_backend.finalize_database(connection)
+            finally:
+                connection.close()
+    except Exception as e:
+        st.error(f"ログファイルのデータベースへの格納中にエラーが発生しました ('{source_name}'): {e}")
+        return 0
+
+    if row_count:
+        st.success(f"'{source_name}' から {row_count}件のログをデータベースに格納しました。(形式: {log_format})")
+    else:
+        st.warning("有効なSyslogエントリが見つかりませんでした。")
+    return row_count
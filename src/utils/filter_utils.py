@@ -0,0 +1,119 @@
+# src/utils/filter_utils.py
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .field_extraction import parse_field_condition
+from .glob_match import compile_glob, to_search_array
+from .log_parser_utils import format_local_timestamps
+
+
+# キーワード検索の対象列 (この順に空白区切りで連結して検索する)
+SEARCH_COLUMNS = ['Timestamp', 'Hostname', 'AppName', 'PID', 'Message']
+
+
+def _keyword_mask(keyword, search_array, field_index):
+    """1つのキーワードに一致する行を真とする bool の numpy 配列を返す。"""
+    condition = parse_field_condition(keyword) if field_index is not None else None
+    if condition is not None:
+        return field_index.evaluate(condition)
+    return compile_glob(keyword).match_array(search_array)
+
+
+def evaluate_keyword_filters(search_text, filters, field_index=None):
+    """
+    キーワード条件 ([{"keyword": ..., "operator": "AND" | "OR"}, ...]) を先頭から順に
+    評価し、一致する行を真とする bool の Series を返す。空のキーワードは無視する
+    (先頭が空の場合は全行一致から始める)。キーワードの判定は glob_match で行う。
+    field_index (search_text と同じ行の FieldIndex) を指定すると、"field:status>=500" のような
+    "field:" で始まる比較の形のキーワードは Message のフィールドの比較として評価する (field_extraction)。
+    """
+    keywords = [condition['keyword'].strip() for condition in filters]
+    search_array = to_search_array(search_text)
+
+    if keywords and keywords[0]:
+        current_filter = _keyword_mask(keywords[0], search_array, field_index)
+    else:
+        current_filter = np.ones(len(search_text), dtype=bool)
+
+    for condition, keyword in zip(filters[1:], keywords[1:]):
+        if not keyword:
+            continue
+        current_condition = _keyword_mask(keyword, search_array, field_index)
+        if condition['operator'] == "AND":
+            current_filter = current_filter & current_condition
+        elif condition['operator'] == "OR":
+            current_filter = current_filter | current_condition
+    return pd.Series(current_filter, index=search_text.index)
+
+
+def _to_search_array(series):
+    """1列を検索用の Arrow 文字列配列 (large_string) に変換する。欠損値は null のまま残す。"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return format_local_timestamps(series)
+    return pa.array(series.astype("string[pyarrow]")).cast(pa.large_string())
+
+
+def build_search_text(df, columns):
+    """
+    検索対象の列を空白区切りで連結した文字列 Series (string[pyarrow]) を返す。
+    連結は Arrow の compute カーネルで行い、行ごとの Python 文字列は作らない。
+    欠損値は空文字として連結する。
+    """
+    arrays = [_to_search_array(df[col]) for col in columns if col in df.columns]
+    if not arrays:
+        return pd.Series([""] * len(df), index=df.index, dtype="string[pyarrow]")
+    separator = pa.scalar(" ", type=pa.large_string())
+    joined = pc.binary_join_element_wise(*arrays, separator, null_handling="replace", null_replacement="")
+    return pd.Series(pd.arrays.ArrowStringArray(joined), index=df.index)
+
+
+def _cover_from_windows(starts, ends, length):
+    """
+    [start, end) の区間の集合が覆う位置を真とする bool 配列を返す。
+    区間の始点で +1、終点で -1 した差分配列の累積和で求めるため、
+    重なり合う区間は自然に1つにまとまる。
+    """
+    delta = np.bincount(starts, minlength=length + 1) - np.bincount(ends, minlength=length + 1)
+    return np.cumsum(delta[:length]) > 0
+
+
+def expand_context_rows(match_mask, before=0, after=0, group_keys=None):
+    """
+    grep -C のように、一致した行とその前後 before / after 行を含む bool 配列を返す。
+    group_keys (行ごとのキーの配列、または列のリスト/DataFrame) を指定した場合、
+    前後の行は同じキーを持つ行の中で数える (例: 同じ Hostname の前後の行)。
+    前後の範囲は一致位置からの添字演算だけで求め、行の再走査は行わない。
+    """
+    match_mask = np.asarray(match_mask, dtype=bool)
+    length = len(match_mask)
+    if length == 0 or (before <= 0 and after <= 0):
+        return match_mask.copy()
+
+    if group_keys is None:
+        positions = np.flatnonzero(match_mask)
+        starts = np.maximum(positions - before, 0)
+        ends = np.minimum(positions + after + 1, length)
+        return _cover_from_windows(starts, ends, length)
+
+    if isinstance(group_keys, pd.DataFrame):
+        codes = group_keys.groupby(list(group_keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        codes, _ = pd.factorize(np.asarray(group_keys, dtype=object), use_na_sentinel=False)
+
+    # グループごとに元の順序を保ったまま並べ替え、並べ替え後の添字空間で区間を求める
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_ends = np.r_[group_starts[1:], length]
+    group_index = np.cumsum(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) - 1
+
+    positions = np.flatnonzero(match_mask[order])
+    starts = np.maximum(positions - before, group_starts[group_index[positions]])
+    ends = np.minimum(positions + after + 1, group_ends[group_index[positions]])
+    sorted_cover = _cover_from_windows(starts, ends, length)
+
+    cover = np.empty(length, dtype=bool)
+    cover[order] = sorted_cover
+    return cover
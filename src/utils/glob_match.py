@@ -0,0 +1,109 @@
+# src/utils/glob_match.py
+# キーワードのワイルドカード (* は0文字以上、? は任意の1文字、大文字小文字を区別しない部分一致) の判定。
+# 正規表現に変換して Python の re (バックトラック型) で評価すると、"*a*a*a*a*b" のようなパターンで
+# 行の長さに対して多項式時間以上かかるため、バックトラックしない方法で評価する。
+# - 1つの文字列: * で区切った区間を先頭から順に、区間内の固定文字列を手がかりに最も左の出現位置で
+#   照合する (O(文字列長 × パターン長))
+# - 列全体: Arrow の正規表現カーネル (RE2、入力長に対して線形時間) で列をまとめて判定する
+import re
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+WILDCARD_ANY = "*"
+WILDCARD_ONE = "?"
+
+
+def _split_literals(segment):
+    """? を含む区間を (区間内の位置, 固定文字列) のリストに分ける。"""
+    return [
+        (match.start(), match.group())
+        for match in re.finditer(r"[^?]+", segment)
+    ]
+
+
+class GlobPattern:
+    """compile_glob で作る、ワイルドカードキーワードの照合器。"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        lowered = pattern.lower()
+        # 部分一致のため、先頭・末尾の * や連続する * は意味を持たない
+        self.segments = [segment for segment in lowered.split(WILDCARD_ANY) if segment]
+        self._segment_literals = [_split_literals(segment) for segment in self.segments]
+        self.regex = ".*".join(re.escape(segment).replace(r"\?", ".") for segment in self.segments)
+
+    def __repr__(self):
+        return f"GlobPattern({self.pattern!r})"
+
+    def _find_segment(self, text, index, start):
+        """index 番目の区間が text[start:] に最初に現れる位置を返す (無ければ -1)。"""
+        segment = self.segments[index]
+        literals = self._segment_literals[index]
+        if not literals: # ? だけの区間
+            return start if start + len(segment) <= len(text) else -1
+        # 区間内で最も長い固定文字列を str.find で探し、残りの固定文字列はその位置から照合する
+        anchor_offset, anchor = max(literals, key=lambda item: len(item[1]))
+        while True:
+            found = text.find(anchor, start + anchor_offset)
+            if found < 0:
+                return -1
+            candidate = found - anchor_offset
+            if candidate + len(segment) <= len(text) and all(
+                text.startswith(literal, candidate + offset) for offset, literal in literals
+            ):
+                return candidate
+            start = candidate + 1
+
+    def _match_line(self, text):
+        position = 0
+        for index, segment in enumerate(self.segments):
+            found = self._find_segment(text, index, position)
+            if found < 0:
+                return False
+            position = found + len(segment)
+        return True
+
+    def match(self, text):
+        """
+        text がパターンに部分一致するかを返す。正規表現の "." と同じく * と ? は改行をまたがないため、
+        改行を含む場合は行ごとに判定する。None は一致しない。
+        """
+        if text is None:
+            return False
+        lowered = text.lower()
+        if "\n" in lowered:
+            return any(self._match_line(line) for line in lowered.split("\n"))
+        return self._match_line(lowered)
+
+    def match_array(self, values):
+        """
+        文字列の列 (Arrow 配列、または Series) の各要素が一致するかを bool の numpy 配列で返す。
+        列全体を RE2 で1回走査して判定する (固定文字列による候補の絞り込みも RE2 の中で行われる)。
+        欠損値は一致しない。
+        """
+        hits = pc.match_substring_regex(to_search_array(values), self.regex, ignore_case=True)
+        return pc.fill_null(hits, False).to_numpy(zero_copy_only=False)
+
+    def match_series(self, series):
+        """文字列の Series の各要素が一致するかを bool の Series で返す。"""
+        return pd.Series(self.match_array(series), index=series.index)
+
+
+@lru_cache(maxsize=256)
+def compile_glob(pattern):
+    """ワイルドカードキーワードを照合器に変換する (同じキーワードは使い回す)。"""
+    return GlobPattern(pattern)
+
+
+def to_search_array(values):
+    """文字列の Series / 配列を Arrow の文字列配列に変換する (Arrow の列はコピーしない)。"""
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        array = values
+    else:
+        array = pa.array(values.array if isinstance(values, pd.Series) else values)
+    if not pa.types.is_string(array.type) and not pa.types.is_large_string(array.type):
+        array = array.cast(pa.large_string())
+    return array
@@ -1,6 +1,15 @@
 # utils/log_parser_utils.py
+import os
 import re
-from datetime import datetime
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .glob_match import WILDCARD_ANY, WILDCARD_ONE, compile_glob
 
 # Syslogの正規表現パターン (既存コードと同一)
 # NOTE: オリジナルのapp.pyの正規表現は少し異なっていたため、そちらに合わせます。
@@ -12,12 +21,77 @@ SYSLOG_PATTERN = re.compile(
     r'(.*)$'                                                           # Message
 )
 
-def parse_syslog_line(log_line):
+# BSD形式 (RFC3164) のSyslogパターン。例: "<34>Oct 11 22:14:15 mymachine su[123]: message"
+# 年が含まれないため、パース時に基準時刻 (ファイルの更新日時など) から補完する (_bsd_year)。
+BSD_SYSLOG_PATTERN = re.compile(
+    r'(?:<\d{1,3}>)?'                                                  # PRI (任意)
+    r'([A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})\s+'                # Timestamp
+    r'([\w\d\.-]+)\s+'                                                 # Hostname
+    r'([\w\d\.\-/]+)?(?:\[(\d+)\])?:\s*'                               # AppName[PID]:
+    r'(.*)$'                                                           # Message
+)
+
+# journalctl -o json の1行 (JSONオブジェクト) を判定するための簡易パターン
+JOURNALD_JSON_PATTERN = re.compile(r'^\s*\{.*"MESSAGE"\s*:')
+
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
+
+# journald のJSON出力から利用するフィールド
+JOURNALD_FIELDS = ["__REALTIME_TIMESTAMP", "_HOSTNAME", "SYSLOG_IDENTIFIER", "_COMM", "_PID", "SYSLOG_PID", "MESSAGE"]
+
+# 全てのパーサーが返す列 (各ページはこの列構成を前提とする)
+LOG_COLUMNS = ["Timestamp", "Hostname", "AppName", "PID", "Message"]
+
+# 文字列の列は PyArrow の連続したバッファに格納する (1行ごとのPythonオブジェクトを持たない)。
+# .str.contains などは Arrow の compute カーネルで処理される。
+TEXT_COLUMNS = ["Hostname", "AppName", "PID", "Message"]
+TEXT_DTYPE = "string[pyarrow]"
+
+# 表示・検索で使うタイムスタンプの文字列形式 (ログの現地時刻)
+LOCAL_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+# フォーマット自動判定でサンプリングする先頭行数
+FORMAT_DETECTION_SAMPLE_LINES = 200
+
+DEFAULT_LOG_FORMAT = "iso8601"
+
+# RFC3164 の月の略称 -> 月
+BSD_MONTHS = {name: number for number, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], start=1
+)}
+
+
+def source_reference_time(log_source):
     """
-    Syslogの1行をパースして辞書として返す。
-    タイムスタンプはdatetimeオブジェクトに変換される。
-    カラム名はオリジナルのapp.pyに合わせて大文字始まり。
+    年を含まないタイムスタンプ (RFC3164) の年の推定に使う基準時刻を返す。
+    ファイルのパスであれば更新日時 (ログはそれより後の時刻を含まない)、それ以外は現在時刻。
+    """
+    if isinstance(log_source, str):
+        try:
+            return datetime.fromtimestamp(os.path.getmtime(log_source))
+        except OSError:
+            pass
+    return datetime.now()
+
+
+def _bsd_year(month, reference_time):
+    """
+    RFC3164 の行の年を推定する。基準時刻の月より後の月の行は前年の行とみなす
+    (1月に読み込んだ12月のログなど、年をまたぐログに対応する)。
     """
+    return reference_time.year - 1 if month > reference_time.month else reference_time.year
+
+
+def _strip_ansi(message):
+    return ANSI_ESCAPE_PATTERN.sub('', message)
+
+
+def _empty_log_frame():
+    return pd.DataFrame(columns=LOG_COLUMNS)
+
+
+# --- 1行パーサー (フォーマットごと) ---
+def _parse_iso8601_line(log_line, reference_time=None):
     match = SYSLOG_PATTERN.match(log_line)
     if match:
         timestamp_str, hostname, app_name_raw, pid, message_raw = match.groups()
@@ -30,7 +104,7 @@ def parse_syslog_line(log_line):
         app_name = app_name_raw if app_name_raw else "Unknown"
 
         # メッセージからANSIエスケープシーケンスを除去
-        cleaned_message = re.sub(r'\x1b\[[0-9;]*m', '', message_raw)
+        cleaned_message = _strip_ansi(message_raw)
 
         return {
             "Timestamp": timestamp,
@@ -39,4 +113,393 @@ def parse_syslog_line(log_line):
             "PID": pid,
             "Message": cleaned_message
         }
-    return None
\ No newline at end of file
+    return None
+
+
+def _parse_bsd_line(log_line, reference_time=None):
+    match = BSD_SYSLOG_PATTERN.match(log_line)
+    if match:
+        timestamp_str, hostname, app_name_raw, pid, message_raw = match.groups()
+        year = _bsd_year(BSD_MONTHS.get(timestamp_str[:3], 0), reference_time or datetime.now())
+        try:
+            timestamp = datetime.strptime(f"{year} {' '.join(timestamp_str.split())}", "%Y %b %d %H:%M:%S")
+        except ValueError:
+            timestamp = timestamp_str
+
+        return {
+            "Timestamp": timestamp,
+            "Hostname": hostname,
+            "AppName": app_name_raw if app_name_raw else "Unknown",
+            "PID": pid,
+            "Message": _strip_ansi(message_raw.rstrip('\r\n'))
+        }
+    return None
+
+
+def _journald_record_to_dict(record):
+    realtime = record.get("__REALTIME_TIMESTAMP")
+    try:
+        timestamp = pd.Timestamp(int(realtime), unit="us", tz="UTC").to_pydatetime()
+    except (TypeError, ValueError):
+        timestamp = realtime
+
+    message = record.get("MESSAGE", "")
+    if isinstance(message, list):
+        # バイナリメッセージはバイト配列で出力される
+        message = bytes(message).decode("utf-8", errors="ignore")
+
+    pid = record.get("_PID") or record.get("SYSLOG_PID")
+    return {
+        "Timestamp": timestamp,
+        "Hostname": record.get("_HOSTNAME"),
+        "AppName": record.get("SYSLOG_IDENTIFIER") or record.get("_COMM") or "Unknown",
+        "PID": str(pid) if pid is not None else None,
+        "Message": _strip_ansi(str(message) if message is not None else "")
+    }
+
+
+def _parse_journald_json_line(log_line, reference_time=None):
+    try:
+        record = json.loads(log_line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "MESSAGE" not in record:
+        return None
+    return _journald_record_to_dict(record)
+
+
+# --- 一括パーサー (フォーマットごとのベクトル化された高速パス) ---
+def _finalize_frame(df):
+    """抽出結果を共通の列構成と列の型に整える。"""
+    df["AppName"] = df["AppName"].fillna("Unknown")
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].astype(TEXT_DTYPE)
+    has_escape = df["Message"].str.contains('\x1b', regex=False, na=False)
+    if has_escape.any():
+        df.loc[has_escape, "Message"] = df.loc[has_escape, "Message"].str.replace(ANSI_ESCAPE_PATTERN.pattern, '', regex=True)
+    return df[LOG_COLUMNS].reset_index(drop=True)
+
+
+def _multiline_pattern(pattern):
+    """
+    1行用のパターンを、バッファ全体に対して findall できる複数行パターンに変換する。
+    区切りの空白が改行をまたがないよう \\s を改行以外の空白に置き換える。
+    """
+    return re.compile('^' + pattern.pattern.replace(r'\s', r'[^\S\n]'), re.MULTILINE)
+
+
+def _findall_frame(lines, pattern):
+    """
+    全行を1つのバッファに連結し、1回の findall で各列を抽出する。
+    行ごとの match 呼び出しや辞書の生成を行わないため高速。
+    """
+    records = pattern.findall("\n".join(lines))
+    if not records:
+        return None
+    df = pd.DataFrame.from_records(records, columns=LOG_COLUMNS)
+    # findall は一致しなかった任意グループを空文字で返すため、欠損値に揃える
+    df["AppName"] = df["AppName"].mask(df["AppName"] == "")
+    df["PID"] = df["PID"].mask(df["PID"] == "")
+    return df
+
+
+def iso8601_to_datetime(timestamp_strings):
+    """
+    SYSLOG_PATTERN のタイムスタンプ (固定長32文字) を一括でdatetimeに変換する。
+    全行のUTCオフセットが同じであれば、オフセット前の部分を numpy の
+    datetime64 変換にかけ、最後にオフセットを付与する。オフセットのない
+    固定長26文字の場合はタイムゾーンなしで変換する。それ以外 (オフセットが
+    混在する場合など) は1要素ずつ datetime.fromisoformat で変換する。
+    欠損値 (大容量モードで時刻の無い行など) は NaT にする。
+    """
+    present = timestamp_strings.notna()
+    if not present.all():
+        if not present.any():
+            return pd.Series(pd.NaT, index=timestamp_strings.index, dtype='datetime64[ns]')
+        converted = iso8601_to_datetime(timestamp_strings[present])
+        return converted.reindex(timestamp_strings.index).where(present, pd.NaT)
+
+    lengths = timestamp_strings.str.len()
+    if lengths.eq(26).all():
+        naive = np.array(timestamp_strings.to_numpy(dtype='U26'), dtype='datetime64[us]')
+        return pd.Series(pd.DatetimeIndex(naive).as_unit('ns'), index=timestamp_strings.index)
+
+    offsets = timestamp_strings.str.slice(26).unique()
+    if len(offsets) == 1 and lengths.eq(32).all():
+        offset = offsets[0]
+        sign = -1 if offset[0] == '-' else 1
+        tz = timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6])))
+        naive = np.array(timestamp_strings.str.slice(0, 26).to_numpy(dtype='U26'), dtype='datetime64[us]')
+        localized = pd.DatetimeIndex(naive).tz_localize(tz).as_unit('ns')
+        return pd.Series(localized, index=timestamp_strings.index)
+
+    def _convert(value):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return value # パース失敗時は元の文字列を保持
+    return timestamp_strings.map(_convert)
+
+
+def format_local_timestamps(timestamps):
+    """
+    タイムスタンプの Series を、ログの現地時刻の文字列 (LOCAL_TIMESTAMP_FORMAT) の
+    Arrow 文字列配列 (large_string) に変換する。書式化は Arrow の compute カーネルで行う。
+    """
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        local = timestamps.dt.tz_localize(None) if timestamps.dt.tz is not None else timestamps
+        # マイクロ秒単位の timestamp を Arrow で書式化すると "%S" に小数6桁が付き、
+        # LOCAL_TIMESTAMP_FORMAT と同じ文字列になる
+        array = pc.strftime(pa.array(local.astype("datetime64[us]")), format="%Y-%m-%dT%H:%M:%S")
+    else:
+        # オフセットが混在する場合などは datetime オブジェクトの列になっている
+        array = pa.array(timestamps.map(
+            lambda t: t.strftime(LOCAL_TIMESTAMP_FORMAT) if isinstance(t, datetime) else (None if pd.isna(t) else str(t))
+        ), type=pa.string())
+    return array.cast(pa.large_string())
+
+
+_SYSLOG_MULTILINE_PATTERN = _multiline_pattern(SYSLOG_PATTERN)
+_BSD_SYSLOG_MULTILINE_PATTERN = _multiline_pattern(BSD_SYSLOG_PATTERN)
+
+
+def _parse_iso8601_lines(lines, reference_time=None):
+    extracted = _findall_frame(lines, _SYSLOG_MULTILINE_PATTERN)
+    if extracted is None:
+        return _empty_log_frame()
+    extracted["Timestamp"] = iso8601_to_datetime(extracted["Timestamp"])
+    return _finalize_frame(extracted)
+
+
+def _parse_bsd_lines(lines, reference_time=None):
+    extracted = _findall_frame(lines, _BSD_SYSLOG_MULTILINE_PATTERN)
+    if extracted is None:
+        return _empty_log_frame()
+    extracted["Message"] = extracted["Message"].str.rstrip('\r')
+    reference_time = reference_time or datetime.now()
+    months = extracted["Timestamp"].str[:3].map(BSD_MONTHS).fillna(0).to_numpy()
+    years = np.where(months > reference_time.month, reference_time.year - 1, reference_time.year)
+    # 日が1桁の場合の連続した空白は strptime 形式の空白が吸収する
+    normalized = pd.Series(years, index=extracted.index).astype(str) + " " + extracted["Timestamp"]
+    extracted["Timestamp"] = pd.to_datetime(normalized, format="%Y %b %d %H:%M:%S", errors="coerce")
+    return _finalize_frame(extracted)
+
+
+def _parse_journald_json_lines(lines, reference_time=None):
+    records = []
+    for line in lines:
+        if not JOURNALD_JSON_PATTERN.match(line):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+    if not records:
+        return _empty_log_frame()
+
+    # 必要なフィールドだけを列として取り出す (行ごとの辞書の再構築はしない)。
+    # 数値の PID などが欠損値との混在で float にならないよう、値は object のまま保持する
+    raw = pd.DataFrame(records, columns=JOURNALD_FIELDS, dtype=object)
+    raw = raw.where(raw.notna(), None)
+
+    messages = raw["MESSAGE"].map(
+        lambda m: bytes(m).decode("utf-8", errors="ignore") if isinstance(m, list) else ("" if m is None else str(m))
+    )
+    pid = raw["_PID"].fillna(raw["SYSLOG_PID"])
+    df = pd.DataFrame({
+        "Timestamp": pd.to_datetime(pd.to_numeric(raw["__REALTIME_TIMESTAMP"], errors="coerce"), unit="us", utc=True),
+        "Hostname": raw["_HOSTNAME"],
+        "AppName": raw["SYSLOG_IDENTIFIER"].fillna(raw["_COMM"]),
+        "PID": pid.map(lambda p: None if p is None else str(p)),
+        "Message": messages,
+    })
+    return _finalize_frame(df)
+
+
+# --- パーサーレジストリ ---
+# フォーマット名 -> {"detect": 行判定関数, "parse_line": 1行パーサー, "parse_lines": 一括パーサー}
+LOG_FORMATS = {}
+
+
+def register_log_format(name, detect, parse_line, parse_lines):
+    """
+    ログフォーマットをレジストリに登録する。
+    detect は1行を受け取り、そのフォーマットの行であれば真を返す関数。
+    parse_line は1行を辞書に、parse_lines は行のリストを LOG_COLUMNS の
+    DataFrame に変換する関数。登録順が判定の優先順位になる。
+    parse_line / parse_lines は、年を含まないタイムスタンプの補完に使う基準時刻
+    (reference_time、省略時は現在時刻) をキーワード引数で受け取る。
+    """
+    LOG_FORMATS[name] = {
+        "detect": detect,
+        "parse_line": parse_line,
+        "parse_lines": parse_lines,
+    }
+
+
+register_log_format("iso8601", SYSLOG_PATTERN.match, _parse_iso8601_line, _parse_iso8601_lines)
+register_log_format("rfc3164", BSD_SYSLOG_PATTERN.match, _parse_bsd_line, _parse_bsd_lines)
+register_log_format("journald_json", JOURNALD_JSON_PATTERN.match, _parse_journald_json_line, _parse_journald_json_lines)
+
+
+def detect_log_format(lines, sample_size=FORMAT_DETECTION_SAMPLE_LINES):
+    """
+    先頭 sample_size 行 (空行を除く) をサンプリングし、最も多くの行に一致した
+    フォーマット名を返す。どのフォーマットにも一致しない場合は DEFAULT_LOG_FORMAT。
+    """
+    sample = []
+    for line in lines:
+        if line.strip():
+            sample.append(line)
+            if len(sample) >= sample_size:
+                break
+
+    best_format, best_hits = DEFAULT_LOG_FORMAT, 0
+    for name, log_format in LOG_FORMATS.items():
+        hits = sum(1 for line in sample if log_format["detect"](line))
+        if hits > best_hits:
+            best_format, best_hits = name, hits
+    return best_format
+
+
+def parse_log_lines(lines, log_format=None, reference_time=None):
+    """
+    行のリストを LOG_COLUMNS の DataFrame に一括変換する。
+    log_format を省略した場合は detect_log_format で自動判定する。
+    reference_time は RFC3164 の年の推定に使う基準時刻 (source_reference_time、省略時は現在時刻)。
+    """
+    if log_format is None:
+        log_format = detect_log_format(lines)
+    return LOG_FORMATS[log_format]["parse_lines"](lines, reference_time=reference_time)
+
+
+def parse_syslog_line(log_line, log_format=None, reference_time=None):
+    """
+    Syslogの1行をパースして辞書として返す。
+    タイムスタンプはdatetimeオブジェクトに変換される。
+    カラム名はオリジナルのapp.pyに合わせて大文字始まり。
+    log_format を省略した場合は登録済みの全フォーマットを順に試す。
+    """
+    if log_format is not None:
+        return LOG_FORMATS[log_format]["parse_line"](log_line, reference_time=reference_time)
+    for registered_format in LOG_FORMATS.values():
+        parsed = registered_format["parse_line"](log_line, reference_time=reference_time)
+        if parsed:
+            return parsed
+    return None
+
+
+# --- 読み込み時の絞り込み (述語プッシュダウン) ---
+# 生バイト列の先頭を辞書順で比較できるフォーマットと、その比較に使う桁数
+TIMESTAMP_PREFIX_FORMATS = {
+    "iso8601": ("%Y-%m-%dT%H:%M:%S.%f", 26),
+}
+
+
+def _looks_like_iso8601_prefix(raw_line):
+    return raw_line[4:5] == b'-' and raw_line[10:11] == b'T'
+
+
+def _is_raw_keyword(keyword, log_format):
+    """
+    キーワードを生のバイト列のまま判定できるかを返す。bytes.lower() は ASCII だけを小文字にするため
+    ASCII のキーワードに限り、JSON の行ではエスケープされ得る文字 (" \\ / と制御文字) を含まないものに限る。
+    """
+    if not keyword.isascii():
+        return False
+    if log_format == "journald_json":
+        return keyword.isprintable() and not any(c in keyword for c in '"\\/')
+    return True
+
+
+def _keyword_literals(keyword):
+    """キーワードをワイルドカード (* と ?) で区切った固定文字列 (小文字) のリスト。一致する行は全てを含む。"""
+    return [literal for literal in re.split(r"[*?]", keyword.lower()) if literal]
+
+
+def _json_values_text(raw_line):
+    """JSON の行の値 (エスケープを戻した文字列) を空白で連結して返す。JSON のオブジェクトでない行は None。"""
+    try:
+        record = json.loads(raw_line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    return " ".join(
+        bytes(value).decode("utf-8", errors="ignore") if isinstance(value, list) else str(value)
+        for value in record.values()
+    )
+
+
+def filter_raw_lines(raw_lines, log_format, start=None, end=None, keywords=None, assume_sorted=False):
+    """
+    パース前の生の行 (bytes) を絞り込み、条件に一致する可能性のある行だけを返すジェネレータ。
+    start / end はログの現地時刻 (タイムゾーンなし) の datetime。先頭のタイムスタンプが
+    辞書順で比較できるフォーマットでは、その桁だけを比較して範囲外の行を捨てる。
+    keywords は全てに一致する行だけを残す (キーワードフィルタリングと同じく、* と ? をワイルドカードとする
+    大文字小文字を区別しない部分一致。glob_match)。ASCII のキーワードは、まずワイルドカード以外の
+    固定文字列を生のバイト列のまま探して候補を絞り込む。ワイルドカードを含むキーワードと ASCII 以外の
+    キーワードは、候補の行をデコードして glob_match で判定し直す。journald の JSON では、キー名
+    ("_PID" や "MESSAGE") に一致しないよう、全てのキーワードを JSON をデコードした値に対して判定し直す。
+    assume_sorted が真の場合、終了日時を過ぎたタイムスタンプが現れた時点で読み込みを打ち切る
+    (raw_lines のファイルは呼び出し側で閉じる)。
+    """
+    keywords = [k for k in (keywords or []) if k]
+    raw_literals = [
+        literal.encode('ascii')
+        for k in keywords if _is_raw_keyword(k, log_format)
+        for literal in _keyword_literals(k)
+    ]
+    exact_keywords = [
+        compile_glob(k) for k in keywords
+        if log_format == "journald_json" or not _is_raw_keyword(k, log_format) or WILDCARD_ANY in k or WILDCARD_ONE in k
+    ]
+
+    prefix_spec = TIMESTAMP_PREFIX_FORMATS.get(log_format)
+    start_key = end_key = None
+    if prefix_spec:
+        prefix_format, prefix_length = prefix_spec
+        start_key = start.strftime(prefix_format).encode('ascii') if start else None
+        end_key = end.strftime(prefix_format).encode('ascii') if end else None
+
+    for raw_line in raw_lines:
+        if start_key is not None or end_key is not None:
+            prefix = raw_line[:prefix_length]
+            if end_key is not None and prefix > end_key:
+                if assume_sorted and _looks_like_iso8601_prefix(raw_line):
+                    break
+                continue
+            if start_key is not None and prefix < start_key:
+                continue
+        if raw_literals:
+            lowered = raw_line.lower()
+            if not all(literal in lowered for literal in raw_literals):
+                continue
+        if exact_keywords:
+            if log_format == "journald_json":
+                text = _json_values_text(raw_line)
+            else:
+                text = raw_line.decode('utf-8', errors='ignore').rstrip('\r\n')
+            if text is None or not all(pattern.match(text) for pattern in exact_keywords):
+                continue
+        yield raw_line
+
+
+def filter_frame_by_time_range(df, start=None, end=None):
+    """
+    パース済みの DataFrame を現地時刻 (タイムゾーンなし) の start / end で絞り込む。
+    タイムスタンプの桁比較ができないフォーマット向けの仕上げの絞り込みに使う。
+    """
+    if df.empty or (start is None and end is None) or not pd.api.types.is_datetime64_any_dtype(df["Timestamp"]):
+        return df
+    local_timestamps = df["Timestamp"]
+    if local_timestamps.dt.tz is not None:
+        local_timestamps = local_timestamps.dt.tz_localize(None)
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= local_timestamps >= start
+    if end is not None:
+        mask &= local_timestamps <= end
+    return df[mask].reset_index(drop=True)
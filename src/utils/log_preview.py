@@ -0,0 +1,175 @@
+# src/utils/log_preview.py
+# 大きなログファイルの全体をパースする前に、ファイル全体に均等に配置したバイト位置から少数の行を
+# 読んでパースし、ログの期間・1時間あたりの件数・Hostname / AppName の分布を推定する (クイックプレビュー)。
+# 読む量はファイルの大きさによらず一定 (PREVIEW_BLOCKS × PREVIEW_LINES_PER_BLOCK 行程度) のため、
+# 数GBのファイルでも数秒以内に表示できる。推定値は全体のパースが終わった時点で正確な値に置き換える。
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from .log_parser_utils import FORMAT_DETECTION_SAMPLE_LINES, detect_log_format, format_local_timestamps, parse_log_lines, source_reference_time
+from .parallel_parse import concat_parsed_frames
+
+# この大きさ以上のファイルでクイックプレビューを表示する (小さいファイルは全体のパースがすぐに終わる)
+PREVIEW_MIN_BYTES = 32 * 1024 * 1024
+
+# ファイル内で行を読む位置の数と、1つの位置から読む行数
+PREVIEW_BLOCKS = 64
+PREVIEW_LINES_PER_BLOCK = 200
+
+# 推定件数の列名 (LogSummary.top_values と同じ)
+ESTIMATED_COUNT_COLUMN = "推定件数"
+
+
+def use_log_preview(log_source):
+    """log_source のクイックプレビューを表示するかどうかを返す (PREVIEW_MIN_BYTES 以上のファイルのパス)。"""
+    return isinstance(log_source, str) and os.path.getsize(log_source) >= PREVIEW_MIN_BYTES
+
+
+def sample_line_blocks(path, blocks=PREVIEW_BLOCKS, lines_per_block=PREVIEW_LINES_PER_BLOCK):
+    """
+    ファイル全体に均等に配置した blocks 個の位置から、それぞれ lines_per_block 行を読む。
+    各位置は次の改行の直後に揃え、最後のブロックはファイルの末尾の行を読む (時刻順のログでは
+    最初と最後のブロックが期間の両端になる)。戻り値は [(ブロックの開始位置, 行 (bytes) のリスト), ...]。
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    sampled = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        previous_end = 0
+        for index in range(blocks):
+            if index == blocks - 1 and index > 0:
+                # 末尾の lines_per_block 行 (最後の行の改行の有無によらず同じ行数になるよう末尾の1文字は除く)
+                start = size - 1
+                for _ in range(lines_per_block):
+                    start = mm.rfind(b"\n", 0, start)
+                    if start < 0:
+                        break
+                start += 1
+                end = size
+            else:
+                offset = size * index // blocks
+                start = 0 if offset == 0 else mm.find(b"\n", offset - 1) + 1
+                if offset > 0 and start == 0: # offset 以降に改行が無い
+                    continue
+                end = start
+                for _ in range(lines_per_block):
+                    newline = mm.find(b"\n", end)
+                    end = size if newline < 0 else newline + 1
+                    if end >= size:
+                        break
+            start = max(start, previous_end) # 小さいファイルでブロックが重ならないようにする
+            if start >= end:
+                continue
+            sampled.append((start, mm[start:end].split(b"\n")))
+            previous_end = end
+    return sampled
+
+
+def local_times(timestamps):
+    """タイムスタンプの Series を、ログの現地時刻 (タイムゾーンなし) の datetime64 の Series に変換する。"""
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return timestamps.dt.tz_localize(None) if timestamps.dt.tz is not None else timestamps
+    # オフセットが混在する場合などは、現地時刻の文字列を経由する
+    local = format_local_timestamps(timestamps).to_pandas()
+    return pd.to_datetime(local, format="ISO8601", errors="coerce")
+
+
+def time_span_of_frame(df):
+    """
+    DataFrame のログの最初と最後の時刻 (現地時刻、タイムゾーンなし) を返す。時刻が無い場合は (None, None)。
+    連続する同一メッセージをまとめた DataFrame の場合は、最後の時刻 (LastTimestamp) も考慮する。
+    """
+    if df is None or df.empty or "Timestamp" not in df.columns:
+        return None, None
+    times = local_times(df["Timestamp"])
+    if "LastTimestamp" in df.columns:
+        times = pd.concat([times, local_times(df["LastTimestamp"])], ignore_index=True)
+    if times.isna().all():
+        return None, None
+    return times.min().to_pydatetime(), times.max().to_pydatetime()
+
+
+class LogPreview:
+    """
+    build_log_preview で作る、ファイルの一部の行から推定したログの概要。
+    件数は、パースした行の数をファイル全体のバイト数に比例させて推定する。
+    """
+
+    def __init__(self, frame, block_times, file_bytes, sampled_bytes, log_format):
+        self.frame = frame
+        self.log_format = log_format
+        self.file_bytes = file_bytes
+        self.sample_rows = len(frame)
+        # 1行あたりの平均バイト数 (パースできない行や複数行のメッセージの分も含む)
+        self.bytes_per_row = sampled_bytes / len(frame) if len(frame) else None
+        self.estimated_rows = int(round(file_bytes / self.bytes_per_row)) if self.bytes_per_row else 0
+        self.start, self.end = time_span_of_frame(frame)
+        self._times = local_times(frame["Timestamp"]) if len(frame) else pd.Series(dtype="datetime64[ns]")
+        self._block_times = block_times # [(ファイル内の位置, その位置の行の時刻), ...] (ブロックごとの最初と最後の行)
+
+    def _is_time_ordered(self):
+        times = [time for _, time in self._block_times]
+        return len(times) >= 2 and all(a <= b for a, b in zip(times, times[1:]))
+
+    def hourly_counts(self):
+        """
+        1時間あたりの推定件数を、時刻 (1時間単位) を索引とする Series で返す。
+        ブロックの時刻がファイル内の位置の順に並んでいる (時刻順のログ) 場合は、各ブロックの最初と最後の行の
+        位置と時刻の対応から各時間帯のバイト数を補間して件数を推定する。そうでない場合は、読んだ行の時刻の分布を
+        ファイル全体の件数に比例させる。
+        """
+        if self.start is None:
+            return pd.Series(dtype=np.float64, name=ESTIMATED_COUNT_COLUMN)
+        hours = pd.date_range(pd.Timestamp(self.start).floor("h"), pd.Timestamp(self.end).floor("h"), freq="h")
+        if self._is_time_ordered():
+            offsets = np.array([offset for offset, _ in self._block_times], dtype=np.float64)
+            times = np.array([time for _, time in self._block_times], dtype="datetime64[ns]").astype(np.int64)
+            edges = hours.append(pd.DatetimeIndex([hours[-1] + pd.Timedelta(hours=1)])).asi8
+            cumulative_bytes = np.interp(edges, times, offsets)
+            counts = np.diff(cumulative_bytes) / self.bytes_per_row
+        else:
+            sampled = self._times.dt.floor("h").value_counts()
+            counts = sampled.reindex(hours, fill_value=0).to_numpy() * (self.estimated_rows / self.sample_rows)
+        return pd.Series(np.round(counts).astype(np.int64), index=hours, name=ESTIMATED_COUNT_COLUMN)
+
+    def top_values(self, column, n=10):
+        """column の上位 n 件と推定件数を DataFrame で返す (LogSummary.top_values と同じ形式)。"""
+        if not self.sample_rows or column not in self.frame.columns:
+            return pd.DataFrame(columns=[column, ESTIMATED_COUNT_COLUMN])
+        counts = self.frame[column].astype(object).value_counts(dropna=True).head(n)
+        return pd.DataFrame({
+            column: counts.index.tolist(),
+            ESTIMATED_COUNT_COLUMN: np.round(counts.to_numpy() * (self.estimated_rows / self.sample_rows)).astype(np.int64),
+        })
+
+
+def build_log_preview(path, log_format=None):
+    """ファイルのクイックプレビュー (LogPreview) を作る。log_format を省略した場合は先頭のブロックから判定する。"""
+    blocks = sample_line_blocks(path)
+    sampled_bytes = sum(sum(map(len, lines)) + len(lines) - 1 for _, lines in blocks)
+    decoded_blocks = [
+        (offset, [line.decode('utf-8', errors='ignore') for line in lines])
+        for offset, lines in blocks
+    ]
+    if log_format is None:
+        first_lines = decoded_blocks[0][1] if decoded_blocks else []
+        log_format = detect_log_format(first_lines[:FORMAT_DETECTION_SAMPLE_LINES])
+
+    reference_time = source_reference_time(path)
+    frames, block_times = [], []
+    for (offset, lines), (_, raw_lines) in zip(decoded_blocks, blocks):
+        df = parse_log_lines(lines, log_format, reference_time=reference_time)
+        frames.append(df)
+        times = local_times(df["Timestamp"]).dropna() if not df.empty else []
+        if len(times):
+            # 最初の行はブロックの先頭、最後の行はブロックの末尾の位置の時刻とみなす
+            block_times.append((offset, times.iloc[0]))
+            block_times.append((offset + sum(map(len, raw_lines)) + len(raw_lines) - 1, times.iloc[-1]))
+    frame = concat_parsed_frames(frames) if frames else pd.DataFrame()
+    if "Timestamp" not in frame.columns:
+        frame = parse_log_lines([], log_format)
+    return LogPreview(frame, block_times, os.path.getsize(path), sampled_bytes, log_format)
@@ -0,0 +1,306 @@
+# src/utils/multi_search.py
+# temp_syslog_upload 以下に残っている過去のアップロード (データセット) を横断して、
+# 同じ日時範囲とキーワード条件で並列に検索する。
+# 検索はファイル (または大容量モードのデータベース) 単位でワーカープロセスに割り振り、
+# 結果はタスクごとにタイムスタンプ順に並べておき、連結して1回の安定ソートで統合する。
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .field_extraction import FieldIndex
+from .filter_utils import SEARCH_COLUMNS, build_search_text, evaluate_keyword_filters
+from .log_parser_utils import (
+    FORMAT_DETECTION_SAMPLE_LINES,
+    LOG_COLUMNS,
+    detect_log_format,
+    filter_frame_by_time_range,
+    filter_raw_lines,
+    parse_log_lines,
+    source_reference_time,
+)
+from . import sql_backend
+
+UPLOAD_ROOT_DIR = "temp_syslog_upload"
+
+# アップロード元のファイル名などを記録する、各データセットディレクトリ内のファイル
+DATASET_INFO_FILE = "upload_info.json"
+
+# 横断検索の対象とするログファイルの拡張子
+SEARCHABLE_EXTENSIONS = ('.log', '.txt')
+
+# 1つのファイル (またはデータベース) から取り出す結果の上限の既定値
+DEFAULT_RESULT_LIMIT_PER_SOURCE = 10000
+
+# 検索結果に付けるラベル列
+SOURCE_COLUMNS = ["Archive", "File"]
+
+# 残しておく過去のアップロード (データセット) の上限。どちらかを超えると古いものから削除する
+MAX_RETAINED_DATASETS = 10
+MAX_RETAINED_BYTES = 10 * 1024 * 1024 * 1024
+
+# 最後に使われてからこの秒数が経っていないデータセットは、他のセッションが分析中の可能性があるため
+# 上限を超えても自動では削除しない (touch_dataset で各セッションが再実行のたびに最終利用時刻を更新する)
+ACTIVE_DATASET_SECONDS = 12 * 60 * 60
+
+
+def write_dataset_info(directory, source_name, database_file=None):
+    """データセットディレクトリにアップロード元のファイル名 (と大容量モードの格納元) を記録する。"""
+    info = {"source_name": source_name, "database_file": database_file}
+    with open(os.path.join(directory, DATASET_INFO_FILE), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False)
+
+
+def _read_dataset_info(directory):
+    try:
+        with open(os.path.join(directory, DATASET_INFO_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _directory_bytes(directory):
+    total = 0
+    for root, _, file_names in os.walk(directory):
+        for file in file_names:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass
+    return total
+
+
+def list_datasets(root_dir=UPLOAD_ROOT_DIR):
+    """
+    root_dir 直下のデータセットディレクトリを古い順に列挙する。
+    各要素は {"archive": 表示名, "path": ディレクトリ, "files": ログファイルのパスのリスト,
+    "database": 大容量モードのデータベースのパスまたは None, "database_file": データベースの格納元,
+    "bytes": ディレクトリ内のファイルの合計バイト数} の辞書。
+    ログファイルもデータベースも無いディレクトリは除外する。
+    """
+    datasets = []
+    if not os.path.isdir(root_dir):
+        return datasets
+    for name in sorted(os.listdir(root_dir)):
+        directory = os.path.join(root_dir, name)
+        if not os.path.isdir(directory):
+            continue
+        files = sorted(
+            os.path.join(root, file)
+            for root, _, file_names in os.walk(directory)
+            for file in file_names
+            if file.endswith(SEARCHABLE_EXTENSIONS)
+        )
+        db_path = os.path.join(directory, sql_backend.DATABASE_FILE_NAME)
+        database = db_path if os.path.exists(db_path) else None
+        if not files and database is None:
+            continue
+        info = _read_dataset_info(directory)
+        source_name = info.get("source_name")
+        datasets.append({
+            "archive": f"{source_name} ({name})" if source_name else name,
+            "path": directory,
+            "files": files,
+            "database": database,
+            "database_file": info.get("database_file"),
+            "bytes": _directory_bytes(directory),
+        })
+    return datasets
+
+
+def touch_dataset(directory):
+    """データセットディレクトリの最終利用時刻 (更新日時) を現在時刻にする。"""
+    try:
+        os.utime(directory)
+    except OSError:
+        pass
+
+
+def is_dataset_active(directory, now=None, active_seconds=ACTIVE_DATASET_SECONDS):
+    """データセットが active_seconds 秒以内に使われた (touch_dataset された) かどうかを返す。"""
+    try:
+        last_used = os.path.getmtime(directory)
+    except OSError:
+        return False
+    return (time.time() if now is None else now) - last_used < active_seconds
+
+
+def delete_dataset(directory, root_dir=UPLOAD_ROOT_DIR):
+    """データセットディレクトリを削除する。root_dir 直下のディレクトリ以外は削除しない。"""
+    if os.path.dirname(os.path.abspath(directory)) != os.path.abspath(root_dir):
+        raise ValueError(f"{root_dir} 直下のデータセットではありません: {directory}")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def prune_datasets(root_dir=UPLOAD_ROOT_DIR, keep=None, max_bytes=None, protected=(), active_seconds=ACTIVE_DATASET_SECONDS):
+    """
+    データセットが keep 個 (既定は MAX_RETAINED_DATASETS) を超えるか、合計が max_bytes
+    (既定は MAX_RETAINED_BYTES) を超える間、古いものから削除する。protected のディレクトリ
+    (読み込み中・表示中のデータセット) と、active_seconds 秒以内に使われたデータセット (他のセッションが
+    分析中のもの。is_dataset_active) は削除しない。削除したデータセットの表示名のリストを返す。
+    """
+    keep = MAX_RETAINED_DATASETS if keep is None else keep
+    max_bytes = MAX_RETAINED_BYTES if max_bytes is None else max_bytes
+    protected = {os.path.abspath(path) for path in protected if path}
+    now = time.time()
+    datasets = list_datasets(root_dir)
+    count = len(datasets)
+    total_bytes = sum(dataset["bytes"] for dataset in datasets)
+    removed = []
+    for dataset in datasets:
+        if count <= keep and total_bytes <= max_bytes:
+            break
+        if os.path.abspath(dataset["path"]) in protected or is_dataset_active(dataset["path"], now, active_seconds):
+            continue
+        delete_dataset(dataset["path"], root_dir)
+        count -= 1
+        total_bytes -= dataset["bytes"]
+        removed.append(dataset["archive"])
+    return removed
+
+
+def build_search_tasks(datasets):
+    """
+    データセットの一覧を、ワーカーに割り振る検索タスク (archive, file, kind, path) のリストに変換する。
+    大容量モードのデータベースがあるファイルはデータベースを検索し、それ以外はファイルを直接検索する。
+    """
+    tasks = []
+    for dataset in datasets:
+        database_file = dataset.get("database_file")
+        if dataset["database"] is not None:
+            tasks.append((dataset["archive"], database_file or sql_backend.DATABASE_FILE_NAME, "database", dataset["database"]))
+        for path in dataset["files"]:
+            if dataset["database"] is not None and os.path.basename(path) == database_file:
+                continue
+            tasks.append((dataset["archive"], os.path.relpath(path, dataset["path"]), "file", path))
+    return tasks
+
+
+def search_log_file(path, start=None, end=None, filters=None, limit=DEFAULT_RESULT_LIMIT_PER_SOURCE):
+    """
+    1つのログファイルを INGEST_CHUNK_LINES 行ずつパースし、日時範囲とキーワード条件に一致する行を返す。
+    戻り値は (一致した先頭 limit 件の DataFrame (LOG_COLUMNS), 一致した総件数)。
+    ワーカープロセスから呼び出すため、Streamlit には依存しない。
+    """
+    matched_frames = []
+    matched_count = 0
+    collected = 0
+    reference_time = source_reference_time(path)
+    with open(path, 'rb') as f:
+        sample = list(itertools.islice(f, FORMAT_DETECTION_SAMPLE_LINES))
+        log_format = detect_log_format([line.decode('utf-8', errors='ignore') for line in sample])
+        # 日時範囲はパース前の生の行の段階で絞り込む (ファイルの並び順は仮定しない)
+        selected_lines = filter_raw_lines(itertools.chain(sample, f), log_format, start=start, end=end)
+        while True:
+            chunk = list(itertools.islice(selected_lines, sql_backend.INGEST_CHUNK_LINES))
+            if not chunk:
+                break
+            df = parse_log_lines([line.decode('utf-8', errors='ignore') for line in chunk], log_format, reference_time=reference_time)
+            df = filter_frame_by_time_range(df, start, end)
+            if df.empty:
+                continue
+            if filters:
+                df = df[evaluate_keyword_filters(build_search_text(df, SEARCH_COLUMNS), filters, FieldIndex(df)).to_numpy()]
+            matched_count += len(df)
+            if collected < limit and not df.empty:
+                matched_frames.append(df.iloc[:limit - collected])
+                collected += len(matched_frames[-1])
+
+    if not matched_frames:
+        return pd.DataFrame(columns=LOG_COLUMNS), matched_count
+    return pd.concat(matched_frames, ignore_index=True)[LOG_COLUMNS], matched_count
+
+
+def search_log_database(db_path, start=None, end=None, filters=None, limit=DEFAULT_RESULT_LIMIT_PER_SOURCE):
+    """大容量モードのデータベースを検索する。戻り値は search_log_file と同じ形式。"""
+    matched_count = sql_backend.count_logs(db_path, start, end, filters)
+    return sql_backend.fetch_logs(db_path, start, end, filters, limit=limit), matched_count
+
+
+def _run_search_task(kind, path, start, end, filters, limit):
+    if kind == "database":
+        return search_log_database(path, start, end, filters, limit)
+    return search_log_file(path, start, end, filters, limit)
+
+
+def _sort_keys(timestamps):
+    """タイムスタンプを統合順の比較に使う int64 (UTC の ns、タイムゾーンなしは現地時刻のまま) に変換する。"""
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+    else:
+        timestamps = pd.to_datetime(timestamps, utc=True, errors="coerce").dt.tz_localize(None)
+    return timestamps.astype("int64")
+
+
+def label_search_result(df, archive, file_name):
+    """
+    1つの検索結果をタイムスタンプ順に並べ、Archive / File 列を付けて返す。
+    タイムゾーンの異なる結果同士を1つの表にまとめるため、Timestamp は ISO8601 の文字列にする。
+    """
+    df = df.reset_index(drop=True)
+    sort_keys = _sort_keys(df["Timestamp"])
+    order = sort_keys.argsort(kind="stable").to_numpy()
+    df = df.iloc[order].reset_index(drop=True)
+    labeled = pd.DataFrame({
+        "Timestamp": df["Timestamp"].map(lambda t: t.isoformat() if pd.notna(t) else "").astype("string[pyarrow]"),
+        "Archive": pd.Series([archive] * len(df), dtype="string[pyarrow]"),
+        "File": pd.Series([file_name] * len(df), dtype="string[pyarrow]"),
+    })
+    for col in LOG_COLUMNS[1:]:
+        labeled[col] = df[col].array
+    labeled["_sort_key"] = sort_keys.to_numpy()[order]
+    return labeled
+
+
+def merge_search_results(results):
+    """
+    タスクごとのタイムスタンプ順に並んだ結果 (label_search_result) のリストを1つに統合する。
+    連結して1回の安定ソートで並べる (統合済みの結果と新しい結果を渡して途中経過を作り直すこともできる)。
+    None や空の結果は無視し、結果が無い場合は None を返す。
+    """
+    results = [result for result in results if result is not None and not result.empty]
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+    combined = pd.concat(results, ignore_index=True)
+    return combined.sort_values("_sort_key", kind="stable", ignore_index=True)
+
+
+def finalize_search_result(merged):
+    """統合用の内部列を取り除いた、表示・ダウンロード用の DataFrame を返す。"""
+    if merged is None:
+        return pd.DataFrame(columns=["Timestamp"] + SOURCE_COLUMNS + LOG_COLUMNS[1:])
+    return merged.drop(columns="_sort_key")
+
+
+def fan_out_search(tasks, start=None, end=None, filters=None, limit=DEFAULT_RESULT_LIMIT_PER_SOURCE, max_workers=None):
+    """
+    検索タスクをワーカープロセスのプールで並列に実行し、完了したものから
+    (タスク, ラベル付きの結果, 一致した総件数) を返すジェネレータ。
+    失敗したタスクは結果の代わりに例外オブジェクトを返す。
+    """
+    if not tasks:
+        return
+    max_workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+    # Streamlit のサーバーはスレッドを使うため、fork ではなく spawn でワーカーを起動する
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(_run_search_task, kind, path, start, end, filters, limit): (archive, file_name, kind, path)
+            for archive, file_name, kind, path in tasks
+        }
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                df, matched_count = future.result()
+            except Exception as e:
+                yield task, e, 0
+                continue
+            yield task, label_search_result(df, task[0], task[1]), matched_count
@@ -0,0 +1,118 @@
+# src/utils/run_length.py
+# 連続する同一メッセージ (同じ Hostname / AppName / PID / Message が続く行) を1行にまとめる
+# ランレングス圧縮。まとめた行は件数 (Count)、最後の時刻 (LastTimestamp) と、
+# 各行の時刻の一覧 (RunTimestamps、Arrow のリスト型) を持つため、元の行に正確に展開できる。
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+COUNT_COLUMN = "Count"
+LAST_TIMESTAMP_COLUMN = "LastTimestamp"
+RUN_TIMESTAMPS_COLUMN = "RunTimestamps"
+
+# この列の値が全て前の行と同じ場合に、同じ連続 (ラン) とみなす
+RUN_KEY_COLUMNS = ["Hostname", "AppName", "PID", "Message"]
+
+# まとめた行に追加される列 (表示・出力の対象は RunTimestamps 以外)
+COLLAPSED_COLUMNS = [COUNT_COLUMN, LAST_TIMESTAMP_COLUMN, RUN_TIMESTAMPS_COLUMN]
+
+
+def is_collapsed(df):
+    """DataFrame が collapse_repeated_rows でまとめられたものかどうかを返す。"""
+    return df is not None and RUN_TIMESTAMPS_COLUMN in df.columns
+
+
+def expanded_row_count(df):
+    """まとめる前の行数を返す (まとめていない DataFrame ではそのままの行数)。"""
+    if is_collapsed(df):
+        return int(df[COUNT_COLUMN].sum())
+    return len(df)
+
+
+def _run_starts(df):
+    """各ランの先頭行の位置を返す。欠損値同士は同じ値として比較する。"""
+    boundary = np.zeros(len(df), dtype=bool)
+    boundary[0] = True
+    for col in RUN_KEY_COLUMNS:
+        if col not in df.columns:
+            continue
+        codes, _ = pd.factorize(df[col], use_na_sentinel=True)
+        boundary[1:] |= codes[1:] != codes[:-1]
+    return np.flatnonzero(boundary)
+
+
+def _build_collapsed(first_rows, timestamps, offsets, tz):
+    """ランごとの先頭行と、時刻の配列 (Arrow) とランの区切り位置からまとめた DataFrame を作る。"""
+    counts = np.diff(offsets)
+    collapsed = first_rows.reset_index(drop=True)
+    local = pd.Series(timestamps.to_pandas())
+    if tz is not None:
+        local = local.dt.tz_convert(tz)
+    collapsed["Timestamp"] = local.iloc[offsets[:-1]].reset_index(drop=True)
+    collapsed[COUNT_COLUMN] = counts
+    collapsed[LAST_TIMESTAMP_COLUMN] = local.iloc[offsets[1:] - 1].reset_index(drop=True)
+    run_timestamps = pa.LargeListArray.from_arrays(pa.array(offsets, type=pa.int64()), timestamps)
+    collapsed[RUN_TIMESTAMPS_COLUMN] = pd.arrays.ArrowExtensionArray(run_timestamps)
+    return collapsed
+
+
+def collapse_repeated_rows(df):
+    """
+    連続する同一メッセージの行を1行にまとめた DataFrame を返す。Timestamp はランの最初の時刻。
+    Timestamp が日時型でない場合 (タイムゾーンの混在など) はまとめずにそのまま返す。
+    """
+    if df.empty or is_collapsed(df) or not pd.api.types.is_datetime64_any_dtype(df["Timestamp"]):
+        return df
+    run_starts = _run_starts(df)
+    offsets = np.append(run_starts, len(df)).astype(np.int64)
+    timestamps = pa.array(df["Timestamp"])
+    return _build_collapsed(df.iloc[run_starts], timestamps, offsets, df["Timestamp"].dt.tz)
+
+
+def _run_timestamps_array(df):
+    return pa.array(df[RUN_TIMESTAMPS_COLUMN].array)
+
+
+def expand_collapsed_rows(df):
+    """まとめた行を元の行 (LOG_COLUMNS と同じ列) に展開する。まとめていない場合はそのまま返す。"""
+    if not is_collapsed(df):
+        return df
+    run_timestamps = _run_timestamps_array(df)
+    parents = pc.list_parent_indices(run_timestamps).to_numpy()
+    expanded = df.drop(columns=COLLAPSED_COLUMNS).iloc[parents].reset_index(drop=True)
+    timestamps = pd.Series(pc.list_flatten(run_timestamps).to_pandas())
+    tz = df["Timestamp"].dt.tz
+    expanded["Timestamp"] = timestamps.dt.tz_convert(tz) if tz is not None else timestamps
+    return expanded
+
+
+def filter_collapsed_by_time_range(df, start=None, end=None):
+    """
+    まとめた DataFrame を現地時刻 (タイムゾーンなし) の start / end で絞り込む。
+    範囲の境界をまたぐランは範囲内の時刻だけを残し、件数と最初/最後の時刻を数え直すため、
+    展開してから絞り込んだ場合と同じ結果になる。
+    """
+    if df.empty or (start is None and end is None):
+        return df
+    run_timestamps = _run_timestamps_array(df)
+    flat = pc.list_flatten(run_timestamps)
+    parents = pc.list_parent_indices(run_timestamps).to_numpy()
+    local = pd.Series(flat.to_pandas())
+    if local.dt.tz is not None:
+        local = local.dt.tz_localize(None)
+    mask = np.ones(len(local), dtype=bool)
+    if start is not None:
+        mask &= (local >= start).to_numpy()
+    if end is not None:
+        mask &= (local <= end).to_numpy()
+
+    counts = np.bincount(parents[mask], minlength=len(df))
+    kept_runs = np.flatnonzero(counts > 0)
+    offsets = np.append(0, np.cumsum(counts[kept_runs])).astype(np.int64)
+    return _build_collapsed(
+        df.drop(columns=COLLAPSED_COLUMNS).iloc[kept_runs],
+        flat.filter(pa.array(mask)),
+        offsets,
+        df["Timestamp"].dt.tz,
+    )
@@ -0,0 +1,248 @@
+# src/utils/sketches.py
+# ログ全体の上位の値や異なり数を、データ量によらない一定のメモリで集計する確率的データ構造。
+# 取り込み時にチャンクごとに更新でき、全件に対する groupby を行わずにサマリーを表示できる。
+import numpy as np
+import pandas as pd
+
+# サマリーを更新する1チャンクあたりの行数
+SUMMARY_CHUNK_ROWS = 65536
+
+# サマリーの対象列
+SUMMARY_TOP_COLUMNS = ["Hostname", "AppName", "Message"]
+SUMMARY_DISTINCT_COLUMNS = ["Hostname", "AppName", "PID", "Message"]
+
+
+def hash_values(values, weights=None):
+    """
+    値の配列を64bitのハッシュ値 (uint64) の配列に変換する。欠損値は除外する。
+    weights (各値の件数) を指定した場合は、欠損値を除いた件数の配列もあわせて返す。
+    """
+    series = pd.Series(values, dtype=object)
+    present = series.notna().to_numpy()
+    series = series[present].astype(str)
+    hashes = pd.util.hash_array(series.to_numpy(dtype=object))
+    if weights is None:
+        return hashes, series.to_numpy(dtype=object)
+    return hashes, series.to_numpy(dtype=object), np.asarray(weights, dtype=np.int64)[present]
+
+
+def _bit_length(values):
+    """uint64 配列の各要素のビット長を求める (浮動小数点を使わない厳密な計算)。"""
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values >= np.uint64(1 << shift)
+        lengths[mask] += shift
+        values[mask] >>= np.uint64(shift)
+    lengths += (values > 0)
+    return lengths
+
+
+class CountMinSketch:
+    """
+    Count-Min Sketch。任意の値の出現回数を過大側の誤差つきで推定する。
+    誤差は高い確率で総件数の約 e / width 倍以内に収まる。
+    """
+
+    def __init__(self, width=16384, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _indexes(self, hashes):
+        # 64bitハッシュの上位/下位32bitから depth 個のハッシュ関数を合成する
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        high = (hashes >> np.uint64(32)).astype(np.int64)
+        return [(low + i * high) % self.width for i in range(self.depth)]
+
+    def update(self, hashes, counts=None):
+        if counts is None:
+            counts = np.ones(len(hashes), dtype=np.int64)
+        for row, index in enumerate(self._indexes(hashes)):
+            self.table[row] += np.bincount(index, weights=counts, minlength=self.width).astype(np.int64)
+
+    def estimate(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        return np.min([self.table[row][index] for row, index in enumerate(self._indexes(hashes))], axis=0)
+
+    def merge(self, other):
+        """同じ大きさの other の件数を加える (別々に集計したチャンクの結果をまとめる)。"""
+        if self.table.shape != other.table.shape:
+            raise ValueError("width と depth が同じ Count-Min Sketch のみマージできます。")
+        self.table += other.table
+
+
+class SpaceSaving:
+    """
+    Space-Saving (マージ可能な形式) による上位N件 (heavy hitters) の追跡。
+    capacity 個のカウンタのみを保持し、チャンク単位でまとめて更新する。
+    カウンタが溢れた場合は (capacity + 1) 番目の件数を全カウンタから差し引いて
+    正のものだけを残すため、各値の真の件数は [count, count + error_bound] の範囲にあり、
+    error_bound は総件数 / (capacity + 1) を超えない。
+    """
+
+    def __init__(self, capacity=200):
+        self.capacity = capacity
+        self.counters = {} # ハッシュ値 -> [代表値, 件数]
+        self.error_bound = 0
+
+    def _truncate(self, hashes, counts):
+        """件数の多い capacity 件を残し、(capacity + 1) 番目の件数を差し引く。"""
+        if len(counts) <= self.capacity:
+            return hashes, counts, 0
+        order = np.argpartition(-counts, self.capacity)
+        threshold = int(counts[order[self.capacity]])
+        kept = order[:self.capacity]
+        kept = kept[counts[kept] > threshold]
+        return hashes[kept], counts[kept] - threshold, threshold
+
+    def update(self, hashes, values, weights=None):
+        if len(hashes) == 0:
+            return
+        unique_hashes, first_index, inverse, counts = np.unique(hashes, return_index=True, return_inverse=True, return_counts=True)
+        if weights is not None:
+            counts = np.bincount(inverse, weights=weights, minlength=len(unique_hashes)).astype(np.int64)
+        # チャンク自体を先に capacity 件の要約にしてから既存の要約とマージする
+        positions = np.arange(len(unique_hashes))
+        kept_positions, counts, dropped = self._truncate(positions, counts)
+        self.error_bound += dropped
+
+        for position, count in zip(kept_positions.tolist(), counts.tolist()):
+            h = int(unique_hashes[position])
+            counter = self.counters.get(h)
+            if counter is not None:
+                counter[1] += count
+            else:
+                self.counters[h] = [values[first_index[position]], count]
+
+        self._shrink()
+
+    def _shrink(self):
+        """カウンタが capacity 個を超えていれば capacity 個以下に減らす。"""
+        if len(self.counters) > self.capacity:
+            merged_hashes = np.fromiter(self.counters.keys(), dtype=np.uint64, count=len(self.counters))
+            merged_counts = np.fromiter((c[1] for c in self.counters.values()), dtype=np.int64, count=len(self.counters))
+            kept_hashes, kept_counts, dropped = self._truncate(merged_hashes, merged_counts)
+            self.error_bound += dropped
+            self.counters = {
+                h: [self.counters[h][0], count]
+                for h, count in zip(kept_hashes.tolist(), kept_counts.tolist())
+            }
+
+    def merge(self, other):
+        """
+        other のカウンタを加える。同じ値の件数は足し合わせ、誤差の上限は両方の和になる。
+        capacity を超えた場合は update と同じく (capacity + 1) 番目の件数を差し引く。
+        """
+        for h, (value, count) in other.counters.items():
+            counter = self.counters.get(h)
+            if counter is not None:
+                counter[1] += count
+            else:
+                self.counters[h] = [value, count]
+        self.error_bound += other.error_bound
+        self._shrink()
+
+    def top(self, n):
+        """件数の多い順に (ハッシュ値, 代表値, 件数) のリストを返す。"""
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][1], reverse=True)[:n]
+        return [(h, value, count) for h, (value, count) in ranked]
+
+
+class HyperLogLog:
+    """HyperLogLog による異なり数の推定。2 ** precision 個のレジスタ (各1バイト) のみを使う。"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        register_index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining_bits = 64 - self.precision
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+        rank = (remaining_bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, register_index, rank)
+
+    def merge(self, other):
+        """other のレジスタと要素ごとの最大値をとる (和集合の異なり数になる)。"""
+        if len(self.registers) != len(other.registers):
+            raise ValueError("precision が同じ HyperLogLog のみマージできます。")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zero_registers = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zero_registers > 0:
+            # 少数の場合は線形カウンティングで補正する
+            estimate = m * np.log(m / zero_registers)
+        return int(round(estimate))
+
+
+class LogSummary:
+    """
+    ログの DataFrame に対するサマリー (列ごとの上位の値と異なり数)。
+    update() をチャンクごとに呼び出すことで取り込みと並行して更新できる。
+    weights (行ごとの件数、連続する同一メッセージをまとめた行の Count など) を
+    指定すると、各行をその件数分の行として集計する。
+    """
+
+    def __init__(self, top_capacity=200):
+        self.total_rows = 0
+        self.top = {col: SpaceSaving(top_capacity) for col in SUMMARY_TOP_COLUMNS}
+        self.frequency = {col: CountMinSketch() for col in SUMMARY_TOP_COLUMNS}
+        self.distinct = {col: HyperLogLog() for col in SUMMARY_DISTINCT_COLUMNS}
+
+    @classmethod
+    def from_frame(cls, df, weights=None):
+        summary = cls()
+        summary.update(df, weights)
+        return summary
+
+    def update(self, df, weights=None):
+        for start in range(0, len(df), SUMMARY_CHUNK_ROWS):
+            chunk = df.iloc[start:start + SUMMARY_CHUNK_ROWS]
+            chunk_weights = None if weights is None else np.asarray(weights, dtype=np.int64)[start:start + SUMMARY_CHUNK_ROWS]
+            self.total_rows += len(chunk) if chunk_weights is None else int(chunk_weights.sum())
+            for col in set(SUMMARY_TOP_COLUMNS) | set(SUMMARY_DISTINCT_COLUMNS):
+                if col not in chunk.columns:
+                    continue
+                if chunk_weights is None:
+                    hashes, values = hash_values(chunk[col])
+                    counts = None
+                else:
+                    hashes, values, counts = hash_values(chunk[col], chunk_weights)
+                if col in self.top:
+                    self.top[col].update(hashes, values, counts)
+                    self.frequency[col].update(hashes, counts)
+                if col in self.distinct:
+                    self.distinct[col].update(hashes)
+
+    def merge(self, other):
+        """別に集計した LogSummary (同じ設定のもの) を加える。"""
+        self.total_rows += other.total_rows
+        for col in SUMMARY_TOP_COLUMNS:
+            self.top[col].merge(other.top[col])
+            self.frequency[col].merge(other.frequency[col])
+        for col in SUMMARY_DISTINCT_COLUMNS:
+            self.distinct[col].merge(other.distinct[col])
+
+    def top_values(self, column, n=10):
+        """
+        column の上位 n 件を DataFrame で返す。順位は Space-Saving、件数は
+        Space-Saving の上限 (件数 + 誤差上限) と Count-Min の推定値の小さい方を使う。
+        """
+        top = self.top[column].top(n)
+        if not top:
+            return pd.DataFrame(columns=[column, "推定件数"])
+        hashes = np.array([h for h, _, _ in top], dtype=np.uint64)
+        upper_bounds = np.array([count + self.top[column].error_bound for _, _, count in top])
+        estimates = np.minimum(upper_bounds, self.frequency[column].estimate(hashes))
+        return pd.DataFrame({column: [value for _, value, _ in top], "推定件数": estimates})
+
+    def distinct_count(self, column):
+        return self.distinct[column].count()
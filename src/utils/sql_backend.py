@@ -0,0 +1,210 @@
+# src/utils/sql_backend.py
+# メモリに載らない大きさのログを扱うための、SQLite (FTS5) によるディスク上のバックエンド。
+# 日時範囲とキーワード (AND/OR, ワイルドカード) の条件をSQLに変換してディスク上で評価し、
+# 結果のうち表示する分だけを pandas の DataFrame として取り出す。
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from .field_extraction import parse_field_condition
+from .glob_match import compile_glob
+from .log_parser_utils import LOG_COLUMNS, LOCAL_TIMESTAMP_FORMAT, TEXT_COLUMNS, TEXT_DTYPE, format_local_timestamps, iso8601_to_datetime
+
+DATABASE_FILE_NAME = "logs.sqlite3"
+
+# ディスクに書き込む前にパースする1チャンクあたりの行数
+INGEST_CHUNK_LINES = 100000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    ts_local TEXT,
+    utc_offset TEXT,
+    Hostname TEXT,
+    AppName TEXT,
+    PID TEXT,
+    Message TEXT,
+    -- キーワード検索の対象 (existing_filter_page の検索対象の列と同じ並び)
+    search_text TEXT GENERATED ALWAYS AS (
+        IFNULL(ts_local, '') || ' ' || IFNULL(Hostname, '') || ' ' || IFNULL(AppName, '') || ' ' ||
+        IFNULL(PID, '') || ' ' || IFNULL(Message, '')
+    ) VIRTUAL
+);
+CREATE INDEX IF NOT EXISTS logs_ts_local ON logs (ts_local);
+-- 部分一致 (LIKE '%...%') を索引で絞り込むための trigram 全文検索インデックス
+CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+    search_text, content='logs', content_rowid='id', tokenize='trigram'
+);
+"""
+
+
+def _wildcard_match(keyword, text):
+    """SQLite から呼び出す、ワイルドカードキーワードの厳密な一致判定 (大文字小文字を区別しない)。"""
+    return 1 if compile_glob(keyword).match(text) else 0
+
+
+def _field_match(keyword, message):
+    """SQLite から呼び出す、フィールドの比較条件 (field:status>=500 など) の判定。"""
+    condition = parse_field_condition(keyword)
+    return 1 if condition is not None and condition.match_text(message) else 0
+
+
+def connect(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.create_function("wildcard_match", 2, _wildcard_match, deterministic=True)
+    connection.create_function("field_match", 2, _field_match, deterministic=True)
+    return connection
+
+
+def create_database(db_path):
+    """ログ格納用のデータベースを作成 (既存の場合は中身を空に) して接続を返す。"""
+    connection = connect(db_path)
+    # 一時ディレクトリ上の作業用データベースのため、耐障害性より書き込み速度を優先する
+    connection.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;")
+    connection.executescript("DROP TABLE IF EXISTS logs_fts; DROP TABLE IF EXISTS logs;")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _format_utc_offsets(timestamps):
+    """タイムスタンプの Series から '+09:00' 形式のUTCオフセットのリストを作る (タイムゾーンなしは None)。"""
+    def _format(offset):
+        if offset is None:
+            return None
+        total_minutes = int(offset.total_seconds() // 60)
+        sign = '-' if total_minutes < 0 else '+'
+        return f"{sign}{abs(total_minutes) // 60:02d}:{abs(total_minutes) % 60:02d}"
+
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        tz = timestamps.dt.tz
+        if tz is None:
+            return [None] * len(timestamps)
+        fixed_offset = tz.utcoffset(None)
+        if fixed_offset is not None:
+            return [_format(fixed_offset)] * len(timestamps)
+    return [_format(t.utcoffset()) if isinstance(t, datetime) else None for t in timestamps]
+
+
+def _nullable_list(series):
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def insert_log_frame(connection, df):
+    """パース済みの DataFrame (LOG_COLUMNS) をデータベースに追加する。"""
+    if df.empty:
+        return
+    rows = zip(
+        format_local_timestamps(df["Timestamp"]).to_pylist(),
+        _format_utc_offsets(df["Timestamp"]),
+        *(_nullable_list(df[col]) for col in TEXT_COLUMNS),
+    )
+    connection.executemany(
+        "INSERT INTO logs (ts_local, utc_offset, Hostname, AppName, PID, Message) VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def finalize_database(connection):
+    """全件の追加後に全文検索インデックスを構築し、変更を確定する。"""
+    connection.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+    connection.commit()
+
+
+def get_row_count(db_path):
+    with closing(connect(db_path)) as connection:
+        return connection.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+
+def get_time_bounds(db_path):
+    """格納されたログの最初と最後の時刻 (現地時刻、タイムゾーンなし) を返す。"""
+    with closing(connect(db_path)) as connection:
+        min_ts, max_ts = connection.execute("SELECT MIN(ts_local), MAX(ts_local) FROM logs").fetchone()
+    try:
+        return datetime.fromisoformat(min_ts), datetime.fromisoformat(max_ts)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def _keyword_condition(keyword):
+    """
+    1つのキーワードを条件式に変換する。trigram インデックスで LIKE により候補を絞り込み、
+    LIKE の特殊文字 (% と _) を含むキーワードは wildcard_match で厳密に判定し直す。
+    フィールドの比較条件 (field:status>=500 など) は、フィールド名を含む行を LIKE で絞り込んでから
+    field_match で判定する。
+    """
+    field_condition = parse_field_condition(keyword)
+    if field_condition is not None:
+        like_pattern = '%' + field_condition.field + '%'
+        condition = "id IN (SELECT rowid FROM logs_fts WHERE search_text LIKE ?) AND field_match(?, Message)"
+        return f"({condition})", [like_pattern, keyword]
+    like_pattern = '%' + keyword.replace('*', '%').replace('?', '_') + '%'
+    condition = "id IN (SELECT rowid FROM logs_fts WHERE search_text LIKE ?)"
+    params = [like_pattern]
+    if '%' in keyword or '_' in keyword:
+        condition = f"({condition} AND wildcard_match(?, search_text))"
+        params.append(keyword)
+    return condition, params
+
+
+def build_where_clause(start=None, end=None, filters=None):
+    """
+    日時範囲と、existing_filter_page と同じ形式のキーワード条件
+    ([{"keyword": ..., "operator": "AND" | "OR"}, ...]) を WHERE 句とパラメータに変換する。
+    キーワード条件はページと同じく先頭から順に左結合で評価する。
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("ts_local >= ?")
+        params.append(start.strftime(LOCAL_TIMESTAMP_FORMAT))
+    if end is not None:
+        clauses.append("ts_local <= ?")
+        params.append(end.strftime(LOCAL_TIMESTAMP_FORMAT))
+
+    if filters:
+        first_keyword = filters[0]["keyword"].strip()
+        if first_keyword:
+            keyword_expr, keyword_params = _keyword_condition(first_keyword)
+        else:
+            keyword_expr, keyword_params = "1", []
+        for condition in filters[1:]:
+            keyword = condition["keyword"].strip()
+            if not keyword or condition["operator"] not in ("AND", "OR"):
+                continue
+            expr, expr_params = _keyword_condition(keyword)
+            keyword_expr = f"({keyword_expr}) {condition['operator']} {expr}"
+            keyword_params += expr_params
+        if keyword_expr != "1":
+            clauses.append(f"({keyword_expr})")
+            params += keyword_params
+
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def count_logs(db_path, start=None, end=None, filters=None):
+    where, params = build_where_clause(start, end, filters)
+    with closing(connect(db_path)) as connection:
+        return connection.execute(f"SELECT COUNT(*) FROM logs{where}", params).fetchone()[0]
+
+
+def fetch_logs(db_path, start=None, end=None, filters=None, limit=1000, from_end=False):
+    """
+    条件に一致するログのうち limit 件を DataFrame (LOG_COLUMNS) で返す。
+    from_end が真の場合は末尾の limit 件を返す (並びは元の順序のまま)。
+    """
+    where, params = build_where_clause(start, end, filters)
+    order = "DESC" if from_end else "ASC"
+    query = (
+        f"SELECT ts_local || IFNULL(utc_offset, '') AS Timestamp, Hostname, AppName, PID, Message "
+        f"FROM logs{where} ORDER BY id {order} LIMIT ?"
+    )
+    with closing(connect(db_path)) as connection:
+        df = pd.read_sql_query(query, connection, params=params + [int(limit)])
+    if from_end:
+        df = df.iloc[::-1].reset_index(drop=True)
+    if not df.empty:
+        df["Timestamp"] = iso8601_to_datetime(df["Timestamp"])
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].astype(TEXT_DTYPE)
+    return df[LOG_COLUMNS]
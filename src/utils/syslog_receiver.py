@@ -0,0 +1,373 @@
+# src/utils/syslog_receiver.py
+# ネットワーク経由で送られてくる Syslog を受信するライブ取り込み機能。
+# asyncio の UDP/TCP リスナーをバックグラウンドのスレッドで動かし、受信したメッセージを
+# parse_syslog_line と同じパーサーでパースして、件数とバイト数に上限のある列指向 (Arrow) のリングバッファに保持する。
+# バッファの内容は通常のログと同じ列 (LOG_COLUMNS) の DataFrame として取り出せる。
+import asyncio
+import socket
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .log_parser_utils import LOG_COLUMNS, LOG_FORMATS, TEXT_COLUMNS, parse_syslog_line
+
+DEFAULT_RECEIVER_HOST = "127.0.0.1"
+DEFAULT_RECEIVER_PORT = 5514
+DEFAULT_BUFFER_MESSAGES = 200000
+DEFAULT_BUFFER_BYTES = 64 * 1024 * 1024
+
+# 受信したメッセージをまとめてパースしてバッファに追加する間隔 (秒) と、すぐにパースを始める件数
+FLUSH_INTERVAL_SECONDS = 0.05
+FLUSH_BATCH_MESSAGES = 4096
+
+# パース待ちのメッセージの上限。パースが受信に追いつかない場合は、超えた分を古いものから捨てて
+# dropped に数える (リングバッファと同じく、メモリの使用量を一定に抑えて直近のメッセージを残す)
+MAX_PENDING_MESSAGES = 100000
+MAX_PENDING_BYTES = 16 * 1024 * 1024
+
+# UDP の受信バッファ (パースが一時的に追いつかない間のバーストを取りこぼさないように大きく取る)
+UDP_RECEIVE_BUFFER_BYTES = 16 * 1024 * 1024
+TCP_READ_CHUNK_BYTES = 256 * 1024
+
+# TCP で受信する1メッセージの最大バイト数。改行が届かないまま超えた分は次の改行まで読み捨てる
+MAX_TCP_FRAME_BYTES = 64 * 1024
+
+# タイムゾーンを持たないタイムスタンプ (BSD形式など) の UTC オフセット欄の値
+NAIVE_OFFSET = np.iinfo(np.int16).min
+
+_EPOCH = datetime(1970, 1, 1)
+
+_BUFFER_SCHEMA = pa.schema(
+    [("timestamp", pa.int64()), ("utc_offset", pa.int16())] + [(col, pa.string()) for col in TEXT_COLUMNS]
+)
+
+
+class ColumnarRingBuffer:
+    """
+    直近 max_messages 件、かつ合計 max_bytes バイト以内のメッセージを保持する列指向のリングバッファ。
+    パースしたバッチごとに Arrow の RecordBatch (文字列は値を連結したバッファとオフセットの配列) として
+    保持し、溢れた分は古いバッチから捨てる (最も古いバッチは先頭を切り詰める)。
+    追加 (受信スレッド) と取り出し (Streamlit のスレッド) はロックで排他する。
+    """
+
+    def __init__(self, max_messages=DEFAULT_BUFFER_MESSAGES, max_bytes=DEFAULT_BUFFER_BYTES):
+        self.capacity = int(max_messages)
+        self.max_bytes = int(max_bytes)
+        # [(RecordBatch, 各メッセージの受信時のバイト数の配列), ...] (古い順)
+        self.batches = deque()
+        self.length = 0
+        self.total_bytes = 0
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+    def _evict(self, count):
+        """古い方から count 件を捨てる。"""
+        while count > 0 and self.batches:
+            batch, sizes = self.batches[0]
+            dropped = min(count, len(sizes))
+            if dropped == len(sizes):
+                self.batches.popleft()
+            else:
+                self.batches[0] = (batch.slice(dropped), sizes[dropped:])
+            self.total_bytes -= int(sizes[:dropped].sum())
+            self.length -= dropped
+            self.evicted += dropped
+            count -= dropped
+
+    def _evict_bytes(self, excess):
+        """合計バイト数が excess 以上減るまで、古い方から捨てる。"""
+        count = 0
+        for _, sizes in self.batches:
+            freed = np.cumsum(sizes)
+            if freed[-1] >= excess:
+                count += int(np.searchsorted(freed, excess)) + 1
+                break
+            count += len(sizes)
+            excess -= int(freed[-1])
+        self._evict(count)
+
+    def append_batch(self, timestamps, utc_offsets, sizes, text_columns):
+        """パース済みのメッセージ (列ごとの配列) をまとめて追加する。"""
+        count = len(timestamps)
+        if count == 0:
+            return
+        sizes = np.asarray(sizes, dtype=np.int64)
+        # バッチ自体が上限を超える場合は、バッチの新しい側だけを残す
+        keep_from = max(0, count - self.capacity)
+        batch_bytes = np.cumsum(sizes[::-1])[::-1] # 各位置から末尾までの合計バイト数
+        keep_from = max(keep_from, int(np.searchsorted(-batch_bytes, -self.max_bytes)))
+        if keep_from == count:
+            with self.lock:
+                self.evicted += count
+            return
+        batch = pa.RecordBatch.from_arrays(
+            [
+                pa.array(np.asarray(timestamps, dtype=np.int64)[keep_from:], type=pa.int64()),
+                pa.array(np.asarray(utc_offsets, dtype=np.int16)[keep_from:], type=pa.int16()),
+            ] + [pa.array(text_columns[col][keep_from:], type=pa.string()) for col in TEXT_COLUMNS],
+            names=["timestamp", "utc_offset"] + TEXT_COLUMNS,
+        )
+        sizes = sizes[keep_from:]
+        new_bytes = int(batch_bytes[keep_from])
+        with self.lock:
+            self.evicted += keep_from
+            count -= keep_from
+            # 件数の上限と、バイト数の上限を超える分を古い方から捨てる
+            self._evict(self.length + count - self.capacity)
+            if self.total_bytes + new_bytes > self.max_bytes:
+                self._evict_bytes(self.total_bytes + new_bytes - self.max_bytes)
+            self.batches.append((batch, sizes))
+            self.length += count
+            self.total_bytes += new_bytes
+
+    def to_frame(self):
+        """バッファの内容を受信順の DataFrame (LOG_COLUMNS) として返す。"""
+        with self.lock:
+            batches = [batch for batch, _ in self.batches]
+        table = pa.Table.from_batches(batches, schema=_BUFFER_SCHEMA)
+
+        df = pd.DataFrame({"Timestamp": _to_timestamp_series(
+            table.column("timestamp").to_numpy(),
+            table.column("utc_offset").to_numpy(),
+        )})
+        for col in TEXT_COLUMNS:
+            df[col] = pd.Series(pd.arrays.ArrowStringArray(table.column(col)))
+        return df[LOG_COLUMNS]
+
+
+def _to_timestamp_series(timestamps, utc_offsets):
+    """
+    現地時刻 (ns) と UTC オフセットの配列から Timestamp 列を作る。オフセットが全て同じなら
+    ファイルから読み込んだ場合と同じ固定オフセットのタイムゾーン、混在していれば UTC にそろえる
+    (その場合、タイムゾーンを持たないタイムスタンプは UTC とみなす)。
+    """
+    local = pd.Series(timestamps.astype("datetime64[ns]"))
+    if len(utc_offsets) == 0 or (utc_offsets == NAIVE_OFFSET).all():
+        return local
+    unique_offsets = np.unique(utc_offsets)
+    if len(unique_offsets) == 1:
+        return local.dt.tz_localize(timezone(timedelta(minutes=int(unique_offsets[0]))))
+    offsets = np.where(utc_offsets == NAIVE_OFFSET, 0, utc_offsets).astype(np.int64)
+    utc = timestamps - offsets * 60 * 1_000_000_000
+    return pd.Series(utc.astype("datetime64[ns]")).dt.tz_localize("UTC")
+
+
+class SyslogReceiver:
+    """
+    UDP/TCP で Syslog を受信してリングバッファに格納するリスナー。
+    start() でバックグラウンドのスレッドにイベントループを起動し、stop() で停止する。
+    受信 (イベントループ) とパースは別のスレッドで行い、パース中もソケットからの
+    読み出しが止まらないようにしている (UDP の受信バッファ溢れによる取りこぼし対策)。
+    """
+
+    def __init__(self, host=DEFAULT_RECEIVER_HOST, port=DEFAULT_RECEIVER_PORT, protocols=("udp", "tcp"),
+                 max_messages=DEFAULT_BUFFER_MESSAGES, max_bytes=DEFAULT_BUFFER_BYTES):
+        self.host = host
+        self.port = int(port)
+        self.protocols = tuple(protocols)
+        self.buffer = ColumnarRingBuffer(max_messages, max_bytes)
+        self.received = 0
+        self.parsed = 0
+        self.unparsed = 0
+        self.dropped = 0
+        self.last_format = None
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_lock = threading.Lock()
+        self._pending_ready = threading.Event()
+        self._stopping = threading.Event()
+        self._loop = None
+        self._thread = None
+        self._parser_thread = None
+        self._closers = []
+        self._started = threading.Event()
+        self._start_error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """リスナーを起動する。ポートを開けなかった場合は OSError を送出する。"""
+        if self.running:
+            return
+        self._started.clear()
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run_loop, name=f"syslog-receiver-{self.port}", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._start_error
+        self._stopping.clear()
+        self._parser_thread = threading.Thread(target=self._run_parser, name=f"syslog-parser-{self.port}", daemon=True)
+        self._parser_thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._stopping.set()
+        self._pending_ready.set()
+        self._parser_thread.join()
+        self._parser_thread = None
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "parsed": self.parsed,
+            "unparsed": self.unparsed,
+            "dropped": self.dropped,
+            "buffered": self.buffer.length,
+            "buffered_bytes": self.buffer.total_bytes,
+            "evicted": self.buffer.evicted,
+        }
+
+    def to_frame(self):
+        return self.buffer.to_frame()
+
+    # --- 受信スレッド側の処理 ---
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._open_listeners())
+        except OSError as e:
+            self._start_error = e
+            self._started.set()
+            self._close_listeners()
+            return
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._close_listeners()
+
+    def _close_listeners(self):
+        for close in self._closers:
+            close()
+        self._closers = []
+        self._loop.run_until_complete(asyncio.sleep(0)) # close() のコールバックを処理させる
+        self._loop.close()
+
+    async def _open_listeners(self):
+        loop = asyncio.get_running_loop()
+        if "udp" in self.protocols:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._closers.append(sock.close)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER_BYTES)
+            sock.bind((self.host, self.port))
+            transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(self), sock=sock)
+            self._closers.append(transport.close)
+        if "tcp" in self.protocols:
+            server = await asyncio.start_server(self._handle_tcp, self.host, self.port, limit=TCP_READ_CHUNK_BYTES)
+            self._closers.append(server.close)
+
+    async def _handle_tcp(self, reader, writer):
+        # 改行区切りのフレーミング (RFC 6587 の non-transparent framing) として受信する。
+        # MAX_TCP_FRAME_BYTES を超えるメッセージは先頭の MAX_TCP_FRAME_BYTES バイトのみを残す
+        remainder = b""
+        discarding = False # 上限を超えたメッセージの残りを次の改行まで読み捨てている間は True
+        try:
+            while True:
+                chunk = await reader.read(TCP_READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                lines = (remainder + chunk).split(b"\n")
+                remainder = lines.pop()
+                if discarding:
+                    if not lines:
+                        remainder = b""
+                        continue
+                    lines.pop(0)
+                    discarding = False
+                if len(remainder) > MAX_TCP_FRAME_BYTES:
+                    lines.append(remainder)
+                    remainder = b""
+                    discarding = True
+                self._enqueue([line[:MAX_TCP_FRAME_BYTES] for line in lines if line.strip()])
+        finally:
+            if remainder.strip() and not discarding:
+                self._enqueue([remainder[:MAX_TCP_FRAME_BYTES]])
+            writer.close()
+
+    def _enqueue(self, raw_messages):
+        if not raw_messages:
+            return
+        with self._pending_lock:
+            self._pending.extend(raw_messages)
+            self._pending_bytes += sum(map(len, raw_messages))
+            # 上限を超えた分は、まだパースしていないメッセージのうち古いものから捨てる
+            drop = max(len(self._pending) - MAX_PENDING_MESSAGES, 0)
+            dropped_bytes = sum(map(len, self._pending[:drop]))
+            while drop < len(self._pending) and self._pending_bytes - dropped_bytes > MAX_PENDING_BYTES:
+                dropped_bytes += len(self._pending[drop])
+                drop += 1
+            if drop:
+                del self._pending[:drop]
+                self._pending_bytes -= dropped_bytes
+                self.dropped += drop
+            pending_count = len(self._pending)
+        self.received += len(raw_messages)
+        if pending_count >= FLUSH_BATCH_MESSAGES:
+            self._pending_ready.set()
+
+    def _run_parser(self):
+        # FLUSH_INTERVAL_SECONDS ごと、または一定件数がたまった時点でまとめてパースする
+        while not self._stopping.is_set():
+            self._pending_ready.wait(FLUSH_INTERVAL_SECONDS)
+            self._pending_ready.clear()
+            self._flush()
+        self._flush()
+
+    def _parse(self, line):
+        # 直前に成功したフォーマットを先に試し、失敗した場合は全フォーマットを試す
+        if self.last_format is not None:
+            parsed = LOG_FORMATS[self.last_format]["parse_line"](line)
+            if parsed:
+                return parsed
+        for log_format in LOG_FORMATS:
+            parsed = parse_syslog_line(line, log_format)
+            if parsed:
+                self.last_format = log_format
+                return parsed
+        return None
+
+    def _flush(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            self._pending_bytes = 0
+        if not pending:
+            return
+        timestamps, utc_offsets, sizes = [], [], []
+        text_columns = {col: [] for col in TEXT_COLUMNS}
+        for raw in pending:
+            parsed = self._parse(raw.decode("utf-8", errors="ignore").rstrip("\r\n"))
+            if not parsed or not isinstance(parsed.get("Timestamp"), datetime):
+                self.unparsed += 1
+                continue
+            timestamp = parsed["Timestamp"]
+            offset = timestamp.utcoffset()
+            timestamps.append((timestamp.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1) * 1000)
+            utc_offsets.append(NAIVE_OFFSET if offset is None else offset // timedelta(minutes=1))
+            sizes.append(len(raw))
+            for col in TEXT_COLUMNS:
+                text_columns[col].append(parsed.get(col))
+        self.buffer.append_batch(timestamps, utc_offsets, sizes, text_columns)
+        self.parsed += len(timestamps)
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        # 1つのデータグラムに改行区切りで複数のメッセージが入っている場合にも対応する
+        self.receiver._enqueue([line for line in data.split(b"\n") if line.strip()])
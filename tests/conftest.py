@@ -0,0 +1,9 @@
+# tests/conftest.py
+# テストからプロジェクトのモジュール (src.utils ...) をインポートできるようにする。
+# 実行方法: python -m pytest -q (リポジトリのルートで実行)
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
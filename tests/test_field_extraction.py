@@ -0,0 +1,103 @@
+# tests/test_field_extraction.py
+import json
+
+import pandas as pd
+import pytest
+
+from src.utils.field_extraction import FieldIndex, parse_field_condition
+from src.utils.filter_utils import evaluate_keyword_filters
+from src.utils.log_parser_utils import TEXT_DTYPE
+
+MESSAGES = [
+    "GET /api status=500 latency_ms=1200ms user=alice",
+    "GET /api status=200 latency_ms=15ms user=bob",
+    'request done {"status": 503, "latency_ms": 80.5, "user": "Alice"}',
+    'request done {"status": "404", "user": "carol", "http_status": 200}',
+    "http_status=500 user=dave",
+    "no fields here",
+    "STATUS: 201 CPU=95% user='eve'",
+    json.dumps({"msg": "nested", "status": 502, "name": "x==y"}),
+    None,
+]
+
+
+def _frame(messages=MESSAGES):
+    return pd.DataFrame({"Message": pd.Series(messages, dtype=TEXT_DTYPE)})
+
+
+def _matches(keyword, messages=MESSAGES):
+    condition = parse_field_condition(keyword)
+    assert condition is not None, keyword
+    vectorized = FieldIndex(_frame(messages)).evaluate(condition).tolist()
+    assert vectorized == [condition.match_text(message) for message in messages], keyword
+    return [i for i, matched in enumerate(vectorized) if matched]
+
+
+@pytest.mark.parametrize("keyword, field, operator, value", [
+    ("field:status>=500", "status", ">=", "500"),
+    ("  FIELD: latency_ms < 1000 ", "latency_ms", "<", "1000"),
+    ("field:user==\"alice\"", "user", "==", "alice"),
+    ("field:user != 'bob'", "user", "!=", "bob"),
+    ("field:http.status-code>1", "http.status-code", ">", "1"),
+])
+def test_parse_field_condition(keyword, field, operator, value):
+    condition = parse_field_condition(keyword)
+    assert (condition.field, condition.operator, condition.value) == (field, operator, value)
+
+
+@pytest.mark.parametrize("keyword", [
+    "status>=500", "name==value", "name!=value", "name>1", "user=alice", # 接頭辞が無い
+    "field:status=500", "field:status>=", "field:user>alice", "field:1st>2", "field:", "error",
+])
+def test_other_keywords_are_not_field_conditions(keyword):
+    assert parse_field_condition(keyword) is None
+
+
+def test_numeric_comparison_on_key_value_and_json():
+    assert _matches("field:status>=500") == [0, 2, 7]
+    assert _matches("field:status<300") == [1, 6]
+    assert _matches("field:status==404") == [3]
+
+
+def test_numbers_with_units_and_decimals():
+    assert _matches("field:latency_ms>1000") == [0]
+    assert _matches("field:latency_ms<=80.5") == [1, 2]
+    assert _matches("field:cpu>90") == [6]
+
+
+def test_string_comparison_is_case_insensitive():
+    assert _matches("field:user==alice") == [0, 2]
+    assert _matches("field:user==ALICE") == [0, 2]
+    assert _matches("field:user!=alice") == [1, 3, 4, 6]
+
+
+def test_rows_without_the_field_never_match():
+    # != でもフィールドを含まない行 (5, 7, None) は一致しない
+    assert _matches("field:user!=nobody") == [0, 1, 2, 3, 4, 6]
+    assert _matches("field:missing==1") == []
+
+
+def test_field_name_does_not_match_inside_other_words():
+    assert _matches("field:status==200") == [1]
+    assert _matches("field:http_status==500") == [4]
+
+
+def test_field_index_caches_fields_by_lower_case_name():
+    index = FieldIndex(_frame())
+    index.evaluate(parse_field_condition("field:STATUS>1"))
+    index.evaluate(parse_field_condition("field:status<1"))
+    assert index.cached_fields == ["status"]
+
+
+def test_keyword_filters_use_field_conditions_only_with_prefix():
+    frame = _frame()
+    search_text = frame["Message"]
+    index = FieldIndex(frame)
+    plain = evaluate_keyword_filters(search_text, [{"keyword": "x==y", "operator": "AND"}], index)
+    assert plain.tolist() == [False] * 7 + [True, False]
+    combined = evaluate_keyword_filters(
+        search_text,
+        [{"keyword": "field:status>=500", "operator": "AND"}, {"keyword": "field:user==bob", "operator": "OR"}],
+        index,
+    )
+    assert combined[combined].index.tolist() == [0, 1, 2, 7]
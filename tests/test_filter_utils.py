@@ -0,0 +1,66 @@
+# tests/test_filter_utils.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.filter_utils import expand_context_rows
+
+
+def _naive_context(mask, before, after, keys=None):
+    """前後の行を1行ずつ数える素朴な実装 (比較用)。"""
+    keys = [None] * len(mask) if keys is None else list(keys)
+    cover = [False] * len(mask)
+    for position, matched in enumerate(mask):
+        if not matched:
+            continue
+        same_group = [i for i in range(len(mask)) if keys[i] == keys[position]]
+        index = same_group.index(position)
+        for i in same_group[max(index - before, 0):index + after + 1]:
+            cover[i] = True
+    return cover
+
+
+def test_context_without_groups_is_clipped_at_both_ends():
+    mask = [True, False, False, False, False, False, True]
+    assert expand_context_rows(mask, before=2, after=1).tolist() == [True, True, False, False, True, True, True]
+
+
+def test_overlapping_windows_are_merged():
+    mask = [False, True, False, True, False, False]
+    assert expand_context_rows(mask, before=1, after=1).tolist() == [True, True, True, True, True, False]
+
+
+def test_zero_context_returns_the_matches():
+    mask = np.array([False, True, False])
+    result = expand_context_rows(mask)
+    assert result.tolist() == [False, True, False]
+    assert result is not mask
+
+
+def test_context_stops_at_group_boundaries():
+    keys = ["a", "a", "b", "a", "b", "b"]
+    mask = [False, False, True, False, False, False]
+    # "b" のグループ (添字 2, 4, 5) の中だけで前後1行を数える
+    assert expand_context_rows(mask, before=1, after=1, group_keys=keys).tolist() == [False, False, True, False, True, False]
+
+
+def test_group_keys_from_multiple_columns_and_missing_values():
+    frame = pd.DataFrame({
+        "Hostname": ["h1", "h1", "h2", "h1", None, None],
+        "AppName": ["x", "y", "x", "x", "x", "x"],
+    })
+    mask = [True, False, False, False, False, True]
+    result = expand_context_rows(mask, before=1, after=1, group_keys=frame)
+    keys = list(zip(frame["Hostname"], frame["AppName"]))
+    assert result.tolist() == _naive_context(mask, 1, 1, keys)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_naive_context_on_random_input(seed):
+    rng = np.random.default_rng(seed)
+    length = int(rng.integers(1, 60))
+    mask = (rng.random(length) < 0.15).tolist()
+    keys = rng.integers(0, 3, length).tolist()
+    before, after = int(rng.integers(0, 4)), int(rng.integers(0, 4))
+    assert expand_context_rows(mask, before, after).tolist() == _naive_context(mask, before, after)
+    assert expand_context_rows(mask, before, after, group_keys=keys).tolist() == _naive_context(mask, before, after, keys)
@@ -0,0 +1,114 @@
+# tests/test_glob_match.py
+import random
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.utils.glob_match import compile_glob
+from src.utils.log_parser_utils import TEXT_DTYPE
+
+TEXTS = [
+    "",
+    "a",
+    "ab",
+    "Error: disk FULL on /dev/sda1",
+    "status=500 took 12ms",
+    "user=alice (admin) [id=42]",
+    "price $3.50 + tax ^2 | total{1}",
+    "back\\slash and dots...",
+    "first line\nsecond line",
+    "Ünïcödé Straße ログ",
+    None,
+]
+
+
+def _reference(pattern, text):
+    """Python の re (バックトラック型) で素朴に判定する (比較用)。"""
+    if text is None:
+        return False
+    regex = "".join(".*" if char == "*" else "." if char == "?" else re.escape(char) for char in pattern)
+    return re.search(regex, text, re.IGNORECASE) is not None
+
+
+def _assert_agrees(pattern, texts=TEXTS):
+    glob = compile_glob(pattern)
+    scalar = [glob.match(text) for text in texts]
+    arrow = glob.match_array(pd.Series(texts, dtype=TEXT_DTYPE)).tolist()
+    expected = [_reference(pattern, text) for text in texts]
+    assert scalar == expected, pattern
+    assert arrow == expected, pattern
+    return scalar
+
+
+@pytest.mark.parametrize("pattern", ["*", "**", "***"])
+def test_star_only_matches_every_non_null_value(pattern):
+    assert _assert_agrees(pattern) == [text is not None for text in TEXTS]
+
+
+def test_question_mark_needs_exactly_one_character():
+    assert _assert_agrees("?")[:3] == [False, True, True]
+    assert _assert_agrees("??")[:3] == [False, False, True]
+    _assert_agrees("a?")
+    _assert_agrees("?b")
+
+
+@pytest.mark.parametrize("pattern", ["*full", "full*", "*full*", "**FULL**", "*e*r*o*r*", "disk*sda?"])
+def test_leading_and_trailing_stars_are_substring_matches(pattern):
+    assert _assert_agrees(pattern)[3] is True
+
+
+@pytest.mark.parametrize("pattern", [
+    "$3.50", "^2", "total{1}", "(admin)", "[id=42]", "a|b", "back\\slash", "...", "+ tax", "dots.",
+    "$?.50", "[id=*]", "{1?",
+])
+def test_regex_metacharacters_are_literal(pattern):
+    _assert_agrees(pattern)
+
+
+def test_dot_does_not_match_any_character():
+    assert _assert_agrees("status.500")[4] is False
+    assert _assert_agrees("status?500")[4] is True
+
+
+def test_wildcards_do_not_cross_newlines():
+    assert _assert_agrees("first*second")[8] is False
+    assert _assert_agrees("line?second")[8] is False
+    assert _assert_agrees("second*line")[8] is True
+
+
+def test_case_insensitive_including_non_ascii():
+    assert _assert_agrees("ünïcödé")[9] is True
+    assert _assert_agrees("STRASSE")[9] is False
+    assert _assert_agrees("stra?e ロ?")[9] is True
+
+
+def test_null_values_never_match():
+    glob = compile_glob("*")
+    assert glob.match(None) is False
+    assert glob.match_array(pa.array([None, "x"], type=pa.large_string())).tolist() == [False, True]
+
+
+def test_match_series_keeps_index():
+    series = pd.Series(["abc", "xyz"], index=[10, 20], dtype=TEXT_DTYPE)
+    result = compile_glob("b").match_series(series)
+    assert result.index.tolist() == [10, 20]
+    assert result.tolist() == [True, False]
+
+
+def test_backtracking_pattern_agrees_without_reference():
+    # Python の re では指数的に遅くなるパターンのため、比較用の実装は使わない
+    glob = compile_glob("*a*a*a*a*a*a*b")
+    texts = ["a" * 5000, "a" * 5000 + "b"]
+    assert [glob.match(text) for text in texts] == [False, True]
+    assert glob.match_array(pd.Series(texts, dtype=TEXT_DTYPE)).tolist() == [False, True]
+
+
+def test_random_patterns_agree_with_reference():
+    rng = random.Random(0)
+    alphabet = "ab.*?$("
+    texts = ["".join(rng.choice("ab.$(\n") for _ in range(rng.randint(0, 12))) for _ in range(200)]
+    for _ in range(300):
+        pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+        _assert_agrees(pattern, texts)
@@ -0,0 +1,201 @@
+# tests/test_log_parser_utils.py
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.utils.log_parser_utils import detect_log_format, filter_raw_lines, parse_log_lines, parse_syslog_line, source_reference_time
+
+BSD_LINES = [
+    "<34>Dec 31 23:59:58 host app[1]: last line of the year",
+    "<34>Jan  1 00:00:01 host app[1]: first line of the year",
+]
+
+
+def test_bsd_year_rolls_over_to_previous_year():
+    # 1月に読み込んだ12月のログは前年の行とみなす
+    df = parse_log_lines(BSD_LINES, "rfc3164", reference_time=datetime(2025, 1, 2))
+    assert df["Timestamp"].tolist() == [datetime(2024, 12, 31, 23, 59, 58), datetime(2025, 1, 1, 0, 0, 1)]
+    assert df["Timestamp"].is_monotonic_increasing
+
+
+def test_bsd_single_line_parser_uses_the_same_rule():
+    reference_time = datetime(2025, 1, 2)
+    bulk = parse_log_lines(BSD_LINES, "rfc3164", reference_time=reference_time)["Timestamp"].tolist()
+    single = [parse_syslog_line(line, "rfc3164", reference_time=reference_time)["Timestamp"] for line in BSD_LINES]
+    assert single == bulk
+
+
+def test_bsd_leap_day_uses_the_inferred_year():
+    df = parse_log_lines(["<34>Feb 29 10:00:00 host app: leap day"], "rfc3164", reference_time=datetime(2024, 3, 1))
+    assert df["Timestamp"].tolist() == [datetime(2024, 2, 29, 10, 0, 0)]
+
+
+def test_source_reference_time_is_the_file_mtime(tmp_path):
+    path = tmp_path / "old.log"
+    path.write_text("x\n")
+    modified = datetime(2023, 12, 31, 12, 0, 0).timestamp()
+    os.utime(path, (modified, modified))
+    assert source_reference_time(str(path)) == datetime(2023, 12, 31, 12, 0, 0)
+
+
+def _kept(lines, log_format, keywords):
+    return [line for line in filter_raw_lines([line.encode("utf-8") for line in lines], log_format, keywords=keywords)]
+
+
+def test_ingest_keywords_fold_non_ascii_case_like_the_keyword_filter():
+    lines = [
+        "2024-05-01T10:00:00.000000+09:00 host app[1]: Café ÉTÉ",
+        "2024-05-01T10:00:01.000000+09:00 host app[1]: 日本語のメッセージ",
+        "2024-05-01T10:00:02.000000+09:00 host app[1]: other",
+    ]
+    assert len(_kept(lines, "iso8601", ["café", "été"])) == 1
+    assert len(_kept(lines, "iso8601", ["日本語"])) == 1
+    assert len(_kept(lines, "iso8601", ["APP[1]"])) == 3
+
+
+def test_ingest_keywords_match_unescaped_json_values():
+    records = [
+        {"__REALTIME_TIMESTAMP": "1714525200000000", "MESSAGE": 'path "C:\\temp" 日本語'},
+        {"__REALTIME_TIMESTAMP": "1714525200000001", "MESSAGE": "plain"},
+    ]
+    lines = [json.dumps(record) for record in records] # ensure_ascii で日本語は \uXXXX になる
+    assert len(_kept(lines, "journald_json", ['"c:\\temp"'])) == 1
+    assert len(_kept(lines, "journald_json", ["日本語"])) == 1
+    assert len(_kept(lines, "journald_json", ["PLAIN"])) == 1
+
+
+def test_assume_sorted_stops_at_the_end_of_the_range():
+    lines = [f"2024-05-01T10:0{i}:00.000000+09:00 host app[1]: m{i}".encode() for i in range(5)]
+    consumed = []
+
+    def source():
+        for line in lines:
+            consumed.append(line)
+            yield line
+
+    kept = list(filter_raw_lines(source(), "iso8601", end=datetime(2024, 5, 1, 10, 1, 30), assume_sorted=True))
+    assert len(kept) == 2
+    assert len(consumed) == 3
+
+
+ISO8601_LINES = [
+    "2024-05-01T10:00:00.123456+09:00 host1 sshd[123]: Accepted publickey for alice",
+    "2024-05-01T10:00:01.000000+09:00 host-2.example kernel: \x1b[31mred\x1b[0m alert",
+    "2024-05-01T10:00:02.000000+09:00 host1 app.name[7]:   leading spaces and : colons",
+    "not a syslog line",
+    "",
+    "2024-05-01T10:00:03.000000+09:00 host1 cron[9]: message with trailing spaces   ",
+]
+
+JOURNALD_RECORDS = [
+    {"__REALTIME_TIMESTAMP": "1714525200123456", "_HOSTNAME": "host1", "SYSLOG_IDENTIFIER": "sshd", "_PID": "123", "MESSAGE": "Accepted"},
+    {"__REALTIME_TIMESTAMP": "1714525201000000", "_HOSTNAME": "host1", "_COMM": "python3", "SYSLOG_PID": 45, "MESSAGE": "from _COMM"},
+    {"__REALTIME_TIMESTAMP": "1714525202000000", "_HOSTNAME": "host2", "MESSAGE": [104, 105, 0xe3, 0x81, 0x82]},
+    {"__REALTIME_TIMESTAMP": "1714525203000000", "MESSAGE": "\x1b[1mbold\x1b[0m 日本語"},
+    {"_HOSTNAME": "host3", "SYSLOG_IDENTIFIER": "notime", "MESSAGE": "no timestamp"},
+    {"__REALTIME_TIMESTAMP": "1714525204000000", "_HOSTNAME": "host1", "MESSAGE": None},
+]
+JOURNALD_LINES = [json.dumps(record, ensure_ascii=False) for record in JOURNALD_RECORDS] + [
+    '{"_HOSTNAME": "no message"}',
+    "[1, 2, 3]",
+    '{"MESSAGE": broken json',
+]
+
+
+def _bulk_rows(df):
+    """一括パーサーの DataFrame を、1行パーサーと比較できる辞書のリストにする (欠損値は None)。"""
+    rows = []
+    for row in df.astype(object).to_dict("records"):
+        row = {key: (None if pd.isna(value) else value) for key, value in row.items()}
+        if isinstance(row["Timestamp"], pd.Timestamp):
+            row["Timestamp"] = row["Timestamp"].to_pydatetime()
+        rows.append(row)
+    return rows
+
+
+def _line_rows(lines, log_format):
+    return [row for row in (parse_syslog_line(line, log_format) for line in lines) if row is not None]
+
+
+@pytest.mark.parametrize("log_format, lines", [("iso8601", ISO8601_LINES), ("journald_json", JOURNALD_LINES)])
+def test_bulk_parser_matches_line_parser(log_format, lines):
+    bulk = _bulk_rows(parse_log_lines(lines, log_format))
+    single = _line_rows(lines, log_format)
+    assert bulk == single
+    assert [row["Timestamp"].utcoffset() if row["Timestamp"] else None for row in bulk] == [
+        row["Timestamp"].utcoffset() if row["Timestamp"] else None for row in single
+    ]
+
+
+def test_bulk_iso8601_parser_keeps_mixed_offsets():
+    lines = [
+        "2024-05-01T10:00:00.000000+09:00 host app[1]: tokyo",
+        "2024-05-01T01:00:00.000000+00:00 host app[1]: utc",
+    ]
+    assert _bulk_rows(parse_log_lines(lines, "iso8601")) == _line_rows(lines, "iso8601")
+
+
+def test_bulk_journald_parser_columns():
+    df = parse_log_lines(JOURNALD_LINES, "journald_json")
+    assert len(df) == len(JOURNALD_RECORDS)
+    assert str(df["Timestamp"].dtype) == "datetime64[ns, UTC]"
+    assert df["AppName"].tolist()[:3] == ["sshd", "python3", "Unknown"]
+    assert df["PID"].tolist()[:2] == ["123", "45"]
+    assert df["Message"].tolist()[2:4] == ["hiあ", "bold 日本語"]
+
+
+@pytest.mark.parametrize("lines, expected", [
+    (ISO8601_LINES, "iso8601"),
+    (BSD_LINES, "rfc3164"),
+    (JOURNALD_LINES, "journald_json"),
+    (["plain text", "without any format"], "iso8601"),
+    ([], "iso8601"),
+    # 空行は数えず、多数決で決める
+    (["", "   "] + BSD_LINES + ISO8601_LINES[:1], "rfc3164"),
+])
+def test_detect_log_format(lines, expected):
+    assert detect_log_format(lines) == expected
+
+
+def test_detect_log_format_samples_only_the_first_lines():
+    lines = ISO8601_LINES[:1] * 3 + BSD_LINES * 10
+    assert detect_log_format(lines, sample_size=3) == "iso8601"
+    assert detect_log_format(lines) == "rfc3164"
+
+
+def test_parse_log_lines_detects_the_format():
+    df = parse_log_lines(JOURNALD_LINES)
+    assert df["Hostname"].tolist()[:2] == ["host1", "host1"]
+
+
+def test_ingest_keywords_use_wildcards_like_the_keyword_filter():
+    lines = [
+        "2024-05-01T10:00:00.000000+09:00 host app[1]: Error reading DISK sda",
+        "2024-05-01T10:00:01.000000+09:00 host app[1]: disk error",
+        "2024-05-01T10:00:02.000000+09:00 host app[1]: error*disk literal",
+        "2024-05-01T10:00:03.000000+09:00 host app[1]: status=500 done",
+        "2024-05-01T10:00:04.000000+09:00 host app[1]: done status=5",
+        "2024-05-01T10:00:05.000000+09:00 host app[1]: café au lait",
+    ]
+    assert _kept(lines, "iso8601", ["error*disk"]) == [lines[0].encode(), lines[2].encode()]
+    assert len(_kept(lines, "iso8601", ["status=5??"])) == 1
+    assert len(_kept(lines, "iso8601", ["st?tus", "done"])) == 2
+    assert len(_kept(lines, "iso8601", ["caf?", "*lait"])) == 1
+    assert len(_kept(lines, "iso8601", ["*"])) == len(lines)
+
+
+def test_ingest_keywords_do_not_match_json_keys():
+    records = [
+        {"__REALTIME_TIMESTAMP": "1714525200000000", "_PID": "12", "MESSAGE": "plain message"},
+        {"__REALTIME_TIMESTAMP": "1714525200000001", "_PID": "13", "MESSAGE": "pid file written"},
+        {"__REALTIME_TIMESTAMP": "1714525200000002", "SYSLOG_IDENTIFIER": "sshd", "MESSAGE": "session opened"},
+    ]
+    lines = [json.dumps(record) for record in records]
+    assert len(_kept(lines, "journald_json", ["pid"])) == 1
+    assert len(_kept(lines, "journald_json", ["message"])) == 1
+    assert len(_kept(lines, "journald_json", ["realtime"])) == 0
+    assert len(_kept(lines, "journald_json", ["ss?d", "sess*open"])) == 1
+    assert len(_kept(lines, "journald_json", ["13"])) == 1
@@ -0,0 +1,107 @@
+# tests/test_log_preview.py
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.log_preview import PREVIEW_BLOCKS, build_log_preview, sample_line_blocks
+
+BASE = datetime(2024, 5, 1, 10, 0, 0)
+
+
+def _line(index, time):
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S')}.000000+09:00 host{index % 3} app[1]: message {index:08d}"
+
+
+def _write(path, lines, trailing_newline=True):
+    path.write_text("\n".join(lines) + ("\n" if trailing_newline else ""), encoding="utf-8")
+    return str(path)
+
+
+def _non_empty(lines):
+    return [line.decode() for line in lines if line]
+
+
+def test_empty_file_has_no_blocks(tmp_path):
+    assert sample_line_blocks(_write(tmp_path / "empty.log", [], trailing_newline=False)) == []
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_small_file_blocks_do_not_overlap(tmp_path, trailing_newline):
+    lines = [f"line {i}" for i in range(10)]
+    path = _write(tmp_path / "small.log", lines, trailing_newline)
+    blocks = sample_line_blocks(path, blocks=8, lines_per_block=3)
+    offsets = [offset for offset, _ in blocks]
+    assert offsets == sorted(set(offsets))
+    # 重ならずに読んだ行を並べると、ファイルの全ての行がちょうど1回ずつ現れる
+    assert [line for _, block in blocks for line in _non_empty(block)] == lines
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_blocks_start_at_line_starts_and_last_block_is_the_tail(tmp_path, trailing_newline):
+    lines = [f"line {i:05d} " + "x" * (i % 17) for i in range(5000)]
+    path = _write(tmp_path / "large.log", lines, trailing_newline)
+    data = open(path, 'rb').read()
+    blocks = sample_line_blocks(path, blocks=10, lines_per_block=50)
+    assert len(blocks) == 10
+    assert blocks[0][0] == 0
+    assert _non_empty(blocks[0][1]) == lines[:50]
+    assert all(data[offset - 1:offset] == b"\n" for offset, _ in blocks[1:])
+    assert _non_empty(blocks[-1][1]) == lines[-50:]
+    for offset, block in blocks[1:-1]:
+        first = lines.index(block[0].decode())
+        assert _non_empty(block) == lines[first:first + 50]
+
+
+def test_last_block_of_single_line_file(tmp_path):
+    path = _write(tmp_path / "one.log", ["only line"], trailing_newline=False)
+    blocks = sample_line_blocks(path, blocks=4, lines_per_block=2)
+    assert [line for _, block in blocks for line in _non_empty(block)] == ["only line"]
+
+
+def _timed_lines(rates):
+    """rates[h] 行/分 の割合で、h 時台の行を作る。戻り値は (行のリスト, 時台ごとの実際の件数)。"""
+    lines, counts = [], []
+    for hour, per_minute in enumerate(rates):
+        hour_start = BASE + timedelta(hours=hour)
+        times = [hour_start + timedelta(seconds=60 * i / per_minute) for i in range(60 * per_minute)]
+        lines += [_line(len(lines) + i, time) for i, time in enumerate(times)]
+        counts.append(len(times))
+    return lines, counts
+
+
+def test_hourly_counts_at_constant_rate_are_exact(tmp_path):
+    lines, counts = _timed_lines([120] * 4)
+    preview = build_log_preview(_write(tmp_path / "constant.log", lines))
+    np.testing.assert_allclose(preview.hourly_counts().to_numpy(), counts, rtol=0.01)
+
+
+def test_hourly_counts_interpolate_time_ordered_file(tmp_path):
+    lines, counts = _timed_lines([300, 60, 150, 20, 240])
+    preview = build_log_preview(_write(tmp_path / "ordered.log", lines))
+    hourly = preview.hourly_counts()
+    assert hourly.index.tolist() == [pd.Timestamp(BASE + timedelta(hours=h)) for h in range(5)]
+    assert preview.estimated_rows == pytest.approx(len(lines), rel=0.01)
+    assert hourly.sum() == pytest.approx(len(lines), rel=0.01)
+    # 件数が変わる時刻の前後は隣り合うブロックの間で直線補間するため、誤差はブロックの間隔 (の行数) 以内
+    np.testing.assert_allclose(hourly.to_numpy(), counts, atol=len(lines) / PREVIEW_BLOCKS)
+
+
+def test_hourly_counts_scale_the_sample_for_unordered_file(tmp_path):
+    lines, counts = _timed_lines([300, 60, 150, 20, 240])
+    random.Random(0).shuffle(lines)
+    preview = build_log_preview(_write(tmp_path / "shuffled.log", lines))
+    assert not preview._is_time_ordered()
+    hourly = preview.hourly_counts()
+    sampled = preview.frame["Timestamp"].dt.tz_localize(None).dt.floor("h").value_counts()
+    expected = sampled.reindex(hourly.index, fill_value=0) * (preview.estimated_rows / preview.sample_rows)
+    assert hourly.tolist() == np.round(expected.to_numpy()).astype(np.int64).tolist()
+    # 読んだ行の分布による推定なので、誤差はサンプルの大きさ程度に収まる
+    np.testing.assert_allclose(hourly.to_numpy(), counts, rtol=0.25, atol=100)
+
+
+def test_hourly_counts_of_file_without_timestamps(tmp_path):
+    preview = build_log_preview(_write(tmp_path / "text.log", ["not a log line"] * 10))
+    assert preview.hourly_counts().empty
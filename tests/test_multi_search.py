@@ -0,0 +1,115 @@
+# tests/test_multi_search.py
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from src.utils.multi_search import (
+    ACTIVE_DATASET_SECONDS,
+    delete_dataset,
+    is_dataset_active,
+    label_search_result,
+    list_datasets,
+    merge_search_results,
+    prune_datasets,
+    touch_dataset,
+)
+
+
+IDLE = time.time() - ACTIVE_DATASET_SECONDS - 60
+
+
+def _make_datasets(root, sizes, last_used=IDLE):
+    for i, size in enumerate(sizes):
+        directory = root / f"20240101000000_{i:06d}"
+        directory.mkdir()
+        (directory / "syslog.log").write_bytes(b"x" * size)
+        os.utime(directory, (last_used, last_used))
+
+
+def _names(root):
+    return [os.path.basename(dataset["path"]) for dataset in list_datasets(str(root))]
+
+
+def test_prune_keeps_newest_datasets_by_count(tmp_path):
+    _make_datasets(tmp_path, [10] * 5)
+    removed = prune_datasets(str(tmp_path), keep=3, max_bytes=10 ** 9)
+    assert len(removed) == 2
+    assert _names(tmp_path) == ["20240101000000_000002", "20240101000000_000003", "20240101000000_000004"]
+
+
+def test_prune_removes_oldest_until_under_byte_limit(tmp_path):
+    _make_datasets(tmp_path, [100, 200, 300, 400])
+    prune_datasets(str(tmp_path), keep=10, max_bytes=750)
+    assert [dataset["bytes"] for dataset in list_datasets(str(tmp_path))] == [300, 400]
+
+
+def test_prune_skips_protected_dataset(tmp_path):
+    _make_datasets(tmp_path, [10] * 3)
+    protected = str(tmp_path / "20240101000000_000000")
+    prune_datasets(str(tmp_path), keep=2, max_bytes=10 ** 9, protected=[protected])
+    assert _names(tmp_path) == ["20240101000000_000000", "20240101000000_000002"]
+
+
+def test_prune_keeps_datasets_used_by_other_sessions(tmp_path):
+    # 5件のうち、セッション1が分析中 (000001) と、セッション2が読み込んだばかり (000003) のもの以外を削除する
+    _make_datasets(tmp_path, [10] * 5)
+    session_1_dir = str(tmp_path / "20240101000000_000001")
+    session_2_dir = str(tmp_path / "20240101000000_000003")
+    touch_dataset(session_1_dir) # セッション1の再実行
+    removed = prune_datasets(str(tmp_path), keep=1, max_bytes=10 ** 9, protected=[session_2_dir])
+    assert len(removed) == 3
+    assert _names(tmp_path) == ["20240101000000_000001", "20240101000000_000003"]
+
+
+def test_dataset_becomes_idle_after_the_active_period(tmp_path):
+    _make_datasets(tmp_path, [10])
+    directory = str(tmp_path / "20240101000000_000000")
+    assert not is_dataset_active(directory)
+    touch_dataset(directory)
+    assert is_dataset_active(directory)
+    assert not is_dataset_active(directory, now=time.time() + ACTIVE_DATASET_SECONDS + 1)
+    assert not is_dataset_active(str(tmp_path / "missing"))
+
+
+def test_delete_dataset_rejects_paths_outside_root(tmp_path):
+    _make_datasets(tmp_path, [10])
+    with pytest.raises(ValueError):
+        delete_dataset(str(tmp_path.parent), str(tmp_path))
+    delete_dataset(str(tmp_path / "20240101000000_000000"), str(tmp_path))
+    assert _names(tmp_path) == []
+
+
+def _result(times, archive):
+    df = pd.DataFrame({
+        "Timestamp": pd.to_datetime(times),
+        "Hostname": "host",
+        "AppName": "app",
+        "PID": range(len(times)),
+        "Message": [f"{archive} {t}" for t in times],
+    })
+    return label_search_result(df, archive, "syslog.log")
+
+
+def test_merge_sorts_all_results_once_by_timestamp():
+    first = _result(["2024-01-01 00:00:03", "2024-01-01 00:00:01"], "A")
+    second = _result(["2024-01-01 00:00:02", "2024-01-01 00:00:03"], "B")
+    merged = merge_search_results([None, first, second.iloc[:0], second])
+    assert merged["Archive"].tolist() == ["A", "B", "A", "B"]
+    assert merged["Timestamp"].tolist() == sorted(merged["Timestamp"].tolist())
+
+
+def test_merge_without_results_returns_none():
+    assert merge_search_results([]) is None
+    assert merge_search_results([_result([], "A")]) is None
+
+
+def test_merge_can_extend_a_partial_result():
+    first = _result(["2024-01-01 00:00:01", "2024-01-01 00:00:04"], "A")
+    second = _result(["2024-01-01 00:00:02"], "B")
+    third = _result(["2024-01-01 00:00:03", "2024-01-01 00:00:05"], "C")
+    partial = merge_search_results([None, first, second])
+    merged = merge_search_results([partial, third])
+    assert merged["Archive"].tolist() == ["A", "B", "C", "A", "C"]
+    pd.testing.assert_frame_equal(merged, merge_search_results([first, second, third]))
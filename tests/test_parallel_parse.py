@@ -0,0 +1,63 @@
+# tests/test_parallel_parse.py
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.utils import parallel_parse
+from src.utils.log_parser_utils import parse_log_lines, source_reference_time
+from src.utils.parallel_parse import concat_parsed_frames, iter_parsed_ranges, parse_byte_range, parse_file_in_parallel, split_byte_ranges
+
+LINES = [
+    f"2024-05-01T10:{i // 60:02d}:{i % 60:02d}.000000+09:00 host app[{i % 7}]: message {i} Café 日本語"
+    for i in range(500)
+]
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    # 小さなファイルでも複数の範囲に分かれるように、範囲の大きさの下限を下げる
+    monkeypatch.setattr(parallel_parse, "MIN_RANGE_BYTES", 1000)
+    path = tmp_path / "syslog.log"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _expected(path, lines):
+    return parse_log_lines(lines, "iso8601", reference_time=source_reference_time(path))
+
+
+def test_ranges_cover_the_file_and_end_after_newlines(log_path):
+    ranges = split_byte_ranges(log_path, 8)
+    data = open(log_path, 'rb').read()
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+
+
+def test_ranges_of_empty_file(tmp_path):
+    path = tmp_path / "empty.log"
+    path.write_bytes(b"")
+    assert split_byte_ranges(str(path), 4) == []
+
+
+def test_range_parse_matches_parsing_all_lines(log_path):
+    df = parse_file_in_parallel(log_path, "iso8601")
+    pd.testing.assert_frame_equal(df, _expected(log_path, LINES))
+
+
+def test_range_without_trailing_newline(tmp_path):
+    path = tmp_path / "tail.log"
+    path.write_text("\n".join(LINES[:3]), encoding="utf-8")
+    df = parse_byte_range(str(path), 0, path.stat().st_size, "iso8601")
+    assert df["Message"].tolist() == [f"message {i} Café 日本語" for i in range(3)]
+
+
+def test_range_parse_applies_ingest_filter(log_path):
+    ingest_filter = {"start": datetime(2024, 5, 1, 10, 2, 0), "end": datetime(2024, 5, 1, 10, 3, 59), "keywords": ["APP[3]"]}
+    frames = list(iter_parsed_ranges(log_path, "iso8601", ingest_filter))
+    assert len(frames) > 1
+    df = concat_parsed_frames(frames)
+    expected = [line for i, line in enumerate(LINES) if 120 <= i < 240 and i % 7 == 3]
+    pd.testing.assert_frame_equal(df, _expected(log_path, expected))
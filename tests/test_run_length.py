@@ -0,0 +1,104 @@
+# tests/test_run_length.py
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.log_parser_utils import LOG_COLUMNS, TEXT_DTYPE, filter_frame_by_time_range
+from src.utils.run_length import (
+    COUNT_COLUMN,
+    LAST_TIMESTAMP_COLUMN,
+    collapse_repeated_rows,
+    expand_collapsed_rows,
+    expanded_row_count,
+    filter_collapsed_by_time_range,
+    is_collapsed,
+)
+
+BASE = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def _frame(messages, tz=None, pids=None):
+    timestamps = pd.Series([BASE + timedelta(seconds=i) for i in range(len(messages))])
+    if tz is not None:
+        timestamps = timestamps.dt.tz_localize(tz)
+    return pd.DataFrame({
+        "Timestamp": timestamps,
+        "Hostname": pd.Series(["host"] * len(messages), dtype=TEXT_DTYPE),
+        "AppName": pd.Series(["app"] * len(messages), dtype=TEXT_DTYPE),
+        "PID": pd.Series(pids if pids is not None else ["1"] * len(messages), dtype=TEXT_DTYPE),
+        "Message": pd.Series(messages, dtype=TEXT_DTYPE),
+    })
+
+
+def _random_frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    # 同じメッセージが続きやすいように、少数の値から長さのランダムなランを作る
+    messages = np.repeat(rng.choice(["a", "b", "c"], rows), rng.integers(1, 6, rows))[:rows]
+    return _frame(messages.tolist(), tz=timezone(timedelta(hours=9)))
+
+
+def test_collapse_counts_consecutive_runs_only():
+    collapsed = collapse_repeated_rows(_frame(["a", "a", "b", "a", "a", "a"]))
+    assert is_collapsed(collapsed)
+    assert collapsed["Message"].tolist() == ["a", "b", "a"]
+    assert collapsed[COUNT_COLUMN].tolist() == [2, 1, 3]
+    assert collapsed["Timestamp"].tolist() == [pd.Timestamp(BASE + timedelta(seconds=s)) for s in (0, 2, 3)]
+    assert collapsed[LAST_TIMESTAMP_COLUMN].tolist() == [pd.Timestamp(BASE + timedelta(seconds=s)) for s in (1, 2, 5)]
+    assert expanded_row_count(collapsed) == 6
+
+
+def test_collapse_treats_missing_values_as_equal_and_other_columns_as_keys():
+    collapsed = collapse_repeated_rows(_frame(["a", "a", "a", "a"], pids=[None, None, "2", "2"]))
+    assert collapsed[COUNT_COLUMN].tolist() == [2, 2]
+    assert collapsed["PID"].isna().tolist() == [True, False]
+
+
+@pytest.mark.parametrize("tz", [None, timezone(timedelta(hours=9))])
+def test_expand_restores_original_rows(tz):
+    df = _frame(["x", "x", "y", "y", "y", "x"], tz=tz)
+    expanded = expand_collapsed_rows(collapse_repeated_rows(df))
+    pd.testing.assert_frame_equal(expanded[LOG_COLUMNS], df)
+
+
+def test_collapse_leaves_empty_and_mixed_offset_frames_unchanged():
+    empty = _frame([])
+    assert collapse_repeated_rows(empty) is empty
+    mixed = _frame(["a", "a"]).assign(Timestamp=["2024-03-01T12:00:00+09:00", "2024-03-01T12:00:01+00:00"])
+    assert collapse_repeated_rows(mixed) is mixed
+    assert expand_collapsed_rows(mixed) is mixed
+
+
+def test_time_range_splits_runs_at_the_boundaries():
+    collapsed = collapse_repeated_rows(_frame(["a"] * 5 + ["b"] * 5))
+    start, end = BASE + timedelta(seconds=3), BASE + timedelta(seconds=6)
+    filtered = filter_collapsed_by_time_range(collapsed, start, end)
+    assert filtered["Message"].tolist() == ["a", "b"]
+    assert filtered[COUNT_COLUMN].tolist() == [2, 2]
+    assert filtered["Timestamp"].tolist() == [pd.Timestamp(start), pd.Timestamp(BASE + timedelta(seconds=5))]
+    assert filtered[LAST_TIMESTAMP_COLUMN].tolist() == [pd.Timestamp(BASE + timedelta(seconds=4)), pd.Timestamp(end)]
+
+
+def test_time_range_without_matches_returns_empty_collapsed_frame():
+    collapsed = collapse_repeated_rows(_frame(["a", "a", "b"]))
+    filtered = filter_collapsed_by_time_range(collapsed, BASE + timedelta(hours=1), None)
+    assert filtered.empty
+    assert is_collapsed(filtered)
+    assert expanded_row_count(filtered) == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_time_range_round_trip_matches_filtering_expanded_rows(seed):
+    df = _random_frame(300, seed)
+    rng = np.random.default_rng(seed)
+    start_second, end_second = sorted(rng.integers(-10, 310, 2).tolist())
+    start, end = BASE + timedelta(seconds=start_second), BASE + timedelta(seconds=end_second)
+
+    filtered = filter_collapsed_by_time_range(collapse_repeated_rows(df), start, end)
+    expected = filter_frame_by_time_range(df, start, end)
+    assert expanded_row_count(filtered) == len(expected)
+    pd.testing.assert_frame_equal(expand_collapsed_rows(filtered)[LOG_COLUMNS], expected)
+    # 絞り込んだ結果をまとめ直しても同じになる
+    if not expected.empty:
+        assert filtered[COUNT_COLUMN].tolist() == collapse_repeated_rows(expected)[COUNT_COLUMN].tolist()
@@ -0,0 +1,156 @@
+# tests/test_sketches.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.sketches import CountMinSketch, HyperLogLog, LogSummary, SpaceSaving, hash_values
+
+
+def _zipf_values(n, seed, distinct=5000):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.3, n), distinct)
+    return np.array([f"value-{rank}" for rank in ranks], dtype=object)
+
+
+def _true_counts(values):
+    return pd.Series(values).value_counts()
+
+
+def test_count_min_never_underestimates_and_stays_within_bound():
+    values = _zipf_values(200000, seed=1)
+    hashes, _ = hash_values(values)
+    sketch = CountMinSketch(width=1024, depth=4)
+    sketch.update(hashes)
+
+    counts = _true_counts(values)
+    estimates = sketch.estimate(hash_values(counts.index.to_numpy(dtype=object))[0])
+    errors = estimates - counts.to_numpy()
+    assert (errors >= 0).all()
+    assert errors.max() <= np.e / sketch.width * len(values)
+
+
+def test_count_min_merge_equals_sketch_of_concatenation():
+    first, second = _zipf_values(50000, seed=2), _zipf_values(30000, seed=3)
+    merged, other, whole = CountMinSketch(), CountMinSketch(), CountMinSketch()
+    merged.update(hash_values(first)[0])
+    other.update(hash_values(second)[0])
+    whole.update(hash_values(np.concatenate([first, second]))[0])
+
+    merged.merge(other)
+    assert np.array_equal(merged.table, whole.table)
+
+
+def test_count_min_merge_rejects_different_shapes():
+    with pytest.raises(ValueError):
+        CountMinSketch(width=1024).merge(CountMinSketch(width=2048))
+
+
+def _assert_space_saving_bounds(sketch, counts, total):
+    assert sketch.error_bound <= total / (sketch.capacity + 1)
+    assert len(sketch.counters) <= sketch.capacity
+    for _, value, count in sketch.top(sketch.capacity):
+        assert count <= counts[value] <= count + sketch.error_bound
+    # 総件数 / (capacity + 1) を超える値は必ず残る
+    for value in counts[counts > total / (sketch.capacity + 1)].index:
+        assert value in {v for _, v, _ in sketch.top(sketch.capacity)}
+
+
+def test_space_saving_counts_stay_within_error_bound():
+    values = _zipf_values(200000, seed=4)
+    sketch = SpaceSaving(capacity=50)
+    for start in range(0, len(values), 20000):
+        chunk = values[start:start + 20000]
+        hashes, chunk_values = hash_values(chunk)
+        sketch.update(hashes, chunk_values)
+
+    assert sketch.error_bound > 0
+    _assert_space_saving_bounds(sketch, _true_counts(values), len(values))
+
+
+def test_space_saving_weights_count_as_repeated_rows():
+    sketch = SpaceSaving(capacity=10)
+    hashes, values, weights = hash_values(["a", "b", None, "a"], [3, 2, 100, 4])
+    sketch.update(hashes, values, weights)
+    assert [(value, count) for _, value, count in sketch.top(2)] == [("a", 7), ("b", 2)]
+
+
+def test_space_saving_merge_keeps_error_bound():
+    first, second = _zipf_values(80000, seed=5), _zipf_values(120000, seed=6)
+    merged, other = SpaceSaving(capacity=50), SpaceSaving(capacity=50)
+    merged.update(*hash_values(first))
+    other.update(*hash_values(second))
+
+    merged.merge(other)
+    whole = np.concatenate([first, second])
+    _assert_space_saving_bounds(merged, _true_counts(whole), len(whole))
+
+
+def test_space_saving_merge_without_overflow_is_exact():
+    merged, other = SpaceSaving(capacity=10), SpaceSaving(capacity=10)
+    merged.update(*hash_values(["a", "a", "b"]))
+    other.update(*hash_values(["b", "c"]))
+    merged.merge(other)
+    assert merged.error_bound == 0
+    assert sorted((value, count) for _, value, count in merged.top(10)) == [("a", 2), ("b", 2), ("c", 1)]
+
+
+@pytest.mark.parametrize("distinct", [10, 1000, 200000])
+def test_hyperloglog_count_is_within_expected_error(distinct):
+    sketch = HyperLogLog(precision=14)
+    values = np.array([f"host-{i}" for i in range(distinct)] * 2, dtype=object)
+    sketch.update(hash_values(values)[0])
+    # 標準誤差 1.04 / sqrt(m) の4倍まで許容する
+    tolerance = 4 * 1.04 / np.sqrt(len(sketch.registers))
+    assert abs(sketch.count() - distinct) <= max(tolerance * distinct, 1)
+
+
+def test_hyperloglog_merge_counts_union():
+    first = np.array([f"id-{i}" for i in range(0, 60000)], dtype=object)
+    second = np.array([f"id-{i}" for i in range(40000, 100000)], dtype=object)
+    merged, other, whole = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    merged.update(hash_values(first)[0])
+    other.update(hash_values(second)[0])
+    whole.update(hash_values(np.concatenate([first, second]))[0])
+
+    merged.merge(other)
+    assert np.array_equal(merged.registers, whole.registers)
+    assert merged.count() == whole.count()
+
+
+def test_hyperloglog_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=12).merge(HyperLogLog(precision=14))
+
+
+def _frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Hostname": [f"host-{i}" for i in rng.integers(0, 20, rows)],
+        "AppName": [f"app-{i}" for i in rng.integers(0, 5, rows)],
+        "PID": rng.integers(0, 300, rows).astype(str),
+        "Message": [f"message {i}" for i in rng.integers(0, 50, rows)],
+    })
+
+
+def test_log_summary_merge_matches_summary_of_whole_frame():
+    first, second = _frame(3000, seed=7), _frame(2000, seed=8)
+    merged = LogSummary.from_frame(first)
+    merged.merge(LogSummary.from_frame(second))
+    whole = LogSummary.from_frame(pd.concat([first, second], ignore_index=True))
+
+    assert merged.total_rows == whole.total_rows == 5000
+    for column in ["Hostname", "AppName", "Message"]:
+        pd.testing.assert_frame_equal(
+            merged.top_values(column, 5).sort_values(column, ignore_index=True),
+            whole.top_values(column, 5).sort_values(column, ignore_index=True),
+        )
+    for column in ["Hostname", "AppName", "PID", "Message"]:
+        assert merged.distinct_count(column) == whole.distinct_count(column)
+
+
+def test_log_summary_weights_match_expanded_rows():
+    frame = pd.DataFrame({"Hostname": ["a", "b"], "AppName": ["x", "x"], "PID": ["1", "2"], "Message": ["m", "n"]})
+    weighted = LogSummary.from_frame(frame, weights=[3, 1])
+    expanded = LogSummary.from_frame(frame.loc[[0, 0, 0, 1]].reset_index(drop=True))
+    assert weighted.total_rows == expanded.total_rows == 4
+    pd.testing.assert_frame_equal(weighted.top_values("Hostname"), expanded.top_values("Hostname"))
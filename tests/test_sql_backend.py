@@ -0,0 +1,122 @@
+# tests/test_sql_backend.py
+import json
+from datetime import datetime
+
+import pytest
+
+from src.utils import sql_backend
+from src.utils.log_parser_utils import parse_log_lines
+
+LINES = [
+    "2024-05-01T10:00:00.000000+09:00 web1 nginx[10]: GET /index status=200",
+    "2024-05-01T10:00:01.000000+09:00 web1 nginx[10]: GET /api status=500",
+    "2024-05-01T10:00:02.000000+09:00 db1 postgres[20]: error: disk full",
+    "2024-05-01T10:00:03.000000+09:00 db1 postgres[20]: 100% done_ok",
+    "2024-05-01T10:00:04.000000+09:00 web2 nginx[11]: error reading disk status=503",
+    "2024-05-01T10:00:05.000000+09:00 web2 app[12]: 100x doneXok",
+]
+
+
+def _database(tmp_path, frames):
+    db_path = str(tmp_path / sql_backend.DATABASE_FILE_NAME)
+    connection = sql_backend.create_database(db_path)
+    for df in frames:
+        sql_backend.insert_log_frame(connection, df)
+    sql_backend.finalize_database(connection)
+    connection.close()
+    return db_path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return _database(tmp_path, [parse_log_lines(LINES, "iso8601")])
+
+
+def _filters(*conditions):
+    return [{"keyword": keyword, "operator": operator} for keyword, operator in conditions]
+
+
+def _messages(db_path, filters=None):
+    df = sql_backend.fetch_logs(db_path, filters=filters)
+    assert sql_backend.count_logs(db_path, filters=filters) == len(df)
+    return df["Message"].tolist()
+
+
+def test_where_clause_combines_keywords_left_to_right():
+    where, params = sql_backend.build_where_clause(filters=_filters(("a", "AND"), ("b", "OR"), ("c", "AND")))
+    assert where.count("logs_fts") == 3
+    assert where.index("OR") < where.rindex("AND")
+    assert params == ["%a%", "%b%", "%c%"]
+
+
+def test_keywords_are_evaluated_left_to_right(db_path):
+    # (error AND nginx) OR postgres ≠ error AND (nginx OR postgres)
+    messages = _messages(db_path, _filters(("error", "AND"), ("nginx", "AND"), ("postgres", "OR")))
+    assert messages == [LINES[i].split(": ", 1)[1] for i in (2, 3, 4)]
+    messages = _messages(db_path, _filters(("postgres", "AND"), ("nginx", "OR"), ("error", "AND")))
+    assert messages == [LINES[i].split(": ", 1)[1] for i in (2, 4)]
+
+
+def test_empty_and_unknown_operator_keywords_are_ignored(db_path):
+    assert len(_messages(db_path, _filters(("", "AND"), ("web2", "AND"), ("x", "NOT")))) == 2
+    assert sql_backend.build_where_clause(filters=_filters(("", "AND"))) == ("", [])
+
+
+def test_wildcards_are_translated_to_like_patterns(db_path):
+    where, params = sql_backend.build_where_clause(filters=_filters(("error*disk", "AND"), ("st?tus", "OR")))
+    # "?" は LIKE の "_" と同じく任意の1文字のため、厳密な判定はし直さない
+    assert params == ["%error%disk%", "%st_tus%"]
+    assert "wildcard_match" not in where
+    assert len(_messages(db_path, _filters(("error*disk", "AND")))) == 2
+    assert len(_messages(db_path, _filters(("st?tus=5", "AND")))) == 2
+
+
+def test_like_special_characters_are_rechecked_literally(db_path):
+    # LIKE では "%" と "_" が任意の文字に一致するため、wildcard_match で厳密に判定し直す
+    _, params = sql_backend.build_where_clause(filters=_filters(("100%", "AND")))
+    assert params == ["%100%%", "100%"]
+    assert _messages(db_path, _filters(("100%", "AND"))) == ["100% done_ok"]
+    assert _messages(db_path, _filters(("done_ok", "AND"))) == ["100% done_ok"]
+
+
+def test_field_conditions_use_field_match(db_path):
+    where, params = sql_backend.build_where_clause(filters=_filters(("field:status>=500", "AND")))
+    assert "field_match" in where
+    assert params == ["%status%", "field:status>=500"]
+    assert len(_messages(db_path, _filters(("field:status>=500", "AND")))) == 2
+    assert len(_messages(db_path, _filters(("field:status>=500", "AND"), ("web1", "AND")))) == 1
+    # 接頭辞が無ければ通常のキーワード
+    assert _messages(db_path, _filters(("status>=500", "AND"))) == []
+
+
+def test_time_range_bounds_are_inclusive(db_path):
+    start, end = datetime(2024, 5, 1, 10, 0, 1), datetime(2024, 5, 1, 10, 0, 3)
+    df = sql_backend.fetch_logs(db_path, start, end)
+    assert [t.second for t in df["Timestamp"]] == [1, 2, 3]
+    assert sql_backend.count_logs(db_path, start=start) == 5
+    assert sql_backend.count_logs(db_path, end=start) == 2
+
+
+def test_fetch_from_end_returns_last_rows_in_original_order(db_path):
+    head = sql_backend.fetch_logs(db_path, limit=2)
+    tail = sql_backend.fetch_logs(db_path, limit=2, from_end=True)
+    assert [t.second for t in head["Timestamp"]] == [0, 1]
+    assert [t.second for t in tail["Timestamp"]] == [4, 5]
+    assert str(tail["Timestamp"].dtype) == "datetime64[ns, UTC+09:00]"
+
+
+def test_rows_without_timestamps_are_returned_as_nat(tmp_path):
+    # 基準時刻の年がうるう年でない "Feb 29" と、時刻の無い journald のレコードは Timestamp が欠損する
+    bsd = parse_log_lines(["<34>Feb 29 10:00:00 host app[1]: leap"], "rfc3164", reference_time=datetime(2025, 6, 1))
+    journald = parse_log_lines([
+        json.dumps({"MESSAGE": "no time", "_HOSTNAME": "host"}),
+        json.dumps({"__REALTIME_TIMESTAMP": "1714525200000000", "MESSAGE": "with time", "_HOSTNAME": "host"}),
+    ], "journald_json")
+    db_path = _database(tmp_path, [bsd, journald])
+    df = sql_backend.fetch_logs(db_path)
+    assert df["Message"].tolist() == ["leap", "no time", "with time"]
+    assert df["Timestamp"].isna().tolist() == [True, True, False]
+    assert sql_backend.fetch_logs(db_path, from_end=True, limit=1)["Message"].tolist() == ["with time"]
+    assert len(sql_backend.fetch_logs(db_path, filters=_filters(("leap", "AND")))) == 1
+    assert sql_backend.fetch_logs(db_path, filters=_filters(("leap", "AND")))["Timestamp"].isna().all()
+    assert sql_backend.get_time_bounds(db_path)[0] is not None
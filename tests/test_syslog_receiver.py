@@ -0,0 +1,108 @@
+# tests/test_syslog_receiver.py
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from src.utils.log_parser_utils import TEXT_COLUMNS, TEXT_DTYPE
+from src.utils import syslog_receiver
+from src.utils.syslog_receiver import MAX_TCP_FRAME_BYTES, ColumnarRingBuffer, SyslogReceiver
+
+LINE = "2024-01-01T00:00:{second:02d}.000000+09:00 host app[1]: {message}"
+
+
+def _append(buffer, messages, size=10):
+    count = len(messages)
+    buffer.append_batch(
+        np.arange(count) * 1_000_000_000, np.full(count, 540), np.full(count, size),
+        {col: np.array(messages, dtype=object) for col in TEXT_COLUMNS},
+    )
+
+
+def test_ring_buffer_keeps_newest_messages_within_count():
+    buffer = ColumnarRingBuffer(max_messages=5, max_bytes=10 ** 6)
+    _append(buffer, ["a", "b", "c"])
+    _append(buffer, ["d", "e", "f", "g"])
+    df = buffer.to_frame()
+    assert df["Message"].tolist() == ["c", "d", "e", "f", "g"]
+    assert (buffer.length, buffer.evicted, buffer.total_bytes) == (5, 2, 50)
+    assert all(df[col].dtype == TEXT_DTYPE for col in TEXT_COLUMNS)
+
+
+def test_ring_buffer_evicts_by_bytes_and_trims_oversized_batch():
+    buffer = ColumnarRingBuffer(max_messages=100, max_bytes=35)
+    _append(buffer, ["a", "b", "c"])
+    _append(buffer, ["d"])
+    assert buffer.to_frame()["Message"].tolist() == ["b", "c", "d"]
+    _append(buffer, [f"x{i}" for i in range(10)])
+    assert buffer.to_frame()["Message"].tolist() == ["x7", "x8", "x9"]
+    assert (buffer.length, buffer.evicted, buffer.total_bytes) == (3, 11, 30)
+
+
+def test_empty_ring_buffer_returns_empty_frame():
+    df = ColumnarRingBuffer().to_frame()
+    assert df.empty
+    assert list(df.columns) == ["Timestamp"] + TEXT_COLUMNS
+
+
+@pytest.fixture
+def tcp_receiver():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    receiver = SyslogReceiver("127.0.0.1", port, protocols=("tcp",))
+    receiver.start()
+    yield receiver
+    receiver.stop()
+
+
+def _send_tcp(receiver, payload, expected_total):
+    with socket.create_connection((receiver.host, receiver.port)) as sock:
+        sock.sendall(payload)
+    deadline = time.monotonic() + 5
+    while receiver.parsed + receiver.unparsed < expected_total and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+
+def test_tcp_ignores_empty_lines(tcp_receiver):
+    payload = "\n".join([LINE.format(second=1, message="first"), "", "\r", LINE.format(second=2, message="second"), ""]).encode()
+    _send_tcp(tcp_receiver, payload, expected_total=2)
+    time.sleep(0.1)
+    assert (tcp_receiver.received, tcp_receiver.parsed, tcp_receiver.unparsed) == (2, 2, 0)
+
+
+def test_tcp_truncates_frames_longer_than_the_limit(tcp_receiver):
+    long_line = LINE.format(second=1, message="x" * (MAX_TCP_FRAME_BYTES * 10))
+    payload = (long_line + "\n" + LINE.format(second=2, message="after") + "\n").encode()
+    _send_tcp(tcp_receiver, payload, expected_total=2)
+    df = tcp_receiver.to_frame()
+    assert df["Message"].tolist()[-1] == "after"
+    assert len(df) == 2
+    assert len(df["Message"].iloc[0]) < MAX_TCP_FRAME_BYTES
+    assert tcp_receiver.unparsed == 0
+
+
+def test_pending_messages_are_capped_when_parsing_falls_behind(monkeypatch):
+    monkeypatch.setattr(syslog_receiver, "MAX_PENDING_MESSAGES", 5)
+    monkeypatch.setattr(syslog_receiver, "MAX_PENDING_BYTES", 10 ** 6)
+    # パーサーのスレッドを起動せずに受信側だけを呼び出し、パースが追いつかない状態を作る
+    receiver = SyslogReceiver("127.0.0.1", 0)
+    for second in range(8):
+        receiver._enqueue([LINE.format(second=second, message=f"m{second}").encode()])
+    assert (receiver.received, receiver.dropped, len(receiver._pending)) == (8, 3, 5)
+    receiver._flush()
+    assert receiver.to_frame()["Message"].tolist() == [f"m{second}" for second in range(3, 8)]
+    assert receiver.stats()["dropped"] == 3
+
+
+def test_pending_messages_are_capped_by_bytes(monkeypatch):
+    message = LINE.format(second=1, message="x" * 100).encode()
+    monkeypatch.setattr(syslog_receiver, "MAX_PENDING_BYTES", len(message) * 3)
+    receiver = SyslogReceiver("127.0.0.1", 0)
+    receiver._enqueue([message] * 10)
+    assert (receiver.dropped, len(receiver._pending), receiver._pending_bytes) == (7, 3, len(message) * 3)
+    receiver._flush()
+    assert receiver._pending_bytes == 0
+    receiver._enqueue([message] * 2)
+    assert receiver.dropped == 7
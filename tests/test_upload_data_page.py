@@ -0,0 +1,69 @@
+# tests/test_upload_data_page.py
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from src.utils import file_handlers, log_preview
+
+LINES = [f"2024-05-01T10:{i:02d}:00.000000+09:00 host app[1]: message {i}" for i in range(60)]
+
+
+def _load_app(log_path):
+    import streamlit as st
+
+    from src.app_pages.upload_data_page import load_log_source
+
+    st.session_state.log_summary = None
+    try:
+        load_log_source(log_path, None, use_database=False)
+    except RuntimeError as error:
+        st.session_state.load_error = str(error)
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    # 小さなファイルでもクイックプレビューを表示する
+    monkeypatch.setattr(log_preview, "PREVIEW_MIN_BYTES", 0)
+    path = tmp_path / "syslog.log"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _spy_loader(monkeypatch, fail):
+    """読み込み中の log_time_span を記録し、fail が真なら読み込みに失敗する load_logs_from_path に置き換える。"""
+    load_logs_from_path = file_handlers.load_logs_from_path
+
+    def spy(log_source, **kwargs):
+        import streamlit as st
+
+        st.session_state.span_during_load = dict(st.session_state.log_time_span)
+        if fail:
+            raise RuntimeError("broken file")
+        return load_logs_from_path(log_source, **kwargs)
+
+    monkeypatch.setattr(file_handlers, "load_logs_from_path", spy)
+
+
+def _run(log_path):
+    app = AppTest.from_function(_load_app, kwargs={"log_path": log_path}, default_timeout=30).run()
+    assert not app.exception
+    return app.session_state
+
+
+def test_estimated_span_is_replaced_by_the_loaded_span(log_path, monkeypatch):
+    _spy_loader(monkeypatch, fail=False)
+    state = _run(log_path)
+    during = state["span_during_load"]
+    assert during["estimated"] is True
+    assert during["start"] is not None and during["end"] is not None
+    span = state["log_time_span"]
+    assert span["estimated"] is False
+    assert (span["start"].minute, span["end"].minute) == (0, 59)
+    assert len(state["df"]) == len(LINES)
+
+
+def test_failed_load_does_not_leave_the_estimated_span(log_path, monkeypatch):
+    _spy_loader(monkeypatch, fail=True)
+    state = _run(log_path)
+    assert state["load_error"] == "broken file"
+    assert state["span_during_load"]["estimated"] is True
+    assert state["log_time_span"] is None